@@ -0,0 +1,173 @@
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from cryptography.fernet import Fernet
+from typing import Dict, List
+
+from app.benchmarks.fake_metabase import FakeMetabase
+from app.datasources.metabase import BaseAPI, MetabaseClient
+from app.extractors import MetabaseCollection
+from app.settings import app_settings as settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadBenchmark:
+    """
+    A class that drives the Metabase downloads of the `MetabaseCollection`
+    against a local `FakeMetabase`, and measures them for every combination
+    of the given number of workers and chunk sizes.
+    """
+
+    def __init__(self, fake: FakeMetabase, retries: int = 3, backoff: float = 0.0) -> None:
+        self._fake = fake
+        self._retries = retries
+        self._backoff = backoff
+
+    def run(self, workers: List[int], chunk_sizes: List[int], repeat: int = 1) -> List[Dict]:
+        """
+        Downloads every collection `repeat` times for every combination of those `workers` and `chunk_sizes`.
+
+        Returns the best run of every combination.
+        """
+        results = []
+
+        for worker_count in workers:
+            for chunk_size in chunk_sizes:
+                runs = [self._measure(worker_count, chunk_size) for _ in range(repeat)]
+                results.append(min(runs, key=lambda run: run['seconds']))
+
+        return results
+
+    def _measure(self, workers: int, chunk_size: int) -> Dict:
+        """
+        Downloads every collection into an empty snapshots directory with those settings.
+
+        Returns the number of workers, the chunk size, the elapsed time, and the downloaded bytes.
+        """
+        working_dir = tempfile.mkdtemp()
+        current_dir = os.getcwd()
+
+        # The session file and the snapshots are located relatively to the working directory.
+        os.chdir(working_dir)
+        os.makedirs('snapshots')
+
+        self._configure(workers, chunk_size)
+        sent_bytes = self._fake.stats['bytes']
+
+        try:
+            started_at = time.perf_counter()
+            MetabaseCollection().download()
+            elapsed_time = time.perf_counter() - started_at
+
+            downloaded_bytes = sum(
+                os.path.getsize(f'snapshots/{filename}')
+                for filename in os.listdir('snapshots')
+                if filename.endswith('.csv')
+            )
+        finally:
+            os.chdir(current_dir)
+            shutil.rmtree(working_dir, ignore_errors=True)
+
+        return {
+            'workers': workers,
+            'chunk_size': chunk_size,
+            'seconds': elapsed_time,
+            'bytes': downloaded_bytes,
+            'sent_bytes': self._fake.stats['bytes'] - sent_bytes,
+        }
+
+    def _configure(self, workers: int, chunk_size: int) -> None:
+        """
+        Points the Metabase API to the fake server with those settings.
+        """
+        secret_key = Fernet.generate_key()
+
+        settings.METABASE_URL = self._fake.url
+        settings.SECRET_KEY = secret_key
+        settings.METABASE_SERVICE_ACCOUNT = Fernet(secret_key).encrypt(b'service-account@example.com')
+        settings.METABASE_SERVICE_ACCOUNT_PASSWORD = Fernet(secret_key).encrypt(b'password')
+        settings.METABASE_DOWNLOAD_WORKERS = workers
+        settings.METABASE_DOWNLOAD_RETRIES = self._retries
+
+        BaseAPI.RETRY_BACKOFF = self._backoff
+        BaseAPI.MIN_CHUNK_SIZE = chunk_size
+        BaseAPI.MAX_CHUNK_SIZE = chunk_size
+        BaseAPI.DEFAULT_CHUNK_SIZE = chunk_size
+
+        # Every run starts with a fresh connection pool and session.
+        MetabaseClient._instance = None
+
+
+def parse_size(value: str) -> int:
+    """
+    Parses a size with an optional unit, e.g. `64k` or `1m`.
+    """
+    units = {'k': 1024, 'm': 1024 * 1024}
+
+    value = value.strip().lower()
+    if value[-1] in units:
+        return int(value[:-1]) * units[value[-1]]
+
+    return int(value)
+
+
+def parse_sizes(value: str) -> List[int]:
+    """
+    Parses a comma-separated list of sizes, e.g. `64k,1m`.
+    """
+    return [parse_size(size) for size in value.split(',')]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmarks the Metabase downloads against a local fake Metabase.')
+    parser.add_argument('--rows', type=int, default=100000, help='Number of rows of every card.')
+    parser.add_argument('--latency', type=float, default=0.05, help='Delay of every request in seconds.')
+    parser.add_argument('--bandwidth', type=parse_size, default=0, help='Bytes per second of every response (0 = unlimited).')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Share of the card exports that fail with 503.')
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help='Share of the card exports that are cut halfway.')
+    parser.add_argument('--workers', type=parse_sizes, default=[1, 2, 4, 8], help='Comma-separated numbers of workers.')
+    parser.add_argument('--chunk-sizes', type=parse_sizes, default=[64 * 1024, 256 * 1024, 1024 * 1024], help='Comma-separated chunk sizes, e.g. 64k,1m.')
+    parser.add_argument('--retries', type=int, default=3, help='Number of retries of a failed download.')
+    parser.add_argument('--backoff', type=float, default=0.0, help='Base delay of the retries in seconds.')
+    parser.add_argument('--repeat', type=int, default=1, help='Number of runs of every combination.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the injected failures.')
+    arguments = parser.parse_args()
+
+    # Keeps the benchmark output clean
+    logging.root.setLevel(logging.WARNING)
+
+    fake = FakeMetabase(
+        rows=arguments.rows,
+        latency=arguments.latency,
+        bandwidth=arguments.bandwidth,
+        failure_rate=arguments.failure_rate,
+        truncate_rate=arguments.truncate_rate,
+        seed=arguments.seed
+    )
+
+    with fake:
+        results = DownloadBenchmark(fake, arguments.retries, arguments.backoff).run(
+            arguments.workers, arguments.chunk_sizes, arguments.repeat
+        )
+
+    print(f"{'workers':>7} {'chunk size':>10} {'seconds':>8} {'MB':>8} {'MB/s':>8} {'overhead':>8}")
+    for result in results:
+        megabytes = result['bytes'] / 1024 / 1024
+        overhead = result['sent_bytes'] / result['bytes'] - 1 if result['bytes'] else 0
+
+        print(
+            f"{result['workers']:>7} {result['chunk_size'] // 1024:>9}k {result['seconds']:>8.2f} "
+            f"{megabytes:>8.2f} {megabytes / result['seconds']:>8.2f} {overhead:>8.1%}"
+        )
+
+    print(f"Requests: {fake.stats['requests']}, failures: {fake.stats['failures']}, truncations: {fake.stats['truncations']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+import json
+import random
+import re
+import time
+import uuid
+
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Dict, List, Union
+
+from app.datasources.metabase import MetabaseAPI
+
+
+class FakeMetabase:
+    """
+    A class that serves a local stand-in of the Metabase API,
+    so that the extraction layer can be exercised without the real Metabase.
+
+    It implements the `/api/session`, `/api/user/current` and `/api/card/{id}/query/{format}` endpoints.
+    The cards are synthetic CSVs of `rows` rows with the columns of their `MetabaseAPI` card.
+    Every request is delayed by `latency` seconds, and the responses are sent at up to `bandwidth`
+    bytes per second (unlimited when it's zero).
+
+    Failures are injected on the card exports: a `failure_rate` share of them fails with a 503 response,
+    and a `truncate_rate` share of them closes the connection halfway through the response.
+    """
+
+    # Number of bytes that are written to the socket at once.
+    WRITE_CHUNK_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        rows: int = 10000,
+        latency: float = 0.0,
+        bandwidth: int = 0,
+        failure_rate: float = 0.0,
+        truncate_rate: float = 0.0,
+        seed: int = 0
+    ) -> None:
+        self.rows = rows
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.failure_rate = failure_rate
+        self.truncate_rate = truncate_rate
+
+        self._random = random.Random(seed)
+        self._lock = Lock()
+        self._cards = {}
+        self._sessions = set()
+
+        # Number of served requests, injected failures and sent bytes.
+        self.stats = {'requests': 0, 'failures': 0, 'truncations': 0, 'bytes': 0}
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """
+        Returns the base URL of the server, without the `/api` prefix.
+        """
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeMetabase':
+        """
+        Starts serving requests in a background thread.
+        """
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops serving requests.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeMetabase':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def card(self, card_id: int) -> bytes:
+        """
+        Returns the CSV content of the card of that `card_id`.
+        """
+        with self._lock:
+            if card_id not in self._cards:
+                self._cards[card_id] = self._generate_card(card_id)
+
+            return self._cards[card_id]
+
+    def _generate_card(self, card_id: int) -> bytes:
+        """
+        Generates the synthetic CSV content of the card of that `card_id`.
+        """
+        columns = {'client_id': 'type/Text', 'type': 'type/Text', 'start_time': 'type/DateTime'}
+        for card in self._card_classes():
+            if card.card_id == card_id and card.columns:
+                columns = card.columns
+                break
+
+        started_at = datetime(2023, 1, 1)
+        lines = [','.join(columns)]
+
+        for row in range(self.rows):
+            values = []
+
+            for name, base_type in columns.items():
+                if name == 'client_id':
+                    values.append(f'CID-{row % 100}')
+                elif base_type in ['type/Date', 'type/DateTime']:
+                    values.append((started_at + timedelta(minutes=row)).isoformat())
+                elif base_type == 'type/Integer':
+                    values.append(str(row % 10))
+                elif base_type == 'type/Boolean':
+                    values.append('true' if row % 2 else 'false')
+                else:
+                    values.append(f'{name}-{row}')
+
+            lines.append(','.join(values))
+
+        return ('\n'.join(lines) + '\n').encode()
+
+    def _card_classes(self) -> List[type]:
+        """
+        Returns every card class of the Metabase API.
+        """
+        classes = []
+        pending = [MetabaseAPI]
+
+        while pending:
+            subclasses = pending.pop().__subclasses__()
+            classes.extend(subclasses)
+            pending.extend(subclasses)
+
+        return classes
+
+    def _inject(self, rate: float, stat: str) -> bool:
+        """
+        Returns True when a failure of that `rate` must be injected, and counts it into that `stat`.
+        """
+        with self._lock:
+            injected = rate > 0 and self._random.random() < rate
+            if injected:
+                self.stats[stat] += 1
+
+            return injected
+
+    def _handler(self) -> type:
+        """
+        Returns the request handler class of the server.
+        """
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args) -> None:
+                # Keeps the benchmark output clean
+                pass
+
+            def do_GET(self) -> None:
+                self._begin()
+
+                if self.path == '/api/user/current' and self._is_authenticated():
+                    self._send_json(200, {'id': 1, 'email': 'service-account@example.com'})
+                    return
+
+                self._send_json(401, {'message': 'Unauthenticated'})
+
+            def do_POST(self) -> None:
+                self._begin()
+
+                # Drains the request body, so that the connection can be reused.
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+                if self.path == '/api/session':
+                    credentials = json.loads(body or b'{}')
+                    if not credentials.get('username') or not credentials.get('password'):
+                        self._send_json(400, {'message': 'Missing credentials'})
+                        return
+
+                    session_id = str(uuid.uuid4())
+                    with fake._lock:
+                        fake._sessions.add(session_id)
+
+                    self._send_json(200, {'id': session_id})
+                    return
+
+                match = re.fullmatch(r'/api/card/(\d+)/query/(\w+)', self.path)
+                if not match:
+                    self._send_json(404, {'message': 'Not found'})
+                    return
+
+                if not self._is_authenticated():
+                    self._send_json(401, {'message': 'Unauthenticated'})
+                    return
+
+                if fake._inject(fake.failure_rate, 'failures'):
+                    self._send_json(503, {'message': 'Service Unavailable'})
+                    return
+
+                self._send_card(fake.card(int(match.group(1))))
+
+            def _begin(self) -> None:
+                with fake._lock:
+                    fake.stats['requests'] += 1
+
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+            def _is_authenticated(self) -> bool:
+                with fake._lock:
+                    return self.headers.get('X-Metabase-Session') in fake._sessions
+
+            def _send_json(self, status: int, content: Dict) -> None:
+                body = json.dumps(content).encode()
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_card(self, content: bytes) -> None:
+                offset = self._range_offset()
+
+                if offset is not None and offset >= len(content):
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{len(content)}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                if offset is None:
+                    self.send_response(200)
+                    offset = 0
+                else:
+                    self.send_response(206)
+                    self.send_header('Content-Range', f'bytes {offset}-{len(content) - 1}/{len(content)}')
+
+                body = content[offset:]
+
+                self.send_header('Content-Type', 'text/csv')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Accept-Ranges', 'bytes')
+                self.end_headers()
+
+                if fake._inject(fake.truncate_rate, 'truncations'):
+                    self._write(body[:len(body) // 2])
+                    self.close_connection = True
+                    return
+
+                self._write(body)
+
+            def _range_offset(self) -> Union[int, None]:
+                match = re.fullmatch(r'bytes=(\d+)-', self.headers.get('Range') or '')
+                return int(match.group(1)) if match else None
+
+            def _write(self, body: bytes) -> None:
+                for start in range(0, len(body), fake.WRITE_CHUNK_SIZE):
+                    chunk = body[start:start + fake.WRITE_CHUNK_SIZE]
+                    self.wfile.write(chunk)
+
+                    with fake._lock:
+                        fake.stats['bytes'] += len(chunk)
+
+                    if fake.bandwidth:
+                        time.sleep(len(chunk) / fake.bandwidth)
+
+        return Handler
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import logging
+import numpy as np
+import os
+import pandas as pd
+
+from typing import Callable, Dict, List, Union
+
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotCache:
+    """
+    A class that caches the parsed snapshots in the columnar Feather format,
+    next to their source CSV in a `.cache` directory.
+
+    A cached snapshot is only used while its source CSV has the same modification time and size,
+    or the same content hash when only the modification time changed,
+    and while it was parsed by the same version of the parser and of pandas.
+    """
+
+    # Bump it to invalidate every cached snapshot.
+    VERSION = 1
+
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+
+    def read(
+        self,
+        path: str,
+        parse: Callable[[str], pd.DataFrame],
+        version: int = 1,
+        json_columns: List[str] = []
+    ) -> pd.DataFrame:
+        """
+        Returns the snapshot located at that `path` parsed by that `parse` function,
+        from the cache when it's still valid.
+
+        The `version` of the parser is bumped by hand whenever that `parse` function changes
+        (see the `SNAPSHOT_VERSION` of the extractors), which invalidates its cached snapshots.
+
+        The `json_columns` hold Python objects (e.g. dictionaries) that can't be stored in a columnar format,
+        hence they are cached as JSON strings.
+        """
+        if not self.enabled:
+            return parse(path)
+
+        directory, filename = os.path.split(path)
+        cache_path = os.path.join(directory, '.cache', f'{filename}.feather')
+        meta_path = os.path.join(directory, '.cache', f'{filename}.json')
+
+        source = self._stat(path)
+        meta = self._read_meta(meta_path)
+        parser = f'{self.VERSION}.{version}:pandas-{pd.__version__}'
+
+        if meta is not None and meta['parser'] == parser and os.path.exists(cache_path):
+            is_valid = (meta['mtime_ns'], meta['size']) == (source['mtime_ns'], source['size'])
+
+            # The file was touched, but its content might be unchanged.
+            if not is_valid and meta['size'] == source['size'] and meta['sha256'] == self._hash(path):
+                is_valid = True
+                self._write_meta(meta_path, {**meta, 'mtime_ns': source['mtime_ns']})
+
+            if is_valid:
+                return self._load(cache_path, json_columns)
+
+        df = parse(path)
+
+        try:
+            # Invalidates the cached snapshot first, in case that storing it fails halfway.
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+
+            self._store(df, cache_path, json_columns)
+            self._write_meta(meta_path, {**source, 'sha256': self._hash(path), 'parser': parser})
+        except (OSError, ValueError, TypeError) as error:
+            # The cache is an optimization, the parsed snapshot is still valid.
+            logger.warning(f"Failed to cache {path} ({error})")
+
+        return df
+
+    def _load(self, cache_path: str, json_columns: List[str]) -> pd.DataFrame:
+        """
+        Loads the cached snapshot located at that `cache_path`.
+        """
+        df = pd.read_feather(cache_path)
+
+        for column in json_columns:
+            df[column] = df[column].map(lambda value: json.loads(value) if isinstance(value, str) else np.nan)
+
+        return df
+
+    def _store(self, df: pd.DataFrame, cache_path: str, json_columns: List[str]) -> None:
+        """
+        Stores that `df` into that `cache_path`.
+        """
+        cache_dir = os.path.dirname(cache_path)
+
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+
+            # Keeps the cached snapshots out of the version control.
+            with open(os.path.join(cache_dir, '.gitignore'), 'w') as file:
+                file.write('*\n')
+
+        if json_columns:
+            df = df.copy()
+
+        for column in json_columns:
+            df[column] = df[column].map(lambda value: json.dumps(value) if isinstance(value, (dict, list)) else None)
+
+        temp_path = f'{cache_path}.tmp'
+        df.to_feather(temp_path)
+        os.replace(temp_path, cache_path)
+
+    def _stat(self, path: str) -> Dict:
+        """
+        Returns the modification time and the size of the file located at that `path`.
+        """
+        stat = os.stat(path)
+        return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+    def _hash(self, path: str) -> str:
+        """
+        Returns the content hash of the file located at that `path`.
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(self.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def _read_meta(self, meta_path: str) -> Union[Dict, None]:
+        """
+        Reads the metadata of the cached snapshot.
+        """
+        if not os.path.exists(meta_path):
+            return None
+
+        try:
+            with open(meta_path, 'r') as file:
+                return json.load(file)
+        except ValueError:
+            return None
+
+    def _write_meta(self, meta_path: str, meta: Dict) -> None:
+        """
+        Writes the metadata of the cached snapshot.
+        """
+        temp_path = f'{meta_path}.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(meta, file)
+
+        os.replace(temp_path, meta_path)
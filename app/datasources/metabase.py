@@ -1,19 +1,29 @@
+import csv
+import json
 import logging
 import os
+import time
 
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.fernet import Fernet
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from requests import (
-    post,
-    request,
+    ConnectionError,
     HTTPError,
-    Response
+    Response,
+    Session,
+    Timeout
 )
-from typing import Dict, List, Union
+from requests.exceptions import ChunkedEncodingError
+from requests.adapters import HTTPAdapter
+from threading import Lock, RLock
+from typing import Callable, Dict, IO, List, Tuple, Union
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
 
 from app.settings import (
     app_settings as settings,
-    Development
+    Development,
+    FileLocator
 )
 
 
@@ -45,11 +55,90 @@ def api_tracer(response, *args, **kwargs) -> None:
     logger.info(f"\n{endpoint} - {res_code}\n{res_data}")
 
 
+class TeeReader:
+    """
+    A file-like object that reads from that `stream`
+    and copies everything it reads into that `file` (if any).
+    """
+
+    def __init__(self, stream: IO, file: Union[IO, None] = None) -> None:
+        self._stream = stream
+        self._file = file
+
+        # Number of bytes read so far.
+        self.size = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._copy(data)
+        return data
+
+    def readline(self, size: int = -1) -> bytes:
+        data = self._stream.readline(size)
+        self._copy(data)
+        return data
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+    def _copy(self, data: bytes) -> None:
+        self.size += len(data)
+
+        if self._file is not None:
+            self._file.write(data)
+
+
+class MetabaseClient:
+    """
+    A process-wide Metabase client that owns a keep-alive connection pool
+    and the authenticated session ID shared by every Metabase API.
+    """
+
+    _instance = None
+    _instance_lock = Lock()
+
+    def __init__(self, pool_size: int) -> None:
+        self.http = Session()
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.http.mount('http://', adapter)
+        self.http.mount('https://', adapter)
+
+        # The session ID is resolved by the first Metabase API that needs it.
+        # The lock is reentrant, since the session is validated while it is held.
+        self.session_id = None
+        self.session_lock = RLock()
+
+        # The ID of the database that every card queries, keyed by the card ID (see `MetabaseAPI._database_id()`).
+        self.database_ids = {}
+
+    @classmethod
+    def shared(cls) -> 'MetabaseClient':
+        """
+        Returns the Metabase client of the current process.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls(pool_size=max(1, settings.METABASE_DOWNLOAD_WORKERS))
+
+            return cls._instance
+
+
 class BaseAPI:
 
+    # The base delay (in seconds) of the exponential backoff between download attempts.
+    RETRY_BACKOFF = 1
+
+    # Boundaries of the download chunk size (in bytes).
+    MIN_CHUNK_SIZE = 64 * 1024
+    MAX_CHUNK_SIZE = 1024 * 1024
+    DEFAULT_CHUNK_SIZE = 256 * 1024
+
     def __init__(self) -> None:
         self._debug_mode = True if isinstance(settings, Development) else False
 
+        self._client = MetabaseClient.shared()
+
         self._api_url = settings.METABASE_URL + '/api'
 
     def _api_request(
@@ -72,11 +161,47 @@ class BaseAPI:
         if session_id:
             headers.update({"X-Metabase-Session": session_id})
 
-        response = request(method, url, json=payload, headers=headers, hooks=hooks)
+        response = self._client.http.request(method, url, json=payload, headers=headers, hooks=hooks)
+
+        # A rejected session (e.g. a revoked one) is renewed once.
+        if response.status_code == 401 and session_id:
+            renewed_session_id = self._renew_session(session_id)
+
+            if renewed_session_id:
+                headers.update({"X-Metabase-Session": renewed_session_id})
+                response = self._client.http.request(method, url, json=payload, headers=headers, hooks=hooks)
+
         response.raise_for_status()
 
         return response
 
+    def _post_stream(self, url: str, payload: Union[Dict, None], headers: Dict, hooks: Union[Dict, None]) -> Response:
+        """
+        Posts a streamed download request.
+
+        A rejected session (e.g. a revoked one) is renewed once,
+        and the renewed session ID replaces the one of those `headers`.
+        """
+        response = self._client.http.post(url, data=payload, headers=headers, stream=True, hooks=hooks)
+
+        if response.status_code == 401 and headers.get('X-Metabase-Session'):
+            renewed_session_id = self._renew_session(headers['X-Metabase-Session'])
+
+            if renewed_session_id:
+                response.close()
+
+                headers['X-Metabase-Session'] = renewed_session_id
+                response = self._client.http.post(url, data=payload, headers=headers, stream=True, hooks=hooks)
+
+        return response
+
+    def _renew_session(self, session_id: str) -> Union[str, None]:
+        """
+        Returns a new session ID that replaces that rejected `session_id`,
+        or None if the session can't be renewed.
+        """
+        return None
+
     def _download_file(
         self,
         path: str,
@@ -85,9 +210,16 @@ class BaseAPI:
         session_id: str,
         payload: Union[Dict, None] = None,
         custom_headers: Dict = {}
-    ) -> None:
+    ) -> int:
         """
         Download datasource from Metabase.
+
+        The datasource is written into a temporary file that is renamed once the download completes,
+        so that an interrupted download never leaves a truncated file behind.
+        Failed downloads are retried with an exponential backoff, and they are resumed
+        from the downloaded bytes when the server supports range requests.
+
+        Returns the number of downloaded bytes.
         """
         # Validate incoming download format
         if format not in ['json', 'csv', 'xlsx', 'api']:
@@ -108,6 +240,8 @@ class BaseAPI:
         if download_dirs:
             save_as_file = f"{download_dirs_path}/{save_as_file}"
 
+        temp_file = f"{save_as_file}.part"
+
         # Download file
         url = self._api_url + path
         hooks = {'response': download_tracer} if self._debug_mode else None
@@ -115,62 +249,302 @@ class BaseAPI:
         headers = {"Accept": "*/*", "X-Metabase-Session": session_id}
         headers.update(custom_headers)
 
-        chunk_size = 4096
+        retries = max(0, settings.METABASE_DOWNLOAD_RETRIES)
+        started_at = time.perf_counter()
 
-        with post(url, data=payload, headers=headers, stream=True, hooks=hooks) as req:
-            with open(save_as_file, 'wb') as file:
-                # Writes response data in chunk
-                for chunk in req.iter_content(chunk_size):
-                    if not chunk:
-                        continue
+        # Number of bytes of the temporary file that can be resumed on the next attempt.
+        offset = 0
+
+        for attempt in range(retries + 1):
+            try:
+                offset = self._stream_file(url, temp_file, offset, payload, headers, hooks)
+                break
+            except (ConnectionError, ChunkedEncodingError, Timeout, HTTPError) as error:
+                if not self._is_retryable(error) or attempt == retries:
+                    if os.path.exists(temp_file):
+                        os.remove(temp_file)
 
-                    file.write(chunk)
+                    raise
+
+                # Keeps the downloaded bytes only if the server can resume them.
+                offset = error.resumable_offset if hasattr(error, 'resumable_offset') else 0
+
+                delay = self.RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"Failed to download {path} ({error}), retrying in {delay}s...")
+                time.sleep(delay)
+
+        os.replace(temp_file, save_as_file)
+
+        elapsed_time = time.perf_counter() - started_at
+        throughput = offset / elapsed_time if elapsed_time > 0 else 0
+        logger.info(f"Downloaded {path}: {offset} bytes in {elapsed_time:.2f}s ({throughput:.0f} bytes/s)")
+
+        return offset
+
+    def _stream_file(
+        self,
+        url: str,
+        temp_file: str,
+        offset: int,
+        payload: Union[Dict, None],
+        headers: Dict,
+        hooks: Union[Dict, None]
+    ) -> int:
+        """
+        Streams the response of the download request into `temp_file`.
+        When `offset` is given, the download is resumed from that byte.
+
+        Returns the size of `temp_file`. On failures, the raised error holds
+        the number of bytes that can be resumed in its `resumable_offset` attribute.
+        """
+        headers = dict(headers)
+        if offset:
+            headers.update({"Range": f"bytes={offset}-"})
+
+        written = 0
+        resumable = False
+
+        try:
+            with self._post_stream(url, payload, headers, hooks) as req:
+                req.raise_for_status()
+
+                # The server might ignore the range request and send the whole file instead.
+                resumed = offset > 0 and req.status_code == 206
+                written = offset if resumed else 0
+
+                # Encoded responses can't be resumed, since their ranges refer to the encoded bytes.
+                resumable = req.headers.get('Accept-Ranges') == 'bytes' and not req.headers.get('Content-Encoding')
+
+                content_length = req.headers.get('Content-Length')
+                expected_size = written + int(content_length) if content_length else None
+
+                with open(temp_file, 'ab' if resumed else 'wb') as file:
+                    # Writes response data in chunk
+                    for chunk in req.iter_content(self._chunk_size(content_length)):
+                        if not chunk:
+                            continue
+
+                        file.write(chunk)
+                        written += len(chunk)
+
+                if expected_size is not None and written < expected_size:
+                    raise ConnectionError(f'Connection closed after {written} of {expected_size} bytes.')
+        except (ConnectionError, ChunkedEncodingError, Timeout, HTTPError) as error:
+            error.resumable_offset = written if resumable else 0
+            raise
+
+        return written
+
+    def _read_stream(
+        self,
+        path: str,
+        session_id: str,
+        reader: Callable[[IO], any],
+        save_to: Union[str, None] = None,
+        payload: Union[Dict, None] = None
+    ) -> any:
+        """
+        Streams datasource from Metabase into that `reader` while it is downloaded,
+        and returns the result of the `reader`.
+
+        When `save_to` is given, the downloaded bytes are stored into that file as well.
+        Failed streams are retried from the beginning with an exponential backoff,
+        including the streams that are cut off before their `Content-Length`,
+        hence the `reader` must read the stream to its end.
+        """
+        url = self._api_url + path
+        hooks = {'response': download_tracer} if self._debug_mode else None
+
+        headers = {"Accept": "*/*", "X-Metabase-Session": session_id}
+
+        temp_file = f"{save_to}.part" if save_to else None
+        retries = max(0, settings.METABASE_DOWNLOAD_RETRIES)
+
+        for attempt in range(retries + 1):
+            try:
+                started_at = time.perf_counter()
+
+                with self._post_stream(url, payload, headers, hooks) as req:
+                    req.raise_for_status()
+                    req.raw.decode_content = True
+
+                    # The raw stream ends silently when the connection is closed before the end of the response,
+                    # unless its length is enforced.
+                    req.raw.enforce_content_length = True
+
+                    if temp_file:
+                        with open(temp_file, 'wb') as file:
+                            stream = TeeReader(req.raw, file)
+                            result = reader(stream)
+                    else:
+                        stream = TeeReader(req.raw)
+                        result = reader(stream)
+
+                    # The size of the encoded responses can't be compared with the size of their decoded bytes.
+                    content_length = req.headers.get('Content-Length')
+                    if content_length and not req.headers.get('Content-Encoding') and stream.size < int(content_length):
+                        raise ConnectionError(f'Connection closed after {stream.size} of {content_length} bytes.')
+
+                break
+            # The raw stream raises the errors of `urllib3`, since it isn't wrapped by `requests`.
+            except (ConnectionError, ChunkedEncodingError, Timeout, HTTPError, ProtocolError, ReadTimeoutError) as error:
+                if temp_file and os.path.exists(temp_file):
+                    os.remove(temp_file)
+
+                if not self._is_retryable(error) or attempt == retries:
+                    raise
+
+                delay = self.RETRY_BACKOFF * 2 ** attempt
+                logger.warning(f"Failed to stream {path} ({error}), retrying in {delay}s...")
+                time.sleep(delay)
+
+        if temp_file:
+            os.replace(temp_file, save_to)
+
+        elapsed_time = time.perf_counter() - started_at
+        throughput = stream.size / elapsed_time if elapsed_time > 0 else 0
+        logger.info(f"Streamed {path}: {stream.size} bytes in {elapsed_time:.2f}s ({throughput:.0f} bytes/s)")
+
+        return result
+
+    def _is_retryable(self, error: Exception) -> bool:
+        """
+        Returns True if the request that failed with that `error` is worth retrying.
+        """
+        if not isinstance(error, HTTPError):
+            return True
+
+        # A rejected range (416) is retried from the first byte.
+        status_code = error.response.status_code
+        return status_code in [416, 429] or status_code >= 500
+
+    def _chunk_size(self, content_length: Union[str, None]) -> int:
+        """
+        Returns the download chunk size that fits with the size of the downloaded file.
+        """
+        if not content_length:
+            return self.DEFAULT_CHUNK_SIZE
+
+        return min(max(int(content_length) // 100, self.MIN_CHUNK_SIZE), self.MAX_CHUNK_SIZE)
 
 
 class MetabaseAPI(BaseAPI):
 
-    def __init__(self) -> None:
+    # Metabase collection's ID that refers to the card.
+    card_id = None
+
+    # Name of the `FileLocator` property that locates the snapshot of the card.
+    snapshot = None
+
+    # Columns of the card (and their Metabase base types) that are used by the extractors.
+    columns = {}
+
+    # Rows of the card that are exported once the treatment windows are known:
+    # - None: every row.
+    # - 'clients': the rows of the treated clients.
+    # - 'treatments': the rows of the treated clients that started within their treatment window,
+    #   extended by `treatment_lookback` before the treatment starts.
+    #   The ongoing treatments (without end date) select every row since the treatment window starts.
+    scope = None
+    treatment_lookback = timedelta(days=0)
+
+    # Whether the card is large enough to be exported in date-range shards.
+    shardable = False
+
+    # How long the card's snapshot is considered fresh after it was downloaded,
+    # when only the stale snapshots are refreshed.
+    ttl = timedelta(0)
+
+    # Whether the card only grows over time, so that it can be downloaded incrementally.
+    incremental = False
+
+    # Whether the saved card declares an optional `start_time` date parameter (template tag)
+    # that selects the rows started on or after the given date.
+    # Metabase ignores the parameters that the card doesn't declare, and exports the whole card instead,
+    # hence the saved card is only downloaded incrementally when it's known to declare it.
+    start_time_tag = False
+
+    # Normally, the Metabase session ID is valid for up to 14 days.
+    # A session is renewed a day earlier to not expire in the middle of a download.
+    # @see https://www.metabase.com/learn/administration/metabase-api
+    SESSION_MAX_AGE = timedelta(days=14)
+    SESSION_RENEWAL_MARGIN = timedelta(days=1)
+
+    def __init__(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> None:
+        """
+        The `treatment_windows` maps the ID of the treated clients
+        to the start and end dates of their treatment.
+        """
         super().__init__()
 
+        self._file_locator = file_locator
+        self._treatment_windows = treatment_windows
+
         self._session_file = '.metabase.session.tmp'
-        self._session_id = self._get_session()
+
+        # Resolves the session once and shares it with the other Metabase APIs.
+        with self._client.session_lock:
+            if self._client.session_id is None:
+                self._client.session_id = self._get_session()
+
+        self._session_id = self._client.session_id
 
     def _get_session(self) -> str:
         """
-        Reads the user's session ID from local file and validates it.
+        Reads the user's session ID from local file.
+        A session that is younger than its known expiry is used as it is,
+        otherwise it is validated against Metabase.
         If absent or invalid, it generates a new token and writes it to the temp file.
 
         Returns the session ID.
         """
-        session_id = self._read_session_id()
+        session_id, created_at = self._read_session()
+        if session_id and created_at and self._is_fresh(created_at):
+            return session_id
+
         if session_id and self._is_valid(session_id):
             return session_id
 
         return self._request_session()
 
-    def _read_session_id(self) -> Union[str, None]:
+    def _read_session(self) -> Tuple[Union[str, None], Union[datetime, None]]:
         """
-        Read session ID from the temporary file.
+        Read session ID and its creation time from the temporary file.
 
-        Returns the session ID or None.
+        Returns tuple of the session ID and its creation time.
+        Both of them are None when the session file is absent or unreadable,
+        and the creation time is None for the session file that only holds the session ID.
         """
         if not os.path.exists(self._session_file):
-            return None
+            return (None, None)
 
         with open(self._session_file, "r") as file_session_id:
             try:
-                return file_session_id.read()
+                content = file_session_id.read()
             except Exception:
-                return None
+                return (None, None)
+
+        try:
+            session = json.loads(content)
+            return (session['id'], datetime.fromisoformat(session['created_at']))
+        except (ValueError, TypeError, KeyError):
+            return (content, None)
+
+    def _is_fresh(self, created_at: datetime) -> bool:
+        """
+        Returns True if the session created at `created_at` is not about to expire.
+        """
+        return datetime.now() - created_at < self.SESSION_MAX_AGE - self.SESSION_RENEWAL_MARGIN
 
     def _is_valid(self, session_id: str) -> bool:
         """
         Returns True if that `session_id` is valid.
         If we can retrieve Metabase user profile belonging to the given `session_id`,
         we assume that session is valid.
-
-        Normally, the Metabase session ID is valid for up to 14 days.
-        @see https://www.metabase.com/learn/administration/metabase-api
         """
         method = 'GET'
         path = '/user/current'
@@ -201,12 +575,36 @@ class MetabaseAPI(BaseAPI):
 
         return session_id
 
+    def _renew_session(self, session_id: str) -> Union[str, None]:
+        """
+        Returns a new session ID that replaces that rejected `session_id`.
+
+        The session file is invalidated and a new session is requested,
+        unless another Metabase API has already renewed the shared session.
+        A session that is rejected while it is resolved isn't renewed.
+        """
+        with self._client.session_lock:
+            if self._client.session_id is None:
+                return None
+
+            if self._client.session_id == session_id:
+                logger.warning("The Metabase session has been rejected, requesting a new one...")
+
+                if os.path.exists(self._session_file):
+                    os.remove(self._session_file)
+
+                self._client.session_id = self._request_session()
+
+            self._session_id = self._client.session_id
+
+        return self._session_id
+
     def _write_session(self, session_id: str) -> None:
         """
-        Write that `session_id` into disk.
+        Write that `session_id` and its creation time into disk.
         """
         with open(self._session_file, "w") as file_session_id:
-            file_session_id.write(session_id)
+            json.dump({'id': session_id, 'created_at': datetime.now().isoformat()}, file_session_id)
 
     def _decrypt(self, encrypted_text):
         """
@@ -214,23 +612,518 @@ class MetabaseAPI(BaseAPI):
         """
         return Fernet(settings.SECRET_KEY).decrypt(encrypted_text).decode('ascii')
 
+    def stream(self, reader: Callable[[IO], any], persist: bool = False) -> any:
+        """
+        Streams the card from Metabase in CSV format into that `reader`,
+        and returns the result of the `reader`.
+
+        When `persist` is True, the card is stored in the local storage as well.
+        """
+        path, payload = self._export_request('csv')
+
+        save_to = None
+        if persist:
+            directory, filename = getattr(self._file_locator, self.snapshot)
+            save_to = f'{directory}/{filename}'
+
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+
+        result = self._read_stream(path, self._session_id, reader, save_to=save_to, payload=payload)
+
+        # Keeps the watermark in sync with the stored card.
+        if save_to and self.incremental:
+            self._write_watermark(save_to, self._max_start_time(save_to))
+
+        return result
+
+    def _download_card(self, save_to: str, format: str) -> None:
+        """
+        Downloads the card from Metabase into `save_to`.
+
+        When the incremental download is enabled, the cards that only grow are downloaded
+        from the day of their `start_time` watermark and appended to the local snapshot,
+        as long as their export can select the rows since that day (see `_exports_since()`).
+        Otherwise, the whole card is downloaded.
+        """
+        if not (self.incremental and settings.METABASE_INCREMENTAL_DOWNLOAD and format == 'csv' and self._exports_since()):
+            self._export(save_to, format)
+            return
+
+        # The local snapshot always lives in the snapshots directory,
+        # even if the card is downloaded into another directory (e.g. staging).
+        snapshot = f'{FILE_LOCATOR.root_dir}/{os.path.basename(save_to)}'
+        watermark = self._read_watermark(snapshot)
+
+        if watermark is None or not os.path.exists(snapshot):
+            logger.info(f"No watermark found for card {self.card_id}, downloading the whole card...")
+
+            self._export(save_to, format)
+            self._write_watermark(save_to, self._max_start_time(save_to))
+            return
+
+        # Rows of the watermark's day are downloaded again,
+        # since new rows may have been added on that day after the previous download.
+        watermark_date = watermark[:10]
+        path, payload = self._export_request(format, since=watermark_date)
+
+        increment = f'{save_to}.increment'
+        self._download_file(path, increment, format, self._session_id, payload=payload)
+
+        try:
+            total_rows = self._merge_increment(snapshot, increment, save_to, watermark_date)
+        finally:
+            increment_size = os.path.getsize(increment)
+            os.remove(increment)
+
+        logger.info(
+            f"Downloaded card {self.card_id} since {watermark_date}: "
+            f"{total_rows} row(s) in {increment_size} bytes"
+        )
+
+        self._write_watermark(save_to, self._max_start_time(save_to) or watermark)
+
+    def _exports_since(self) -> bool:
+        """
+        Returns whether the export request of the card selects the rows started since a date,
+        i.e. whether it's a dataset query, or the saved card declares the `start_time` parameter.
+        """
+        return (self._treatment_windows is not None and bool(self.columns)) or self.start_time_tag
+
+    def _export(self, save_to: str, format: str) -> None:
+        """
+        Exports the whole card from Metabase into `save_to`.
+        Large cards are exported in date-range shards when the sharded export is enabled.
+        """
+        if self.shardable and self.columns and settings.METABASE_EXPORT_SHARDS > 1 and format == 'csv':
+            self._export_shards(save_to, settings.METABASE_EXPORT_SHARDS)
+            return
+
+        path, payload = self._export_request(format)
+        self._download_file(path, save_to, format, self._session_id, payload=payload)
+
+    def _export_shards(self, save_to: str, total_shards: int) -> None:
+        """
+        Splits the card into (up to) `total_shards` contiguous date ranges of its `start_time`,
+        exports them concurrently, and reassembles them in order into `save_to`.
+
+        The rows of every shard are verified to lie within its date range, which no other shard overlaps,
+        and the reassembled card is verified to hold as many rows as the card had before the export started.
+        """
+        first_date, last_date, expected_rows = self._date_range()
+
+        if first_date is None:
+            path, payload = self._export_request('csv')
+            self._download_file(path, save_to, 'csv', self._session_id, payload=payload)
+            return
+
+        # Splits the days of the card into half-open [since, until) date ranges.
+        # The first and the last ranges are left open, so that no row falls outside of them.
+        total_days = (last_date - first_date).days + 1
+        boundaries = sorted({
+            (first_date + timedelta(days=round(shard * total_days / total_shards))).isoformat()
+            for shard in range(1, total_shards)
+        })
+        ranges = list(zip([None, *boundaries], [*boundaries, None]))
+
+        logger.info(f"Exporting card {self.card_id} in {len(ranges)} shard(s)...")
+
+        shard_files = [f'{save_to}.shard-{shard}' for shard in range(len(ranges))]
+
+        def export_shard(shard: int) -> None:
+            since, until = ranges[shard]
+            payload = {'query': json.dumps(self._dataset_query(since=since, until=until))}
+            self._download_file('/dataset/csv', shard_files[shard], 'csv', self._session_id, payload=payload)
+
+        try:
+            workers = max(1, min(len(ranges), settings.METABASE_DOWNLOAD_WORKERS))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(export_shard, range(len(ranges))))
+
+            total_rows = self._assemble_shards(shard_files, ranges, save_to)
+        finally:
+            for shard_file in shard_files:
+                if os.path.exists(shard_file):
+                    os.remove(shard_file)
+
+        # The rows that are added (or removed) while the shards are exported may be missed by them,
+        # hence the card is only trusted when its shards hold exactly the rows it had.
+        if total_rows != expected_rows:
+            os.remove(save_to)
+            raise ValueError(f'Card {self.card_id} shards hold {total_rows} of {expected_rows} rows.')
+
+        logger.info(f"Exported card {self.card_id} in {len(ranges)} shard(s): {total_rows} row(s)")
+
+    def _assemble_shards(self, shard_files: List[str], ranges: List[Tuple], save_to: str) -> int:
+        """
+        Writes the rows of those `shard_files` in order into `save_to`,
+        after verifying that every row lies within the date range of its shard.
+
+        Returns the number of rows of `save_to`.
+        """
+        temp_file = f'{save_to}.tmp'
+
+        try:
+            total_rows = self._write_shards(shard_files, ranges, temp_file)
+        except Exception:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+
+        os.replace(temp_file, save_to)
+
+        return total_rows
+
+    def _write_shards(self, shard_files: List[str], ranges: List[Tuple], temp_file: str) -> int:
+        """
+        Writes the rows of those `shard_files` in order into `temp_file`.
+
+        The same row may be repeated within a shard (e.g. two notifications sent at once),
+        but a row that is in two shards has been exported twice. Since every row is verified to lie
+        within the date range of its shard, the ranges are verified to be contiguous and disjoint instead,
+        so that no row can be in two shards without the rows being held in memory.
+        """
+        starts = [since for since, _ in ranges]
+        ends = [until for _, until in ranges]
+
+        if starts[0] is not None or ends[-1] is not None or starts[1:] != ends[:-1] or None in starts[1:] or \
+                any(since >= until for since, until in ranges[1:-1]):
+            raise ValueError(f'Card {self.card_id} shards have overlapping date ranges: {ranges}.')
+
+        total_rows = 0
+        header = None
+
+        with open(temp_file, 'w', newline='') as assembled_file:
+            writer = csv.writer(assembled_file, lineterminator='\n')
+
+            for shard_file, (since, until) in zip(shard_files, ranges):
+                with open(shard_file, 'r', newline='') as file:
+                    reader = csv.reader(file)
+
+                    shard_header = next(reader, None)
+                    if shard_header is None:
+                        continue
+
+                    if header is None:
+                        header = shard_header
+                        writer.writerow(header)
+                    elif shard_header != header:
+                        raise ValueError(f'Card {self.card_id} shards have different columns.')
+
+                    start_time_index = header.index('start_time')
+
+                    for row in reader:
+                        # The `start_time` values are ISO 8601 strings, hence they can be compared as strings.
+                        start_time = row[start_time_index]
+                        within_range = (
+                            (since is None or start_time[:10] >= since) and
+                            (until is None or not start_time or start_time[:10] < until)
+                        )
+
+                        if not within_range or (since is not None and not start_time):
+                            raise ValueError(f'Card {self.card_id} row started at {start_time} is outside [{since}, {until}).')
+
+                        writer.writerow(row)
+                        total_rows += 1
+
+        return total_rows
+
+    def _date_range(self) -> Tuple[Union[date, None], Union[date, None], int]:
+        """
+        Returns tuple of the first and the last date of the card's `start_time`
+        and the number of rows of the card (within the card's `scope`).
+        """
+        start_time = ['field', 'start_time', {'base-type': self.columns['start_time']}]
+
+        query = {
+            'source-table': f'card__{self.card_id}',
+            'aggregation': [['min', start_time], ['max', start_time], ['count']]
+        }
+
+        filter = self._dataset_filter()
+        if filter is not None:
+            query['filter'] = filter
+
+        payload = {'database': self._database_id(), 'type': 'query', 'query': query}
+        response = self._api_request('POST', '/dataset', self._session_id, payload=payload)
+
+        first_time, last_time, total_rows = response.json()['data']['rows'][0]
+
+        if not first_time:
+            return (None, None, total_rows)
+
+        return (date.fromisoformat(first_time[:10]), date.fromisoformat(last_time[:10]), total_rows)
+
+    def _export_request(self, format: str, since: Union[str, None] = None) -> Tuple[str, Union[Dict, None]]:
+        """
+        Returns tuple of the path and the payload of the request that exports the card.
+
+        When the treatment windows are known, the card is exported through an ad-hoc dataset query
+        that only selects the card's `columns` of the rows within the card's `scope`.
+        Otherwise, the saved card is exported as it is.
+        When `since` is given, only the rows started on or after that date are exported.
+        """
+        if self._treatment_windows is not None and self.columns:
+            query = self._dataset_query(since)
+            return (f'/dataset/{format}', {'query': json.dumps(query)})
+
+        path = f'/card/{self.card_id}/query/{format}'
+
+        if since is None:
+            return (path, None)
+
+        payload = {
+            'parameters': json.dumps([{
+                'type': 'date/single',
+                'target': ['variable', ['template-tag', 'start_time']],
+                'value': since
+            }])
+        }
+        return (path, payload)
+
+    def _dataset_query(self, since: Union[str, None] = None, until: Union[str, None] = None) -> Dict:
+        """
+        Returns the dataset query that selects the card's `columns`
+        of the rows within the card's `scope`.
+        When `since` or `until` are given, only the rows started within [since, until) are selected.
+        """
+        query = {
+            'source-table': f'card__{self.card_id}',
+            'fields': [
+                ['field', name, {'base-type': base_type}]
+                for name, base_type in self.columns.items()
+            ]
+        }
+
+        filter = self._dataset_filter(since, until)
+        if filter is not None:
+            query['filter'] = filter
+
+        return {
+            'database': self._database_id(),
+            'type': 'query',
+            'query': query
+        }
+
+    def _dataset_filter(self, since: Union[str, None] = None, until: Union[str, None] = None) -> Union[List, None]:
+        """
+        Returns the filter of the dataset query that selects the rows within the card's `scope`,
+        and started within [since, until) when they are given.
+        The rows without `start_time` are selected when only `until` is given.
+        """
+        fields = {
+            name: ['field', name, {'base-type': base_type}]
+            for name, base_type in self.columns.items()
+        }
+
+        filters = []
+
+        if self.scope == 'clients' and self._treatment_windows:
+            filters.append(['=', fields['client_id'], *sorted(self._treatment_windows)])
+
+        if self.scope == 'treatments' and self._treatment_windows:
+            filters.append(['or', *[
+                self._treatment_filter(fields, client_id, start_date, end_date)
+                for client_id, (start_date, end_date) in sorted(self._treatment_windows.items())
+            ]])
+
+        if since is not None:
+            filters.append(['>=', fields['start_time'], since])
+
+        if until is not None and since is None:
+            filters.append(['or', ['is-null', fields['start_time']], ['<', fields['start_time'], until]])
+        elif until is not None:
+            filters.append(['<', fields['start_time'], until])
+
+        if len(filters) == 0:
+            return None
+
+        if len(filters) == 1:
+            return filters[0]
+
+        return ['and', *filters]
+
+    def _treatment_filter(
+        self,
+        fields: Dict[str, List],
+        client_id: str,
+        start_date: Union[date, None],
+        end_date: Union[date, None]
+    ) -> List:
+        """
+        Returns the filter of the dataset query that selects the rows of that client
+        within their treatment window, extended by `treatment_lookback` before the treatment starts.
+        The missing dates (e.g. of an ongoing treatment) leave the window open on that side.
+        """
+        client_filter = ['=', fields['client_id'], client_id]
+
+        if start_date is None and end_date is None:
+            return client_filter
+
+        if end_date is None:
+            return ['and', client_filter, ['>=', fields['start_time'], (start_date - self.treatment_lookback).isoformat()]]
+
+        if start_date is None:
+            return ['and', client_filter, ['<=', fields['start_time'], end_date.isoformat()]]
+
+        return [
+            'and',
+            client_filter,
+            ['between', fields['start_time'], (start_date - self.treatment_lookback).isoformat(), end_date.isoformat()]
+        ]
+
+    def _database_id(self) -> int:
+        """
+        Returns the ID of the database that the card queries.
+        It's only requested once per card, and it's shared with the other Metabase APIs.
+        """
+        if self.card_id not in self._client.database_ids:
+            response = self._api_request('GET', f'/card/{self.card_id}', self._session_id)
+            self._client.database_ids[self.card_id] = response.json()['database_id']
+
+        return self._client.database_ids[self.card_id]
+
+    def _merge_increment(self, snapshot: str, increment: str, save_to: str, watermark_date: str) -> int:
+        """
+        Writes the rows of the local `snapshot` started before `watermark_date`
+        followed by the rows of the downloaded `increment` into `save_to`.
+
+        Returns the number of rows of the `increment`.
+        Raises `ValueError` when the `increment` holds rows started before `watermark_date`,
+        e.g. when the card ignored the `start_time` parameter, since they are already in the `snapshot`.
+        """
+        temp_file = f'{save_to}.tmp'
+
+        try:
+            total_rows = self._write_increment(snapshot, increment, temp_file, watermark_date)
+        except Exception:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+
+        os.replace(temp_file, save_to)
+
+        return total_rows
+
+    def _write_increment(self, snapshot: str, increment: str, temp_file: str, watermark_date: str) -> int:
+        """
+        Writes the rows of the local `snapshot` started before `watermark_date`
+        followed by the rows of the downloaded `increment` into `temp_file` (see `_merge_increment()`).
+        """
+        total_rows = 0
+
+        with open(snapshot, 'r', newline='') as snapshot_file, \
+                open(increment, 'r', newline='') as increment_file, \
+                open(temp_file, 'w', newline='') as merged_file:
+            snapshot_reader = csv.reader(snapshot_file)
+            increment_reader = csv.reader(increment_file)
+            writer = csv.writer(merged_file, lineterminator='\n')
+
+            header = next(snapshot_reader)
+            increment_header = next(increment_reader, header)
+
+            if increment_header != header:
+                raise ValueError(f'Card {self.card_id} columns have changed, please download the whole card.')
+
+            start_time_index = header.index('start_time')
+
+            writer.writerow(header)
+
+            for row in snapshot_reader:
+                if row[start_time_index][:10] < watermark_date:
+                    writer.writerow(row)
+
+            for row in increment_reader:
+                # The `start_time` values are ISO 8601 strings, hence they can be compared as strings.
+                if row[start_time_index][:10] < watermark_date:
+                    raise ValueError(
+                        f'Card {self.card_id} increment holds a row started at {row[start_time_index]}, '
+                        f'before {watermark_date}.'
+                    )
+
+                writer.writerow(row)
+                total_rows += 1
+
+        return total_rows
+
+    def _max_start_time(self, snapshot: str) -> Union[str, None]:
+        """
+        Returns the latest `start_time` of that `snapshot`, or None if it has no rows.
+
+        The `start_time` values are ISO 8601 strings,
+        hence they are ordered as well when they are compared as strings.
+        """
+        with open(snapshot, 'r', newline='') as snapshot_file:
+            reader = csv.reader(snapshot_file)
+
+            start_time_index = next(reader).index('start_time')
+
+            return max((row[start_time_index] for row in reader if row[start_time_index]), default=None)
+
+    @classmethod
+    def drop_watermark(cls, file_locator: FileLocator = FILE_LOCATOR) -> None:
+        """
+        Removes the `start_time` watermark of the card's snapshot located by that `file_locator`,
+        so that the next download exports the whole card instead of the rows since the watermark.
+        """
+        directory, filename = getattr(file_locator, cls.snapshot)
+        watermark_file = f'{directory}/{os.path.splitext(filename)[0]}.watermark'
+
+        if os.path.exists(watermark_file):
+            os.remove(watermark_file)
+
+    def _read_watermark(self, snapshot: str) -> Union[str, None]:
+        """
+        Reads the `start_time` watermark that is stored next to that `snapshot`.
+        """
+        watermark_file = f'{os.path.splitext(snapshot)[0]}.watermark'
+
+        if not os.path.exists(watermark_file):
+            return None
+
+        with open(watermark_file, 'r') as file:
+            return file.read().strip() or None
+
+    def _write_watermark(self, snapshot: str, watermark: Union[str, None]) -> None:
+        """
+        Writes that `watermark` next to that `snapshot`.
+        """
+        if watermark is None:
+            return
+
+        with open(f'{os.path.splitext(snapshot)[0]}.watermark', 'w') as file:
+            file.write(watermark)
+
 
 class ClientInfoAPI(MetabaseAPI):
 
     # Metabase collection's ID that refers to the client's card.
     card_id = 2254
 
+    # Name of the `FileLocator` property that locates the card's snapshot.
+    snapshot = 'clients'
+
+    # Columns of the card that are used by the extractors.
+    columns = {
+        'client_id': 'type/Text',
+        'therapist_id': 'type/Text',
+        'start_time': 'type/Date',
+        'end_time': 'type/Date',
+        'no_of_registrations': 'type/Integer',
+    }
+
+    # The clients change rarely.
+    ttl = timedelta(hours=24)
+
     def download(self, format='csv') -> None:
         """
         Downloads client's information from Metabase in CSV format.
         """
-        path = f'/card/{self.card_id}/query/{format}'
-
-        directory, filename = FILE_LOCATOR.clients
+        directory, filename = self._file_locator.clients
 
         save_to = f'{directory}/{filename}'
 
-        self._download_file(path, save_to, format, self._session_id)
+        self._download_card(save_to, format)
 
 
 class CommunicationAPI(MetabaseAPI):
@@ -238,17 +1131,29 @@ class CommunicationAPI(MetabaseAPI):
     # Metabase collection's ID that refers to the communication's card.
     card_id = 2243
 
+    # Name of the `FileLocator` property that locates the card's snapshot.
+    snapshot = 'communications'
+
+    # Columns of the card that are used by the extractors.
+    columns = {
+        'client_id': 'type/Text',
+        'start_time': 'type/Date',
+        'call_made': 'type/Boolean',
+        'chat_msg_sent': 'type/Boolean',
+    }
+
+    # Only the rows of the treated clients are needed.
+    scope = 'clients'
+
     def download(self, format='csv') -> None:
         """
         Downloads clients' communications from Metabase in CSV format.
         """
-        path = f'/card/{self.card_id}/query/{format}'
-
-        directory, filename = FILE_LOCATOR.communications
+        directory, filename = self._file_locator.communications
 
         save_to = f'{directory}/{filename}'
 
-        self._download_file(path, save_to, format, self._session_id)
+        self._download_card(save_to, format)
 
 
 class CustomTrackerAPI(MetabaseAPI):
@@ -256,17 +1161,32 @@ class CustomTrackerAPI(MetabaseAPI):
     # Metabase collection's ID that refers to the client's custom-tracker card.
     card_id = 2248
 
+    # Name of the `FileLocator` property that locates the card's snapshot.
+    snapshot = 'custom_trackers'
+
+    # Columns of the card that are used by the extractors.
+    columns = {
+        'client_id': 'type/Text',
+        'start_time': 'type/DateTime',
+        'name': 'type/Text',
+        'value': 'type/Text',
+    }
+
+    # Only the rows of the treated clients are needed.
+    scope = 'clients'
+
+    # The card only grows over time.
+    incremental = True
+
     def download(self, format='csv') -> None:
         """
         Downloads clients' custom trackers from Metabase in CSV format.
         """
-        path = f'/card/{self.card_id}/query/{format}'
-
-        directory, filename = FILE_LOCATOR.custom_trackers
+        directory, filename = self._file_locator.custom_trackers
 
         save_to = f'{directory}/{filename}'
 
-        self._download_file(path, save_to, format, self._session_id)
+        self._download_card(save_to, format)
 
 
 class DiaryEntryAPI(MetabaseAPI):
@@ -274,17 +1194,30 @@ class DiaryEntryAPI(MetabaseAPI):
     # Metabase collection's ID that refers to the client's diary-entry card.
     card_id = 2244
 
+    # Name of the `FileLocator` property that locates the card's snapshot.
+    snapshot = 'diary_entries'
+
+    # Columns of the card that are used by the extractors.
+    columns = {
+        'client_id': 'type/Text',
+        'start_time': 'type/DateTime',
+    }
+
+    # Only the rows of the treated clients are needed.
+    scope = 'clients'
+
+    # The card only grows over time.
+    incremental = True
+
     def download(self, format='csv') -> None:
         """
         Downloads clients' diary entries from Metabase in CSV format.
         """
-        path = f'/card/{self.card_id}/query/{format}'
-
-        directory, filename = FILE_LOCATOR.diary_entries
+        directory, filename = self._file_locator.diary_entries
 
         save_to = f'{directory}/{filename}'
 
-        self._download_file(path, save_to, format, self._session_id)
+        self._download_card(save_to, format)
 
 
 class NotificationAPI(MetabaseAPI):
@@ -292,17 +1225,143 @@ class NotificationAPI(MetabaseAPI):
     # Metabase collection's ID that refers to the notification card.
     card_id = 2250
 
+    # Name of the `FileLocator` property that locates the card's snapshot.
+    snapshot = 'notifications'
+
+    # Columns of the card that are used by the extractors.
+    columns = {
+        'client_id': 'type/Text',
+        'type': 'type/Text',
+        'start_time': 'type/Date',
+    }
+
+    # Only the notifications around the client's treatment are needed.
+    scope = 'treatments'
+
+    # Notifications are only counted within 7 days before the snapshots,
+    # which start 14 days before the first treatment.
+    treatment_lookback = timedelta(days=21)
+
+    # The card only grows over time.
+    incremental = True
+
+    # The card is one of the largest cards.
+    shardable = True
+
     def download(self, format='csv') -> None:
         """
         Downloads notification data from Metabase in CSV format.
         """
-        path = f'/card/{self.card_id}/query/{format}'
+        directory, filename = self._file_locator.notifications
 
-        directory, filename = FILE_LOCATOR.notifications
+        save_to = f'{directory}/{filename}'
+
+        self._download_card(save_to, format)
+
+
+class DailyNotificationAPI(MetabaseAPI):
+
+    # Metabase collection's ID that refers to the notification card.
+    card_id = 2250
+
+    # Name of the `FileLocator` property that locates the card's snapshot.
+    snapshot = 'daily_notifications'
+
+    # Only the notifications around the client's treatment are needed (see `NotificationAPI`).
+    scope = 'treatments'
+    treatment_lookback = NotificationAPI.treatment_lookback
+
+    # The aggregation of the watermark's day is replaced on every download,
+    # hence the daily counts can be downloaded incrementally as well.
+    incremental = True
+
+    def download(self, format='csv') -> None:
+        """
+        Downloads the number of notifications per client, type, and day from Metabase in CSV format.
+        """
+        directory, filename = self._file_locator.daily_notifications
 
         save_to = f'{directory}/{filename}'
 
-        self._download_file(path, save_to, format, self._session_id)
+        self._download_card(save_to, format)
+
+    def _export_request(self, format: str, since: Union[str, None] = None) -> Tuple[str, Union[Dict, None]]:
+        """
+        Returns tuple of the path and the payload of the request
+        that exports the daily counts of the notifications through a native query.
+
+        When the treatment windows are known, only the days within the card's `scope` are exported.
+        When `since` is given, only the days on or after that date are exported.
+        """
+        card_tag = f'#{self.card_id}'
+
+        conditions = []
+
+        if self._treatment_windows:
+            conditions.append('(' + ' OR '.join(
+                self._native_treatment_condition(client_id, start_date, end_date)
+                for client_id, (start_date, end_date) in sorted(self._treatment_windows.items())
+            ) + ')')
+
+        if since:
+            conditions.append(f"CAST(start_time AS DATE) >= {self._native_date(date.fromisoformat(since))}")
+
+        condition = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        query = {
+            'database': self._database_id(),
+            'type': 'native',
+            'native': {
+                'query': (
+                    "SELECT client_id, type, CAST(start_time AS DATE) AS start_time, COUNT(*) AS count "
+                    f"FROM {{{{{card_tag}}}}} AS notifications {condition} "
+                    "GROUP BY client_id, type, CAST(start_time AS DATE) "
+                    "ORDER BY client_id, type, CAST(start_time AS DATE)"
+                ),
+                'template-tags': {
+                    card_tag: {
+                        'id': f'card-{self.card_id}',
+                        'name': card_tag,
+                        'display-name': card_tag,
+                        'type': 'card',
+                        'card-id': self.card_id
+                    }
+                }
+            }
+        }
+
+        return (f'/dataset/{format}', {'query': json.dumps(query)})
+
+    def _exports_since(self) -> bool:
+        """
+        Returns whether the export request of the card selects the days since a date,
+        which its native query always does.
+        """
+        return True
+
+    def _native_treatment_condition(self, client_id: str, start_date: Union[date, None], end_date: Union[date, None]) -> str:
+        """
+        Returns the condition of the native query that selects the notifications of that client
+        within their treatment window, extended by `treatment_lookback` before the treatment starts
+        (see `MetabaseAPI._treatment_filter()`).
+        """
+        # The client IDs come from the data, hence their quotes are escaped before they are inlined.
+        conditions = ["client_id = '{}'".format(client_id.replace("'", "''"))]
+
+        if start_date is not None:
+            conditions.append(f"CAST(start_time AS DATE) >= {self._native_date(start_date - self.treatment_lookback)}")
+
+        if end_date is not None:
+            conditions.append(f"CAST(start_time AS DATE) <= {self._native_date(end_date)}")
+
+        return '(' + ' AND '.join(conditions) + ')'
+
+    def _native_date(self, value: date) -> str:
+        """
+        Returns that date as a literal of the native query.
+        The dates are formatted by us, hence they are safe to be inlined.
+        """
+        return f"DATE '{value.isoformat()}'"
 
 
 class PlannedEventAPI(MetabaseAPI):
@@ -310,17 +1369,35 @@ class PlannedEventAPI(MetabaseAPI):
     # Metabase collection's ID that refers to the planned events card.
     card_id = 2255
 
+    # Name of the `FileLocator` property that locates the card's snapshot.
+    snapshot = 'events'
+
+    # Columns of the card that are used by the extractors.
+    columns = {
+        'id': 'type/Text',
+        'recurring_expression': 'type/Text',
+        'client_id': 'type/Text',
+        'created_at': 'type/Date',
+        'start_time': 'type/Date',
+        'end_time': 'type/Date',
+        'terminated_time': 'type/Date',
+    }
+
+    # Only the events started within the client's treatment are needed.
+    scope = 'treatments'
+
+    # The planned events change rarely.
+    ttl = timedelta(hours=24)
+
     def download(self, format='csv') -> None:
         """
         Downloads planned events data from Metabase in CSV format.
         """
-        path = f'/card/{self.card_id}/query/{format}'
-
-        directory, filename = FILE_LOCATOR.events
+        directory, filename = self._file_locator.events
 
         save_to = f'{directory}/{filename}'
 
-        self._download_file(path, save_to, format, self._session_id)
+        self._download_card(save_to, format)
 
 
 class PlannedEventReflectionAPI(MetabaseAPI):
@@ -328,17 +1405,31 @@ class PlannedEventReflectionAPI(MetabaseAPI):
     # Metabase collection's ID that refers to the planned event's reflections card.
     card_id = 2256
 
+    # Name of the `FileLocator` property that locates the card's snapshot.
+    snapshot = 'event_reflections'
+
+    # Columns of the card that are used by the extractors.
+    columns = {
+        'status': 'type/Text',
+        'planned_event_id': 'type/Text',
+        'start_time': 'type/Date',
+    }
+
+    # The card only grows over time.
+    incremental = True
+
+    # The card is one of the largest cards.
+    shardable = True
+
     def download(self, format='csv') -> None:
         """
         Downloads planned event's reflections data from Metabase in CSV format.
         """
-        path = f'/card/{self.card_id}/query/{format}'
-
-        directory, filename = FILE_LOCATOR.event_reflections
+        directory, filename = self._file_locator.event_reflections
 
         save_to = f'{directory}/{filename}'
 
-        self._download_file(path, save_to, format, self._session_id)
+        self._download_card(save_to, format)
 
 
 class TherapySessionAPI(MetabaseAPI):
@@ -346,17 +1437,27 @@ class TherapySessionAPI(MetabaseAPI):
     # Metabase collection's ID that refers to the therapy sessions card.
     card_id = 2258
 
+    # Name of the `FileLocator` property that locates the card's snapshot.
+    snapshot = 'therapy_sessions'
+
+    # Columns of the card that are used by the extractors.
+    columns = {
+        'client_id': 'type/Text',
+        'start_time': 'type/Date',
+    }
+
+    # Only the rows of the treated clients are needed.
+    scope = 'clients'
+
     def download(self, format='csv') -> None:
         """
         Downloads therapy sessions data from Metabase in CSV format.
         """
-        path = f'/card/{self.card_id}/query/{format}'
-
-        directory, filename = FILE_LOCATOR.therapy_sessions
+        directory, filename = self._file_locator.therapy_sessions
 
         save_to = f'{directory}/{filename}'
 
-        self._download_file(path, save_to, format, self._session_id)
+        self._download_card(save_to, format)
 
 
 class ThoughtRecordAPI(MetabaseAPI):
@@ -364,17 +1465,27 @@ class ThoughtRecordAPI(MetabaseAPI):
     # Metabase collection's ID that refers to the client's thought records card.
     card_id = 2245
 
+    # Name of the `FileLocator` property that locates the card's snapshot.
+    snapshot = 'thought_records'
+
+    # Columns of the card that are used by the extractors.
+    columns = {
+        'client_id': 'type/Text',
+        'start_time': 'type/DateTime',
+    }
+
+    # Only the rows of the treated clients are needed.
+    scope = 'clients'
+
     def download(self, format='csv') -> None:
         """
         Downloads clients' thought records from Metabase in CSV format.
         """
-        path = f'/card/{self.card_id}/query/{format}'
-
-        directory, filename = FILE_LOCATOR.thought_records
+        directory, filename = self._file_locator.thought_records
 
         save_to = f'{directory}/{filename}'
 
-        self._download_file(path, save_to, format, self._session_id)
+        self._download_card(save_to, format)
 
 
 class SMQAPI(MetabaseAPI):
@@ -382,14 +1493,30 @@ class SMQAPI(MetabaseAPI):
     # Metabase collection's ID that refers to the Session Measurement Questionnaires (SMQ) card.
     card_id = 2251
 
+    # Name of the `FileLocator` property that locates the card's snapshot.
+    snapshot = 'smqs'
+
+    # Columns of the card that are used by the extractors.
+    columns = {
+        'client_id': 'type/Text',
+        'start_time': 'type/Date',
+        'applicability': 'type/Float',
+        'connection': 'type/Float',
+        'content': 'type/Float',
+        'progress': 'type/Float',
+        'way_of_working': 'type/Float',
+        'score': 'type/Float',
+    }
+
+    # Only the rows of the treated clients are needed.
+    scope = 'clients'
+
     def download(self, format='csv') -> None:
         """
         Downloads SMQ results from Metabase in CSV format.
         """
-        path = f'/card/{self.card_id}/query/{format}'
-
-        directory, filename = FILE_LOCATOR.smqs
+        directory, filename = self._file_locator.smqs
 
         save_to = f'{directory}/{filename}'
 
-        self._download_file(path, save_to, format, self._session_id)
+        self._download_card(save_to, format)
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from datetime import datetime
+from typing import Iterable, Union
+
+
+class IdDictionary:
+    """
+    A class that maps the IDs (e.g. client IDs) into compact int32 codes,
+    consistently across every table that is encoded with it.
+
+    The codes are stable: the IDs that are added later get the next codes.
+    Missing and unknown IDs are encoded as -1.
+    When the dictionary is disabled, the IDs are left untouched.
+    """
+
+    MISSING_CODE = -1
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+        self._ids = pd.Index([], dtype=object)
+
+    def fit(self, columns: Iterable[pd.Series]) -> 'IdDictionary':
+        """
+        Adds the IDs of those `columns` to the dictionary.
+        """
+        columns = [column.dropna() for column in columns]
+        if not columns:
+            return self
+
+        ids = pd.Index(pd.concat(columns, ignore_index=True).unique())
+        new_ids = ids.difference(self._ids, sort=False).sort_values()
+
+        self._ids = self._ids.append(new_ids)
+
+        return self
+
+    def encode(self, ids: pd.Series) -> pd.Series:
+        """
+        Returns the codes of those `ids`.
+        """
+        if not self.enabled:
+            return ids
+
+        codes = self._ids.get_indexer(ids).astype(np.int32)
+        return pd.Series(codes, index=ids.index, name=ids.name)
+
+    def encode_one(self, id: Union[str, None]) -> Union[int, str]:
+        """
+        Returns the code of that `id`.
+        """
+        if not self.enabled:
+            return id
+
+        return self._ids.get_loc(id) if id in self._ids else self.MISSING_CODE
+
+    def decode(self, codes: pd.Series) -> pd.Series:
+        """
+        Returns the IDs of those `codes`.
+        """
+        if not self.enabled:
+            return codes
+
+        values = codes.to_numpy()
+        is_known = values != self.MISSING_CODE
+
+        ids = np.full(len(values), np.nan, dtype=object)
+        ids[is_known] = self._ids.to_numpy(dtype=object)[values[is_known]]
+
+        return pd.Series(ids, index=codes.index, name=codes.name, dtype=object)
+
+    def decode_one(self, code: Union[int, str]) -> Union[str, None]:
+        """
+        Returns the ID of that `code`.
+        """
+        if not self.enabled:
+            return code
+
+        return self._ids[code] if code != self.MISSING_CODE else None
+
+
+class DayOrdinals:
+    """
+    A class that maps the timestamps into int32 day ordinals,
+    i.e. the number of days since 1970-01-01, so that the windows of whole days
+    are filtered with integer arithmetic.
+
+    Missing timestamps are encoded as the minimum int32 value.
+    When the ordinals are disabled, the timestamps are left untouched.
+    """
+
+    MISSING_DAY = np.iinfo(np.int32).min
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled
+
+    def encode(self, timestamps: pd.Series) -> pd.Series:
+        """
+        Returns the day ordinals of those `timestamps`.
+        """
+        if not self.enabled:
+            return timestamps
+
+        values = timestamps.to_numpy(dtype='datetime64[ns]')
+        days = values.astype('datetime64[D]').astype(np.int64)
+        days[np.isnat(values)] = self.MISSING_DAY
+
+        return pd.Series(days.astype(np.int32), index=timestamps.index, name=timestamps.name)
+
+    def encode_one(self, timestamp: datetime) -> Union[int, datetime]:
+        """
+        Returns the day ordinal of that `timestamp`.
+        """
+        if not self.enabled:
+            return timestamp
+
+        return int(np.datetime64(pd.Timestamp(timestamp).to_datetime64(), 'D').astype(np.int64))
@@ -0,0 +1,9 @@
+from app.engines.as_of_engine import AsOfEngine
+from app.engines.client_timeline import ClientTimeline
+from app.engines.window_count_engine import WindowCountEngine
+
+__all__ = [
+    'AsOfEngine',
+    'ClientTimeline',
+    'WindowCountEngine',
+]
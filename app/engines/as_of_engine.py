@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from typing import List
+
+from app.helpers import days_since, max_timestamps
+
+
+class AsOfEngine:
+    """
+    Answers which rows of a table are the latest ones at or before every treatment snapshot of their client,
+    for all of the snapshots at once.
+
+    The snapshots and the rows of every table are joined with a single sorted as-of join
+    (see `pd.merge_asof()`), instead of filtering the whole table for each snapshot.
+    """
+
+    def __init__(self, snapshots: pd.DataFrame):
+        """
+        Arguments:
+            - `snapshots`: The treatment snapshots, with their `client_id` and `treatment_timestamp`.
+        """
+        self.timestamps = snapshots['treatment_timestamp'].to_numpy(dtype='datetime64[ns]')
+
+        # The as-of joins need the snapshots to be sorted by their timestamps.
+        self._snapshots = pd.DataFrame({
+            'client_id': snapshots['client_id'].to_numpy(),
+            'timestamp': self.timestamps,
+            'snapshot': np.arange(len(snapshots.index)),
+        }).sort_values('timestamp', kind='stable')
+
+    def latest(self, table: pd.DataFrame, count: int = 1) -> List[np.ndarray]:
+        """
+        Returns the positions of the `count` latest rows of that `table` at or before every snapshot,
+        i.e. the positions of the latest rows, of the previous ones, and so on, or -1 when there's no such row.
+
+        The rows with the same start time are ordered as `table` is (the first of them is the latest),
+        just like a descending sort of the rows of the client by their start time.
+        """
+        start_times = table['start_time'].to_numpy(dtype='datetime64[ns]')
+
+        rows = pd.DataFrame({
+            'client_id': table['client_id'].to_numpy(),
+            'start_time': start_times,
+            'row': np.arange(len(table.index)),
+        })
+        rows = rows[~np.isnat(start_times)]
+        rows = rows.iloc[np.lexsort((-rows['row'].to_numpy(), rows['start_time'].to_numpy()))]
+
+        # The rows before those of the same client (in the sorted order) are their previous rows.
+        previous_rows = np.full(len(table.index), -1, dtype=np.int64)
+        previous_rows[rows['row'].to_numpy()] = rows.groupby('client_id', sort=False)['row'].shift().fillna(-1).to_numpy(dtype=np.int64)
+
+        latest_rows = pd.merge_asof(
+            self._snapshots,
+            rows,
+            left_on='timestamp',
+            right_on='start_time',
+            by='client_id',
+            direction='backward',
+            allow_exact_matches=True
+        )
+
+        positions = np.full(len(self.timestamps), -1, dtype=np.int64)
+        positions[latest_rows['snapshot'].to_numpy()] = latest_rows['row'].fillna(-1).to_numpy(dtype=np.int64)
+
+        positions_list = [positions]
+        for _ in range(1, count):
+            positions = _take(previous_rows, positions, -1)
+            positions_list.append(positions)
+
+        return positions_list
+
+    def latest_times(self, *tables: pd.DataFrame) -> np.ndarray:
+        """
+        Returns the latest start time of the rows of those `tables` at or before every snapshot,
+        or `NaT` when there's no such row.
+        """
+        return max_timestamps([
+            _take(table['start_time'].to_numpy(dtype='datetime64[ns]'), self.latest(table)[0], np.datetime64('NaT'))
+            for table in tables
+        ])
+
+    def days_since_latest(self, *tables: pd.DataFrame) -> np.ndarray:
+        """
+        Returns the number of days since the latest row of those `tables` at or before every snapshot,
+        or `NaN` when there's no such row.
+        """
+        return days_since(self.timestamps, self.latest_times(*tables))
+
+
+def _take(values: np.ndarray, positions: np.ndarray, fill_value: any) -> np.ndarray:
+    """
+    Returns the `values` at those `positions`, or the `fill_value` at the negative positions.
+    """
+    taken = np.full(len(positions), fill_value, dtype=values.dtype)
+    taken[positions >= 0] = values[positions[positions >= 0]]
+
+    return taken
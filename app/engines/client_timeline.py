@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from datetime import datetime
+from typing import Dict, List, Tuple, Union
+
+from app.encoders import DayOrdinals
+
+
+class ClientTimeline:
+    """
+    Answers which rows of a table are the latest ones at or before a timestamp of a single client,
+    and how many of them are within a window of days before it, by binary searches.
+
+    The rows of every table (and flag) are sorted once by their client and their start time,
+    so that the rows of a client are a slice of sorted arrays (see `np.searchsorted()`).
+    """
+
+    def __init__(self) -> None:
+        self._days = DayOrdinals()
+        self._tables = {}
+
+    def add(self, name: str, table: pd.DataFrame, condition: Union[pd.Series, np.ndarray, None] = None) -> None:
+        """
+        Indexes the rows of that `table` under that `name`,
+        only indexing the rows that match the `condition` when it's given.
+
+        The days are taken from the day ordinals of the rows (`start_day`) when they are encoded,
+        otherwise from their start times. The tables without start times can only be counted (see `count()`).
+        """
+        rows = np.arange(len(table.index))
+        if condition is not None:
+            rows = rows[np.asarray(condition, dtype=bool)]
+            table = table.iloc[rows]
+
+        has_times = 'start_time' in table.columns
+        times = table['start_time'].to_numpy(dtype='datetime64[ns]') if has_times else None
+
+        if 'start_day' in table.columns:
+            days = table['start_day'].to_numpy(dtype=np.int64)
+        else:
+            days = self._days.encode(table['start_time']).to_numpy(dtype=np.int64)
+
+        # The rows without start time are never at or before any timestamp.
+        is_valid = ~np.isnat(times) if has_times else days != DayOrdinals.MISSING_DAY
+        rows, days = rows[is_valid], days[is_valid]
+        times = times[is_valid].astype(np.int64) if has_times else None
+
+        # The rows with the same start time are ordered as `table` is, the first of them being the last one,
+        # just like a descending sort of the rows of the client by their start time (see `AsOfEngine.latest()`).
+        clients, client_ids = pd.factorize(table['client_id'].to_numpy()[is_valid])
+        order = np.lexsort((-rows, times if has_times else days, clients))
+
+        clients = clients[order]
+        starts = np.searchsorted(clients, np.arange(len(client_ids)), side='left')
+        ends = np.searchsorted(clients, np.arange(len(client_ids)), side='right')
+
+        self._tables[name] = {
+            'slices': dict(zip(client_ids.tolist(), zip(starts.tolist(), ends.tolist()))),
+            'rows': rows[order],
+            'times': times[order] if has_times else None,
+            'days': days[order],
+        }
+
+    def latest(self, name: str, client_id: Union[int, str], timestamp: datetime, count: int = 1) -> List[int]:
+        """
+        Returns the positions of the `count` latest rows of that client at or before that `timestamp`
+        in the table of that `name`, i.e. the positions of the latest row, of the previous one, and so on,
+        or -1 when there's no such row.
+        """
+        table, start, end = self._slice(name, client_id)
+        last = start + int(np.searchsorted(table['times'][start:end], pd.Timestamp(timestamp).value, side='right'))
+
+        return [int(table['rows'][last - 1 - k]) if last - 1 - k >= start else -1 for k in range(count)]
+
+    def latest_time(self, name: str, client_id: Union[int, str], timestamp: datetime) -> np.datetime64:
+        """
+        Returns the latest start time of the rows of that client at or before that `timestamp`
+        in the table of that `name`, or `NaT` when there's no such row.
+        """
+        table, start, end = self._slice(name, client_id)
+        last = start + int(np.searchsorted(table['times'][start:end], pd.Timestamp(timestamp).value, side='right'))
+
+        return np.datetime64(int(table['times'][last - 1]), 'ns') if last > start else np.datetime64('NaT', 'ns')
+
+    def count(self, name: str, client_id: Union[int, str], timestamp: datetime, days_from: int, days_to: int = 0) -> int:
+        """
+        Returns the number of the rows of that client in the table of that `name` on the days
+        from `days_from` (excluded) to `days_to` (included) days before that `timestamp`,
+        e.g. the last seven days (1-7) are from 7 to 0 days before.
+        """
+        table, start, end = self._slice(name, client_id)
+        day = self._days.encode_one(timestamp)
+
+        first, last = np.searchsorted(table['days'][start:end], [day - days_from, day - days_to], side='right')
+
+        return int(last - first)
+
+    def _slice(self, name: str, client_id: Union[int, str]) -> Tuple[Dict, int, int]:
+        """
+        Returns the table of that `name`, and the slice of the rows of that client in its arrays.
+        """
+        table = self._tables[name]
+        start, end = table['slices'].get(client_id, (0, 0))
+
+        return table, start, end
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from typing import Tuple, Union
+
+from app.encoders import DayOrdinals
+
+
+class WindowCountEngine:
+    """
+    Answers how many rows of a table are within a window of days before every treatment snapshot of their client,
+    for all of the snapshots at once.
+
+    The rows of every table (and flag) are counted once into the daily counts of the clients,
+    whose prefix sums answer the count of any window by a subtraction.
+    """
+
+    def __init__(self, snapshots: pd.DataFrame, look_back_days: int):
+        """
+        Arguments:
+            - `snapshots`: The treatment snapshots, with their `client_id` and `treatment_timestamp`.
+            - `look_back_days`: The number of days of the largest window before the snapshots.
+        """
+        self._days = DayOrdinals()
+        self.look_back_days = look_back_days
+
+        snapshot_clients, self._clients = pd.factorize(snapshots['client_id'])
+        snapshot_days = self._days.encode(snapshots['treatment_timestamp']).to_numpy(dtype=np.int64)
+
+        # Every client gets the days from the largest window before their first snapshot to their last snapshot,
+        # and the days of the clients are laid out one after another.
+        days = pd.DataFrame({'client': snapshot_clients, 'day': snapshot_days}).groupby('client')['day']
+        self._first_days = days.min().to_numpy() - look_back_days
+        self._day_counts = days.max().to_numpy() - self._first_days + 1
+        self._offsets = np.cumsum(self._day_counts) - self._day_counts
+
+        self._snapshot_positions = self._offsets[snapshot_clients] + (snapshot_days - self._first_days[snapshot_clients])
+
+        # The clients and the days of the rows of every table that is counted, keyed by the `id()` of the table,
+        # along with the table itself, so that its `id()` isn't reused while it's cached.
+        self._table_rows = {}
+
+    def counter(self, table: pd.DataFrame, condition: Union[pd.Series, np.ndarray, None] = None) -> np.ndarray:
+        """
+        Returns the prefix sums of the daily counts of the rows of that `table` for every client,
+        only counting the rows that match the `condition` when it's given.
+
+        The days are taken from the day ordinals of the rows (`start_day`) when they are encoded,
+        otherwise from their start times. The rows of a table are only looked up once,
+        however many counters (e.g. with different conditions) are made of it.
+        """
+        clients, days = self._rows(table)
+
+        if condition is not None:
+            is_met = np.asarray(condition, dtype=bool)
+            clients, days = clients[is_met], days[is_met]
+
+        # The rows of the other clients, and out of the days of their client, aren't counted.
+        has_client = clients >= 0
+
+        clients, days = clients[has_client], days[has_client] - self._first_days[clients[has_client]]
+        is_within = (days >= 0) & (days < self._day_counts[clients])
+
+        daily_counts = np.bincount(
+            self._offsets[clients[is_within]] + days[is_within], minlength=int(self._day_counts.sum())
+        )
+
+        return np.cumsum(daily_counts)
+
+    def _rows(self, table: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the positions of the clients of the rows of that `table` among the clients of the snapshots
+        (-1 for the other clients), and the day ordinals of the rows.
+        """
+        cached_table, clients, days = self._table_rows.get(id(table), (None, None, None))
+        if cached_table is table:
+            return clients, days
+
+        if 'start_day' in table.columns:
+            days = table['start_day'].to_numpy(dtype=np.int64)
+        else:
+            days = self._days.encode(table['start_time']).to_numpy(dtype=np.int64)
+
+        clients = self._clients.get_indexer(table['client_id'])
+        self._table_rows[id(table)] = (table, clients, days)
+
+        return clients, days
+
+    def count(self, counter: np.ndarray, days_from: int, days_to: int = 0) -> np.ndarray:
+        """
+        Returns the number of the rows of that `counter` on the days from `days_from` (excluded)
+        to `days_to` (included) days before every snapshot, e.g. the last seven days (1-7) are from 7 to 0 days before.
+        """
+        if not days_to <= days_from <= self.look_back_days:
+            raise ValueError(f"The window of days isn't within the last {self.look_back_days} days: ({days_from}, {days_to}]")
+
+        return counter[self._snapshot_positions - days_to] - counter[self._snapshot_positions - days_from]
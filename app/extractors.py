@@ -1,14 +1,22 @@
+import hashlib
+import json
 import logging
+import numpy as np
+import os
 import pandas as pd
+import re
+import shutil
+import time
 
-from datetime import datetime
-from dateutil.rrule import rrulestr
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import date
+from typing import Callable, Dict, IO, List, Tuple, Union
 
 from app.datasources.metabase import (
     ClientInfoAPI,
     CommunicationAPI,
     CustomTrackerAPI,
+    DailyNotificationAPI,
     DiaryEntryAPI,
     NotificationAPI,
     PlannedEventAPI,
@@ -17,12 +25,20 @@ from app.datasources.metabase import (
     ThoughtRecordAPI,
     SMQAPI,
 )
+from app.cache import SnapshotCache
+from app.encoders import IdDictionary
 from app.helpers import to_dict
-from app.settings import app_settings as settings
+from app.manifest import SnapshotManifest
+from app.recurrences import RecurrenceExpander
+from app.settings import (
+    app_settings as settings,
+    FileLocator
+)
 
 
 logger = logging.getLogger(__name__)
 FILE_LOCATOR = settings.FILE_LOCATOR
+SNAPSHOT_CACHE = SnapshotCache(enabled=settings.SNAPSHOT_CACHE)
 
 
 class MetabaseCollection:
@@ -31,26 +47,272 @@ class MetabaseCollection:
         """
         Pulls all of collection data from Metabase
         and stores them in the local storage.
+
+        The collections are downloaded concurrently into a staging directory,
+        and they are only moved into the snapshots directory once every download succeeded.
+        Hence, a partial failure never leaves a half-written snapshot set behind.
+        """
+        self._pull(
+            'Downloaded',
+            lambda collection, file_locator, treatment_windows: collection.download(file_locator, treatment_windows),
+            read_fresh=False
+        )
+
+    def fetch(self, persist: bool = False) -> Dict[str, pd.DataFrame]:
+        """
+        Streams all of collection data from Metabase into dataframes,
+        without reading them back from the local storage.
+
+        Returns the dataframes keyed by the name of their collection (e.g. `ClientInfo`).
+        When `persist` is True, the collections are stored in the local storage as well,
+        with the same guarantees as `download()`.
+        """
+        return self._pull(
+            'Fetched',
+            lambda collection, file_locator, treatment_windows: collection.fetch(file_locator, persist, treatment_windows),
+            read_fresh=True
+        )
+
+    def _pull(
+        self,
+        action_name: str,
+        action: Callable[[any, FileLocator, any], any],
+        read_fresh: bool
+    ) -> Dict[str, any]:
+        """
+        Runs that `action` concurrently for every collection into a staging directory,
+        then publishes the staged snapshots into the snapshots directory
+        and records them in the snapshots manifest.
+
+        When the projected queries are enabled, the clients are pulled first,
+        so that the other collections are narrowed down to the clients' treatment windows.
+        When the clients changed, the collections scoped to them are refreshed and exported whole.
+
+        When only the stale snapshots are refreshed, the collections whose snapshot is still fresh
+        are skipped, and they are read from the local storage when `read_fresh` is True.
+
+        Returns the results of the `action` keyed by the name of their collection.
+        """
+        clients = ClientInfo()
+        collections = [
+            Communication(),
+            CustomTracker(),
+            DiaryEntry(),
+            Notification(),
+            PlannedEvent(),
+            PlannedEventReflection(),
+            TherapySession(),
+            ThoughtRecord(),
+            SMQ(),
+        ]
+
+        staging_locator = FileLocator(root_dir=f'{FILE_LOCATOR.root_dir}/.staging')
+        workers = max(1, settings.METABASE_DOWNLOAD_WORKERS)
+        manifest = SnapshotManifest(FILE_LOCATOR)
+
+        # Starts from an empty staging directory
+        shutil.rmtree(staging_locator.root_dir, ignore_errors=True)
+        os.makedirs(staging_locator.root_dir)
+
+        started_at = time.perf_counter()
+        results = {}
+        durations = {}
+
+        try:
+            treatment_windows = None
+
+            # Whether the collections scoped to the clients must be refreshed regardless of their TTL.
+            clients_changed = False
+
+            if settings.METABASE_PROJECTED_QUERIES and self._is_fresh(clients, manifest):
+                logger.info("Skipped ClientInfo, its snapshot is fresh")
+
+                clients_snapshot = clients.read_snapshot()
+                results['ClientInfo'] = clients_snapshot if read_fresh else None
+
+                treatment_windows = self._treatment_windows(clients_snapshot)
+            elif settings.METABASE_PROJECTED_QUERIES:
+                results['ClientInfo'], durations['ClientInfo'] = self._run(action, clients, staging_locator, None)
+                logger.info(f"{action_name} ClientInfo in {durations['ClientInfo']:.2f}s")
+
+                directory, filename = staging_locator.clients
+                path = f'{directory}/{filename}'
+
+                clients_snapshot = results['ClientInfo']
+                if clients_snapshot is None:
+                    clients_snapshot = clients._parse(path)
+
+                treatment_windows = self._treatment_windows(clients_snapshot)
+                clients_changed = (
+                    not os.path.exists(path) or
+                    manifest.describe(path)['sha256'] != manifest.entries.get(filename, {}).get('sha256')
+                )
+            else:
+                collections.insert(0, clients)
+
+            stale_collections = []
+            for collection in collections:
+                name = type(collection).__name__
+
+                if clients_changed and collection.card.scope is not None:
+                    # The rows of the new (or widened) treatment windows may have started before the watermark,
+                    # hence the incremental cards are exported whole.
+                    collection.card.drop_watermark(FILE_LOCATOR)
+
+                    stale_collections.append(collection)
+                    continue
+
+                if not self._is_fresh(collection, manifest):
+                    stale_collections.append(collection)
+                    continue
+
+                logger.info(f"Skipped {name}, its snapshot is fresh")
+                results[name] = collection.read_snapshot() if read_fresh else None
+
+            collections = stale_collections
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(self._run, action, collection, staging_locator, treatment_windows): collection
+                    for collection in collections
+                }
+
+                for counter, future in enumerate(as_completed(futures), start=1):
+                    name = type(futures[future]).__name__
+
+                    try:
+                        results[name], durations[name] = future.result()
+                    except Exception:
+                        # Don't start the remaining downloads, the snapshot set is discarded anyway.
+                        for pending_future in futures:
+                            pending_future.cancel()
+
+                        logger.error(f"Failed to pull {name}, the local snapshots are left untouched.")
+                        raise
+
+                    logger.info(f"{action_name} {name} in {durations[name]:.2f}s ({counter}/{len(collections)})")
+
+            self._publish(staging_locator, manifest)
+        finally:
+            shutil.rmtree(staging_locator.root_dir, ignore_errors=True)
+
+        # The sequential baseline is the time needed to pull the collections one after another.
+        wall_time = time.perf_counter() - started_at
+        sequential_time = sum(durations.values())
+
+        logger.info(
+            f"{action_name} {len(durations)} collections with {workers} worker(s) in {wall_time:.2f}s "
+            f"(sequential baseline: {sequential_time:.2f}s, speed-up: {sequential_time / wall_time:.2f}x)"
+        )
+
+        return results
+
+    def _run(
+        self,
+        action: Callable[[any, FileLocator, any], any],
+        collection: any,
+        file_locator: FileLocator,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None]
+    ) -> Tuple[any, float]:
+        """
+        Runs that `action` for that `collection` with the given `file_locator` and `treatment_windows`.
+
+        Returns tuple of the `action` result and the elapsed time in seconds.
+        """
+        name = type(collection).__name__
+        logger.info(f"Pulling {name}...")
+
+        started_at = time.perf_counter()
+        result = action(collection, file_locator, treatment_windows)
+
+        return (result, time.perf_counter() - started_at)
+
+    def _treatment_windows(self, clients: pd.DataFrame) -> Dict[str, Tuple[Union[date, None], Union[date, None]]]:
+        """
+        Returns the start and end dates of the treatment of those `clients`
+        keyed by the client ID. The missing dates (e.g. the end of an ongoing treatment) are None.
+        """
+        return {
+            client['client_id']: (
+                None if pd.isna(client['start_time']) else client['start_time'].date(),
+                None if pd.isna(client['end_time']) else client['end_time'].date()
+            )
+            for _, client in clients.iterrows()
+        }
+
+    def _is_fresh(self, collection: any, manifest: SnapshotManifest) -> bool:
+        """
+        Checks whether the snapshot of that `collection` doesn't need to be refreshed.
+        """
+        if not settings.METABASE_REFRESH_STALE_ONLY:
+            return False
+
+        card = collection.card
+        _, filename = getattr(FILE_LOCATOR, card.snapshot)
+
+        return manifest.is_fresh(filename, card.ttl)
+
+    def _publish(self, staging_locator: FileLocator, manifest: SnapshotManifest) -> None:
         """
-        ClientInfo().download()
-        Communication().download()
-        CustomTracker().download()
-        DiaryEntry().download()
-        Notification().download()
-        PlannedEvent().download()
-        PlannedEventReflection().download()
-        TherapySession().download()
-        ThoughtRecord().download()
-        SMQ().download()
+        Moves the downloaded snapshots from the staging directory
+        into the snapshots directory, and records them in that `manifest`.
+        The files that come with them (e.g. their watermarks) are moved, but not recorded.
+        """
+        filenames = os.listdir(staging_locator.root_dir)
+        if not filenames:
+            return
+
+        entries = {
+            filename: manifest.describe(f'{staging_locator.root_dir}/{filename}')
+            for filename in filenames
+            if filename.endswith('.csv')
+        }
+
+        for filename in filenames:
+            os.replace(
+                f'{staging_locator.root_dir}/{filename}',
+                f'{FILE_LOCATOR.root_dir}/{filename}'
+            )
+
+        for filename, entry in entries.items():
+            manifest.record(filename, entry)
+
+        manifest.save()
 
 
 class ClientInfo:
 
-    def download(self) -> None:
+    # Bump it whenever `_parse()` changes, to invalidate the cached snapshots.
+    SNAPSHOT_VERSION = 1
+
+    @property
+    def card(self) -> type:
+        """
+        Returns the Metabase card of the clients' information.
+        """
+        return ClientInfoAPI
+
+    def download(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> None:
         """
         Downloads clients' information from Metabase.
         """
-        ClientInfoAPI().download()
+        ClientInfoAPI(file_locator, treatment_windows).download()
+
+    def fetch(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        persist: bool = False,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> pd.DataFrame:
+        """
+        Streams clients' information from Metabase into a dataframe.
+        When `persist` is True, the snapshot is stored in the local storage as well.
+        """
+        return ClientInfoAPI(file_locator, treatment_windows).stream(self._parse, persist)
 
     def read_snapshot(self) -> pd.DataFrame:
         """
@@ -60,8 +322,14 @@ class ClientInfo:
 
         path = f'{directory}/{filename}'
 
+        return SNAPSHOT_CACHE.read(path, self._parse, self.SNAPSHOT_VERSION)
+
+    def _parse(self, source: Union[str, IO]) -> pd.DataFrame:
+        """
+        Parses the clients data from that `source`.
+        """
         return pd.read_csv(
-            path,
+            source,
             dtype={
                 'client_id': str,
                 'therapist_id': str,
@@ -75,11 +343,37 @@ class ClientInfo:
 
 class Communication:
 
-    def download(self) -> None:
+    # Bump it whenever `_parse()` changes, to invalidate the cached snapshots.
+    SNAPSHOT_VERSION = 1
+
+    @property
+    def card(self) -> type:
+        """
+        Returns the Metabase card of the client's communication data.
+        """
+        return CommunicationAPI
+
+    def download(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> None:
         """
         Downloads clients' communications from Metabase.
         """
-        CommunicationAPI().download()
+        CommunicationAPI(file_locator, treatment_windows).download()
+
+    def fetch(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        persist: bool = False,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> pd.DataFrame:
+        """
+        Streams clients' communications from Metabase into a dataframe.
+        When `persist` is True, the snapshot is stored in the local storage as well.
+        """
+        return CommunicationAPI(file_locator, treatment_windows).stream(self._parse, persist)
 
     def read_snapshot(self) -> pd.DataFrame:
         """
@@ -89,8 +383,14 @@ class Communication:
 
         path = f'{directory}/{filename}'
 
+        return SNAPSHOT_CACHE.read(path, self._parse, self.SNAPSHOT_VERSION)
+
+    def _parse(self, source: Union[str, IO]) -> pd.DataFrame:
+        """
+        Parses the communication data from that `source`.
+        """
         return pd.read_csv(
-            path,
+            source,
             dtype={
                 'client_id': str,
                 'start_time': str,
@@ -103,11 +403,37 @@ class Communication:
 
 class CustomTracker:
 
-    def download(self) -> None:
+    # Bump it whenever `_parse()` changes, to invalidate the cached snapshots.
+    SNAPSHOT_VERSION = 1
+
+    @property
+    def card(self) -> type:
+        """
+        Returns the Metabase card of the client's custom tracker data.
+        """
+        return CustomTrackerAPI
+
+    def download(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> None:
         """
         Downloads clients' custom trackers from Metabase.
         """
-        CustomTrackerAPI().download()
+        CustomTrackerAPI(file_locator, treatment_windows).download()
+
+    def fetch(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        persist: bool = False,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> pd.DataFrame:
+        """
+        Streams clients' custom trackers from Metabase into a dataframe.
+        When `persist` is True, the snapshot is stored in the local storage as well.
+        """
+        return CustomTrackerAPI(file_locator, treatment_windows).stream(self._parse, persist)
 
     def read_snapshot(self) -> pd.DataFrame:
         """
@@ -117,9 +443,15 @@ class CustomTracker:
 
         path = f'{directory}/{filename}'
 
+        return SNAPSHOT_CACHE.read(path, self._parse, self.SNAPSHOT_VERSION)
+
+    def _parse(self, source: Union[str, IO]) -> pd.DataFrame:
+        """
+        Parses the custom trackers data from that `source`.
+        """
         # Read dataframe
         df = pd.read_csv(
-            path,
+            source,
             dtype={
                 'client_id': str,
                 'start_time': str,
@@ -133,19 +465,57 @@ class CustomTracker:
         # Therefore, we need to convert it to datetime object manually.
         df['start_time'] = pd.to_datetime(df['start_time'], format='ISO8601')
 
-        # Convert `value` into dictionary
-        df['value'] = df['value'].apply(lambda item: to_dict(item))
+        # Extract the fields of the `value` JSON into typed columns,
+        # e.g. `{"duration": 900, "boolean": true}`.
+        boolean = df['value'].str.extract(r'[\'"]boolean[\'"]\s*:\s*"?(true|false)"?', flags=re.IGNORECASE)[0]
+        df['boolean'] = boolean.str.lower().map({'true': True, 'false': False}).astype('boolean')
+
+        duration = df['value'].str.extract(r'[\'"]duration[\'"]\s*:\s*(\d+)')[0]
+        df['duration'] = pd.to_numeric(duration).astype('Int64')
+
+        # Negative registrations are the avoidances and the safety behaviours indicated by `value.boolean = True`,
+        # and any registrations of the worry tracker.
+        df['is_negative_registration'] = (
+            (df['name'] == 'measure_worry') |
+            (df['name'].isin(['measure_avoidance', 'measure_safety_behaviour']) & df['boolean'].fillna(False))
+        ).astype(bool)
 
         return df
 
 
 class DiaryEntry:
 
-    def download(self) -> None:
+    # Bump it whenever `_parse()` changes, to invalidate the cached snapshots.
+    SNAPSHOT_VERSION = 1
+
+    @property
+    def card(self) -> type:
+        """
+        Returns the Metabase card of the client's diary entry data.
+        """
+        return DiaryEntryAPI
+
+    def download(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> None:
         """
         Downloads clients' diary entries from Metabase.
         """
-        DiaryEntryAPI().download()
+        DiaryEntryAPI(file_locator, treatment_windows).download()
+
+    def fetch(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        persist: bool = False,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> pd.DataFrame:
+        """
+        Streams clients' diary entries from Metabase into a dataframe.
+        When `persist` is True, the snapshot is stored in the local storage as well.
+        """
+        return DiaryEntryAPI(file_locator, treatment_windows).stream(self._parse, persist)
 
     def read_snapshot(self) -> pd.DataFrame:
         """
@@ -155,9 +525,15 @@ class DiaryEntry:
 
         path = f'{directory}/{filename}'
 
+        return SNAPSHOT_CACHE.read(path, self._parse, self.SNAPSHOT_VERSION)
+
+    def _parse(self, source: Union[str, IO]) -> pd.DataFrame:
+        """
+        Parses the diary entries data from that `source`.
+        """
         # Read dataframe
         df = pd.read_csv(
-            path,
+            source,
             dtype={
                 'client_id': str,
                 'start_time': str,
@@ -173,22 +549,73 @@ class DiaryEntry:
 
 class Notification:
 
-    def download(self) -> None:
+    # Bump it whenever `_parse()` or `_parse_daily()` changes, to invalidate the cached snapshots.
+    SNAPSHOT_VERSION = 1
+
+    @property
+    def card(self) -> type:
+        """
+        Returns the Metabase card of the notification data.
+        When the aggregated notifications are enabled, it's the card of their daily counts.
+        """
+        if settings.METABASE_AGGREGATED_NOTIFICATIONS:
+            return DailyNotificationAPI
+
+        return NotificationAPI
+
+    def download(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> None:
         """
         Downloads notification data from Metabase.
+        When the aggregated notifications are enabled, only their daily counts are downloaded.
+        """
+        if settings.METABASE_AGGREGATED_NOTIFICATIONS:
+            DailyNotificationAPI(file_locator, treatment_windows).download()
+            return
+
+        NotificationAPI(file_locator, treatment_windows).download()
+
+    def fetch(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        persist: bool = False,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> pd.DataFrame:
         """
-        NotificationAPI().download()
+        Streams notification data from Metabase into a dataframe.
+        When `persist` is True, the snapshot is stored in the local storage as well.
+        When the aggregated notifications are enabled, only their daily counts are streamed.
+        """
+        if settings.METABASE_AGGREGATED_NOTIFICATIONS:
+            return DailyNotificationAPI(file_locator, treatment_windows).stream(self._parse_daily, persist)
+
+        return NotificationAPI(file_locator, treatment_windows).stream(self._parse, persist)
 
     def read_snapshot(self) -> pd.DataFrame:
         """
         Selects snapshot of the notification data from the local storage.
+        When the aggregated notifications are enabled, the snapshot of their daily counts is selected.
         """
+        if settings.METABASE_AGGREGATED_NOTIFICATIONS:
+            directory, filename = FILE_LOCATOR.daily_notifications
+
+            return SNAPSHOT_CACHE.read(f'{directory}/{filename}', self._parse_daily, self.SNAPSHOT_VERSION)
+
         directory, filename = FILE_LOCATOR.notifications
 
         path = f'{directory}/{filename}'
 
+        return SNAPSHOT_CACHE.read(path, self._parse, self.SNAPSHOT_VERSION)
+
+    def _parse(self, source: Union[str, IO]) -> pd.DataFrame:
+        """
+        Parses the notification data from that `source`.
+        """
         return pd.read_csv(
-            path,
+            source,
             dtype={
                 'client_id': str,
                 'type': str,
@@ -197,14 +624,56 @@ class Notification:
             parse_dates=['start_time']
         )
 
+    def _parse_daily(self, source: Union[str, IO]) -> pd.DataFrame:
+        """
+        Parses the daily counts of the notification data from that `source`.
+        Each row stands for the `count` notifications of the same client and type on that day.
+        """
+        return pd.read_csv(
+            source,
+            dtype={
+                'client_id': str,
+                'type': str,
+                'start_time': str,
+                'count': 'int64',
+            },
+            parse_dates=['start_time']
+        )
+
 
 class PlannedEvent:
 
-    def download(self) -> None:
+    # Bump it whenever `_parse()` changes, to invalidate the cached snapshots.
+    SNAPSHOT_VERSION = 1
+
+    @property
+    def card(self) -> type:
+        """
+        Returns the Metabase card of the planned events data.
+        """
+        return PlannedEventAPI
+
+    def download(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> None:
         """
         Downloads planned events from Metabase.
         """
-        PlannedEventAPI().download()
+        PlannedEventAPI(file_locator, treatment_windows).download()
+
+    def fetch(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        persist: bool = False,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> pd.DataFrame:
+        """
+        Streams planned events from Metabase into a dataframe.
+        When `persist` is True, the snapshot is stored in the local storage as well.
+        """
+        return PlannedEventAPI(file_locator, treatment_windows).stream(self._parse, persist)
 
     def read_snapshot(self) -> pd.DataFrame:
         """
@@ -214,9 +683,15 @@ class PlannedEvent:
 
         path = f'{directory}/{filename}'
 
+        return SNAPSHOT_CACHE.read(path, self._parse, self.SNAPSHOT_VERSION, json_columns=['recurring_expression'])
+
+    def _parse(self, source: Union[str, IO]) -> pd.DataFrame:
+        """
+        Parses the planned event data from that `source`.
+        """
         # Read dataframe
         df = pd.read_csv(
-            path,
+            source,
             dtype={
                 'id': str,
                 'recurring_expression': str,
@@ -237,11 +712,37 @@ class PlannedEvent:
 
 class PlannedEventReflection:
 
-    def download(self) -> None:
+    # Bump it whenever `_parse()` changes, to invalidate the cached snapshots.
+    SNAPSHOT_VERSION = 1
+
+    @property
+    def card(self) -> type:
+        """
+        Returns the Metabase card of the planned event's reflections data.
+        """
+        return PlannedEventReflectionAPI
+
+    def download(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> None:
         """
         Downloads planned event's reflections from Metabase.
         """
-        PlannedEventReflectionAPI().download()
+        PlannedEventReflectionAPI(file_locator, treatment_windows).download()
+
+    def fetch(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        persist: bool = False,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> pd.DataFrame:
+        """
+        Streams planned event's reflections from Metabase into a dataframe.
+        When `persist` is True, the snapshot is stored in the local storage as well.
+        """
+        return PlannedEventReflectionAPI(file_locator, treatment_windows).stream(self._parse, persist)
 
     def read_snapshot(self) -> pd.DataFrame:
         """
@@ -251,8 +752,14 @@ class PlannedEventReflection:
 
         path = f'{directory}/{filename}'
 
+        return SNAPSHOT_CACHE.read(path, self._parse, self.SNAPSHOT_VERSION)
+
+    def _parse(self, source: Union[str, IO]) -> pd.DataFrame:
+        """
+        Parses the planned event's reflections data from that `source`.
+        """
         return pd.read_csv(
-            path,
+            source,
             dtype={
                 'status': str,
                 'planned_event_id': str,
@@ -264,16 +771,34 @@ class PlannedEventReflection:
 
 class PlannedEventCompletion:
 
-    def read_snapshot(self) -> pd.DataFrame:
+    # Bump it to generate every completion again on the next incremental run.
+    FINGERPRINTS_VERSION = 1
+
+    def read_snapshot(
+        self,
+        clients: Union[pd.DataFrame, None] = None,
+        events: Union[pd.DataFrame, None] = None,
+        events_reflections: Union[pd.DataFrame, None] = None,
+        windows: Union[pd.DataFrame, None] = None
+    ) -> pd.DataFrame:
         """
         Generates planned event completion from the snapshots of the users, events,
         and event's reflections data.
+
+        The snapshots are read from the local storage unless they are given.
+
+        When the `windows` of the clients are given (indexed by client ID, from `from` to `to`),
+        only the completions within them are generated, and they aren't stored.
         """
         # Load required snapshots
-        clients = ClientInfo().read_snapshot()
+        if clients is None:
+            clients = ClientInfo().read_snapshot()
+
+        if events is None:
+            events = PlannedEvent().read_snapshot()
 
-        events = PlannedEvent().read_snapshot()
-        events_reflections = PlannedEventReflection().read_snapshot()
+        if events_reflections is None:
+            events_reflections = PlannedEventReflection().read_snapshot()
 
         # Merge events with clients to get client `start_time` and `end_time`
         # that refers to when treatment is started / ended.
@@ -294,17 +819,192 @@ class PlannedEventCompletion:
 
         events['calculated_end_time'] = events['calculated_end_time'] + pd.Timedelta(days=1)
 
-        # Create planned event completions dataframe.
-        data = self._create_event_completions_data(events, events_reflections)
-        events_completions = pd.DataFrame(data)
+        if windows is not None:
+            return self._create_event_completions_within(events, events_reflections, windows)
 
-        # Stores planned event completions to the local storage.
         directory, filename = FILE_LOCATOR.event_completions
+        path = f'{directory}/{filename}'
+
+        directory, filename = FILE_LOCATOR.event_completions_fingerprints
+        fingerprints_path = f'{directory}/{filename}'
+
+        # Only the new and changed events are expanded again, when the stored completions are still valid.
+        fingerprints, stored_completions, changed_ids = None, None, None
+
+        if settings.PLANNED_EVENT_COMPLETION_INCREMENTAL:
+            fingerprints = self._fingerprint(events, events_reflections)
+            stored_completions, changed_ids = self._read_stored_completions(path, fingerprints_path, fingerprints)
+
+        event_ids = events['id']
+        if changed_ids is not None:
+            logger.info(f"Generating planned event's completions of {len(changed_ids)} new or changed events...")
+            events = events[events['id'].isin(changed_ids)]
+
+        events_completions = self._generate(events, events_reflections)
+
+        if stored_completions is not None:
+            events_completions = self._patch(stored_completions, events_completions, event_ids)
+
+        # Stores planned event completions to the local storage.
+        events_completions.to_csv(path, float_format='%g', index=False)
 
-        events_completions.to_csv(f'{directory}/{filename}', float_format='%g', index=False)
+        if settings.PLANNED_EVENT_COMPLETION_INCREMENTAL:
+            self._write_fingerprints(path, fingerprints_path, fingerprints)
 
         return events_completions
 
+    def _create_event_completions_within(
+        self,
+        events: pd.DataFrame,
+        events_reflections: pd.DataFrame,
+        windows: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Creates planned events completions dataset within the `windows` of the clients.
+
+        The recurring events are only expanded within the windows, hence the open-ended ones are bounded by them.
+        """
+        client_windows = windows.reindex(events['client_id'])
+        has_window = client_windows['from'].notna().to_numpy()
+
+        events = events[has_window].assign(
+            calculated_start_time=client_windows['from'].to_numpy()[has_window],
+            calculated_end_time=np.minimum(
+                events['calculated_end_time'].to_numpy()[has_window], client_windows['to'].to_numpy()[has_window]
+            )
+        )
+
+        return self._generate(events, events_reflections)
+
+    def _generate(self, events: pd.DataFrame, events_reflections: pd.DataFrame) -> pd.DataFrame:
+        """
+        Creates planned events completions dataset, in a pool of processes when it's configured.
+        """
+        # The reflections are looked up on integer codes of the planned event IDs.
+        planned_event_ids = IdDictionary(enabled=settings.ENCODE_IDS).fit(
+            [events['id'], events_reflections['planned_event_id']]
+        )
+        events = events.assign(id=planned_event_ids.encode(events['id']))
+        events_reflections = events_reflections.assign(
+            planned_event_id=planned_event_ids.encode(events_reflections['planned_event_id'])
+        )
+
+        workers = settings.PLANNED_EVENT_COMPLETION_WORKERS
+        if workers > 1:
+            events_completions = self._create_event_completions_in_parallel(events, events_reflections, workers)
+        else:
+            events_completions = self._create_event_completions(events, events_reflections)
+
+        if not events_completions.empty:
+            events_completions['planned_event_id'] = planned_event_ids.decode(events_completions['planned_event_id'])
+
+        return events_completions
+
+    def _fingerprint(self, events: pd.DataFrame, events_reflections: pd.DataFrame) -> pd.Series:
+        """
+        Returns the fingerprint of every event, which changes along with the client, the recurring expression,
+        the start, end, terminated, and calculated end times of the event, and the set of its reflections.
+        """
+        event_hashes = pd.util.hash_pandas_object(pd.DataFrame({
+            'client_id': events['client_id'],
+            'rrule': events['recurring_expression'].map(lambda expression: expression['rrule']),
+            'start_time': events['start_time'],
+            'end_time': events['end_time'],
+            'terminated_time': events['terminated_time'],
+            'calculated_end_time': events['calculated_end_time'],
+        }), index=False).to_numpy()
+
+        # Only the first reflection of every date is used (see `_resolve_statuses()`).
+        reflections = events_reflections[['planned_event_id', 'start_time', 'status']]\
+            .drop_duplicates(['planned_event_id', 'start_time'], keep='first')\
+            .sort_values('planned_event_id', kind='stable')
+
+        reflection_ids, starts = np.unique(reflections['planned_event_id'].to_numpy(), return_index=True)
+        reflection_hashes = np.zeros(len(reflection_ids), dtype=np.uint64)
+        if len(reflections.index) > 0:
+            reflection_hashes = np.bitwise_xor.reduceat(
+                pd.util.hash_pandas_object(reflections, index=False).to_numpy(), starts
+            )
+
+        positions = pd.Index(reflection_ids).get_indexer(events['id'])
+        events_reflection_hashes = np.where(positions >= 0, reflection_hashes[positions], np.uint64(0))
+
+        return pd.Series(
+            [f'{event_hash:016x}{reflection_hash:016x}' for event_hash, reflection_hash in zip(event_hashes, events_reflection_hashes)],
+            index=events['id'].to_numpy()
+        )
+
+    def _read_stored_completions(self, path: str, fingerprints_path: str, fingerprints: pd.Series) -> Tuple[Union[pd.DataFrame, None], Union[List, None]]:
+        """
+        Reads the completions stored at that `path`, without the ones of the changed and removed events,
+        along with the IDs of the new and changed events since they were stored.
+
+        Returns None for both when the stored completions can't be patched, e.g. they were modified.
+        """
+        if not os.path.exists(path) or not os.path.exists(fingerprints_path):
+            return None, None
+
+        with open(fingerprints_path, 'r') as file:
+            stored = json.load(file)
+
+        if stored.get('version') != self.FINGERPRINTS_VERSION or stored.get('sha256') != self._hash(path):
+            return None, None
+
+        stored_completions = pd.read_csv(
+            path,
+            dtype={
+                'client_id': str,
+                'planned_event_id': str,
+                'start_time': str,
+                'status': str,
+            },
+            parse_dates=['start_time']
+        )
+
+        changed_ids = [
+            event_id for event_id, fingerprint in fingerprints.items()
+            if stored['events'].get(event_id) != fingerprint
+        ]
+        unchanged_ids = fingerprints.index.difference(changed_ids)
+
+        return stored_completions[stored_completions['planned_event_id'].isin(unchanged_ids)], changed_ids
+
+    def _patch(self, stored_completions: pd.DataFrame, events_completions: pd.DataFrame, event_ids: pd.Series) -> pd.DataFrame:
+        """
+        Adds the completions of the new and changed events to the stored ones,
+        in the order of those `event_ids`, like a complete generation does.
+        """
+        events_completions = pd.concat(
+            [part for part in [stored_completions, events_completions] if not part.empty] or [stored_completions],
+            ignore_index=True
+        )
+
+        event_orders = self._event_orders(event_ids, events_completions['planned_event_id'])
+        return events_completions.iloc[np.argsort(event_orders, kind='stable')].reset_index(drop=True)
+
+    def _write_fingerprints(self, path: str, fingerprints_path: str, fingerprints: pd.Series) -> None:
+        """
+        Writes the fingerprints of the events into that `fingerprints_path`,
+        along with the content hash of their completions stored at that `path`.
+        """
+        temp_path = f'{fingerprints_path}.tmp'
+
+        with open(temp_path, 'w') as file:
+            json.dump({
+                'version': self.FINGERPRINTS_VERSION,
+                'sha256': self._hash(path),
+                'events': fingerprints.to_dict(),
+            }, file)
+
+        os.replace(temp_path, fingerprints_path)
+
+    def _hash(self, path: str) -> str:
+        """
+        Returns the content hash of the file located at that `path`.
+        """
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+
     def _coalesce(self, df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
         """
         Fills the NA/NaN values by using the next valid observation to fill the gap
@@ -316,57 +1016,160 @@ class PlannedEventCompletion:
         # Returns all rows on the first column
         return df.iloc[:, 0]
 
-    def _create_event_completions_data(self, events, events_reflections) -> List[Dict]:
+    def _create_event_completions(self, events: pd.DataFrame, events_reflections: pd.DataFrame) -> pd.DataFrame:
         """
         Creates planned events completions dataset.
         """
-        events_completions = []
-        counter = 0
+        events_completions = self._create_event_instances(events)
+
+        if events_completions.empty:
+            return events_completions
+
+        return self._resolve_statuses(events_completions, events_reflections)
+
+    def _create_event_completions_in_parallel(
+        self,
+        events: pd.DataFrame,
+        events_reflections: pd.DataFrame,
+        workers: int
+    ) -> pd.DataFrame:
+        """
+        Creates planned events completions dataset in a pool of `workers` processes.
 
-        for _, event in events.iterrows():
-            if counter % 10 == 0:
-                logger.info(f"Generating planned event's completions {counter}/{len(events)}...")
+        The events are partitioned by client, and every process only gets the reflections of its events.
+        The completions are merged back in the order of the events, like `_create_event_completions()` does.
+        """
+        partitions = self._partition_by_client(events, workers)
 
-            counter += 1
+        events_parts = [events[events['client_id'].isin(client_ids)] for client_ids in partitions]
+        reflections_parts = [
+            events_reflections[events_reflections['planned_event_id'].isin(events_part['id'])]
+            for events_part in events_parts
+        ]
 
-            rrule_str = event['recurring_expression']['rrule']
-            start_time = event['start_time']
-            end_time = event['calculated_end_time']
+        logger.info(f"Generating planned event's completions of {len(events)} events in {len(events_parts)} processes...")
 
-            timestamps = rrulestr(rrule_str, dtstart=start_time).between(start_time, end_time, inc=True)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            completions_parts = list(executor.map(self._create_event_completions, events_parts, reflections_parts))
 
-            for timestamp in timestamps:
-                # Ignores the hours, minutes, and seconds of the instance time.
-                instance_date = datetime.combine(timestamp.date(), datetime.min.time())
+        completions_parts = [part for part in completions_parts if not part.empty]
+        if not completions_parts:
+            return pd.DataFrame()
 
-                # Filters event's reflections.
-                actual_event = events_reflections[
-                    (events_reflections['planned_event_id'] == event['id']) &
-                    (events_reflections['start_time'] == instance_date)
-                ]
+        events_completions = pd.concat(completions_parts, ignore_index=True)
 
-                if not actual_event.empty:
-                    status = actual_event.iloc[0]['status']
-                else:
-                    status = 'INCOMPLETED'
+        # Every event is completed by a single process, hence the stable sort by their order keeps their instances sorted.
+        event_orders = self._event_orders(events['id'], events_completions['planned_event_id'])
+        return events_completions.iloc[np.argsort(event_orders, kind='stable')].reset_index(drop=True)
 
-                events_completions.append({
-                    'client_id': event['client_id'],
-                    'planned_event_id': event['id'],
-                    'start_time': instance_date,
-                    'status': status
-                })
+    def _event_orders(self, event_ids: pd.Series, planned_event_ids: pd.Series) -> np.ndarray:
+        """
+        Returns the order of the event of every one of those `planned_event_ids` among those `event_ids`.
 
-        return events_completions
+        The events that share their ID (e.g. an event of a client with several client infos)
+        are ordered as the first one of them is, and their completions are kept in the order they are given.
+        """
+        return pd.Index(event_ids).unique().get_indexer(planned_event_ids)
+
+    def _partition_by_client(self, events: pd.DataFrame, partitions: int) -> List[List]:
+        """
+        Partitions the client IDs of those `events` into that number of `partitions`,
+        with about the same number of events each.
+        """
+        events_per_client = events['client_id'].value_counts(sort=False)
+        events_per_client = events_per_client.iloc[np.lexsort((events_per_client.index.astype(str), -events_per_client.to_numpy()))]
+
+        client_ids = [[] for _ in range(min(partitions, len(events_per_client.index)))]
+        sizes = [0 for _ in client_ids]
+
+        # Assigns the clients with the most events first, each to the smallest partition.
+        for client_id, count in events_per_client.items():
+            smallest = sizes.index(min(sizes))
+            client_ids[smallest].append(client_id)
+            sizes[smallest] += count
+
+        return client_ids
+
+    def _create_event_instances(self, events: pd.DataFrame) -> pd.DataFrame:
+        """
+        Creates the instances of the planned events, from their recurring expressions.
+        """
+        if events.empty:
+            return pd.DataFrame()
+
+        instances = RecurrenceExpander().expand(
+            events['recurring_expression'].map(lambda expression: expression['rrule']),
+            events['start_time'],
+            events['calculated_end_time'],
+            events.get('calculated_start_time')
+        )
+
+        if instances.empty:
+            return pd.DataFrame()
+
+        positions = instances['event'].to_numpy()
+
+        return pd.DataFrame({
+            'client_id': events['client_id'].to_numpy()[positions],
+            'planned_event_id': events['id'].to_numpy()[positions],
+            # Ignores the hours, minutes, and seconds of the instance time.
+            'start_time': instances['timestamp'].dt.normalize().to_numpy(),
+        })
+
+    def _resolve_statuses(self, events_instances: pd.DataFrame, events_reflections: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds the status of every planned event instance, from the first reflection of its planned event
+        on its date. The instances without reflection are incompleted.
+        """
+        # Indexes the first reflection of every planned event and date.
+        reflections = events_reflections[['planned_event_id', 'start_time', 'status']].drop_duplicates(
+            ['planned_event_id', 'start_time'], keep='first'
+        )
+
+        events_completions = events_instances.merge(
+            reflections, how='left', on=['planned_event_id', 'start_time'], indicator=True, validate='many_to_one'
+        )
+
+        is_unreflected = events_completions['_merge'] == 'left_only'
+        events_completions['status'] = events_completions['status'].astype(object)
+        events_completions.loc[is_unreflected, 'status'] = 'INCOMPLETED'
+
+        return events_completions.drop(columns=['_merge'])
 
 
 class TherapySession:
 
-    def download(self) -> None:
+    # Bump it whenever `_parse()` changes, to invalidate the cached snapshots.
+    SNAPSHOT_VERSION = 1
+
+    @property
+    def card(self) -> type:
+        """
+        Returns the Metabase card of the client's therapy session data.
+        """
+        return TherapySessionAPI
+
+    def download(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> None:
         """
         Downloads therapy sessions from Metabase.
         """
-        TherapySessionAPI().download()
+        TherapySessionAPI(file_locator, treatment_windows).download()
+
+    def fetch(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        persist: bool = False,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> pd.DataFrame:
+        """
+        Streams therapy sessions from Metabase into a dataframe.
+        When `persist` is True, the snapshot is stored in the local storage as well.
+        """
+        return TherapySessionAPI(file_locator, treatment_windows).stream(self._parse, persist)
 
     def read_snapshot(self) -> pd.DataFrame:
         """
@@ -376,8 +1179,14 @@ class TherapySession:
 
         path = f'{directory}/{filename}'
 
+        return SNAPSHOT_CACHE.read(path, self._parse, self.SNAPSHOT_VERSION)
+
+    def _parse(self, source: Union[str, IO]) -> pd.DataFrame:
+        """
+        Parses the therapy session data from that `source`.
+        """
         return pd.read_csv(
-            path,
+            source,
             dtype={
                 'client_id': str,
                 'start_time': str,
@@ -388,11 +1197,37 @@ class TherapySession:
 
 class ThoughtRecord:
 
-    def download(self) -> None:
+    # Bump it whenever `_parse()` changes, to invalidate the cached snapshots.
+    SNAPSHOT_VERSION = 1
+
+    @property
+    def card(self) -> type:
+        """
+        Returns the Metabase card of the client's thought record data.
+        """
+        return ThoughtRecordAPI
+
+    def download(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> None:
         """
         Downloads clients' thought records from Metabase.
         """
-        ThoughtRecordAPI().download()
+        ThoughtRecordAPI(file_locator, treatment_windows).download()
+
+    def fetch(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        persist: bool = False,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> pd.DataFrame:
+        """
+        Streams clients' thought records from Metabase into a dataframe.
+        When `persist` is True, the snapshot is stored in the local storage as well.
+        """
+        return ThoughtRecordAPI(file_locator, treatment_windows).stream(self._parse, persist)
 
     def read_snapshot(self) -> pd.DataFrame:
         """
@@ -402,9 +1237,15 @@ class ThoughtRecord:
 
         path = f'{directory}/{filename}'
 
+        return SNAPSHOT_CACHE.read(path, self._parse, self.SNAPSHOT_VERSION)
+
+    def _parse(self, source: Union[str, IO]) -> pd.DataFrame:
+        """
+        Parses the thought records data from that `source`.
+        """
         # Read dataframe
         df = pd.read_csv(
-            path,
+            source,
             dtype={
                 'client_id': str,
                 'start_time': str,
@@ -420,11 +1261,37 @@ class ThoughtRecord:
 
 class SMQ:
 
-    def download(self) -> None:
+    # Bump it whenever `_parse()` changes, to invalidate the cached snapshots.
+    SNAPSHOT_VERSION = 1
+
+    @property
+    def card(self) -> type:
+        """
+        Returns the Metabase card of the SMQ data.
+        """
+        return SMQAPI
+
+    def download(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> None:
         """
         Downloads SMQ results from Metabase.
         """
-        SMQAPI().download()
+        SMQAPI(file_locator, treatment_windows).download()
+
+    def fetch(
+        self,
+        file_locator: FileLocator = FILE_LOCATOR,
+        persist: bool = False,
+        treatment_windows: Union[Dict[str, Tuple[date, date]], None] = None
+    ) -> pd.DataFrame:
+        """
+        Streams SMQ results from Metabase into a dataframe.
+        When `persist` is True, the snapshot is stored in the local storage as well.
+        """
+        return SMQAPI(file_locator, treatment_windows).stream(self._parse, persist)
 
     def read_snapshot(self) -> pd.DataFrame:
         """
@@ -435,8 +1302,14 @@ class SMQ:
 
         path = f'{directory}/{filename}'
 
+        return SNAPSHOT_CACHE.read(path, self._parse, self.SNAPSHOT_VERSION)
+
+    def _parse(self, source: Union[str, IO]) -> pd.DataFrame:
+        """
+        Parses the Session Measurement Questionnaires (SMQ) data from that `source`.
+        """
         return pd.read_csv(
-            path,
+            source,
             dtype={
                 'client_id': str,
                 'start_time': str,
@@ -1,4 +1,6 @@
 import json
+import numpy as np
+import pandas as pd
 
 from datetime import datetime
 from typing import Dict, List, Union
@@ -19,6 +21,53 @@ def max_timestamp(timestamps: List[Union[datetime, None]]) -> Union[datetime, No
     return None
 
 
+def max_timestamps(timestamps: List[np.ndarray]) -> np.ndarray:
+    """
+    Returns the maximum dates of the given arrays of `timestamps`, element-wise,
+    ignoring the missing ones (`NaT`).
+    """
+    maximums = np.full(len(timestamps[0]) if timestamps else 0, np.datetime64('NaT'), dtype='datetime64[ns]')
+
+    for values in timestamps:
+        values = np.asarray(values, dtype='datetime64[ns]')
+        maximums = np.where(np.isnat(maximums) | (values > maximums), values, maximums)
+
+    return maximums
+
+
+def days_since(timestamps: np.ndarray, since_timestamps: np.ndarray) -> np.ndarray:
+    """
+    Returns the number of whole days from the `since_timestamps` to the `timestamps`, element-wise,
+    or `NaN` when the since timestamp is missing (`NaT`).
+    """
+    timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+    since_timestamps = np.asarray(since_timestamps, dtype='datetime64[ns]')
+    has_since = ~np.isnat(since_timestamps)
+
+    days = np.full(len(timestamps), np.nan)
+    days[has_since] = (timestamps[has_since] - since_timestamps[has_since]) // np.timedelta64(1, 'D')
+
+    return days
+
+
+def to_datetime64(timestamp: Union[datetime, None]) -> np.ndarray:
+    """
+    Returns that `timestamp` as a single `datetime64` array, which is `NaT` when the timestamp is missing.
+    """
+    return pd.to_datetime(pd.Series([timestamp], dtype=object)).to_numpy(dtype='datetime64[ns]')
+
+
+def treatment_timestamps(snapshots: Union[pd.DataFrame, np.ndarray]) -> np.ndarray:
+    """
+    Returns the timestamps of those treatment `snapshots` as a `datetime64` array,
+    unless they are already given as timestamps.
+    """
+    if isinstance(snapshots, np.ndarray):
+        return snapshots.astype('datetime64[ns]', copy=False)
+
+    return snapshots['treatment_timestamp'].to_numpy(dtype='datetime64[ns]')
+
+
 def to_dict(value: any) -> Union[Dict, any]:
     """
     Converts value to Python dictionary (if possible).
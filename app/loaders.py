@@ -1,11 +1,15 @@
 import hashlib
 import logging
+import numpy as np
 import os
 import pandas as pd
 
-from datetime import datetime, timedelta
-from typing import Dict
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, List, Tuple, Union
 
+from app.encoders import DayOrdinals, IdDictionary
+from app.engines import AsOfEngine, ClientTimeline, WindowCountEngine
 from app.extractors import (
     ClientInfo,
     Communication,
@@ -17,17 +21,19 @@ from app.extractors import (
     ThoughtRecord,
     SMQ
 )
+from app.helpers import to_dict
 from app.settings import app_settings as settings
 from app.transformators import (
-    communications_to_treatment_snapshots,
-    diary_entries_to_criterion,
-    interactions_to_criterion,
-    negative_registrations_to_criterion,
-    planned_events_to_criterion,
-    positive_registrations_to_criterion,
-    registrations_to_criterion,
-    smqs_to_criterion,
-    thought_records_to_criterion,
+    communications_to_treatment_frame,
+    diary_entries_to_criterion_batch,
+    interactions_to_criterion_batch,
+    negative_registrations_to_criterion_batch,
+    planned_events_to_criterion_batch,
+    positive_registrations_to_criterion_batch,
+    registrations_to_criterion_batch,
+    smqs_to_criterion_batch,
+    smqs_to_scores,
+    thought_records_to_criterion_batch,
 )
 
 
@@ -56,16 +62,203 @@ class Criteria:
     CODE_CRITERION_I__IS_REMINDER_ACTIVATED = 'i__is_reminder_activated'
     CODE_CRITERION_I__IS_COMPLETED = 'i__is_completed'
 
-    def __init__(self) -> None:
-        self.clients = ClientInfo().read_snapshot()
-        self.communications = Communication().read_snapshot()
-        self.custom_trackers = CustomTracker().read_snapshot()
-        self.diary_entries = DiaryEntry().read_snapshot()
-        self.notifications = Notification().read_snapshot()
-        self.events_completions = PlannedEventCompletion().read_snapshot()
-        self.sessions = TherapySession().read_snapshot()
-        self.thought_records = ThoughtRecord().read_snapshot()
-        self.smqs = SMQ().read_snapshot()
+    # Number of days before the treatment snapshots that the criteria look back to (see criteria `d` and `e`).
+    LOOK_BACK_DAYS = 14
+
+    # How the rows of every snapshot are pruned (see `_prune()`):
+    # - `latest`: the latest rows before the look-back window that are kept for the criteria
+    #   without a look-back limit (`a`, `b` and `h`). `True` keeps the latest row of every client,
+    #   a list of columns keeps the latest row of every client for each of those columns being true,
+    #   `None` keeps every row, and `False` keeps none of them.
+    # - `drop_duplicates`: whether the exact duplicates are dropped, which is only done
+    #   when the criteria don't count the rows but check their presence or their latest start time.
+    PRUNING = {
+        'communications': {'latest': ['call_made', 'chat_msg_sent'], 'drop_duplicates': True},
+        'custom_trackers': {'latest': True, 'drop_duplicates': False},
+        'diary_entries': {'latest': True, 'drop_duplicates': True},
+        'notifications': {'latest': False, 'drop_duplicates': True},
+        'events_completions': {'latest': False, 'drop_duplicates': True},
+        'sessions': {'latest': True, 'drop_duplicates': True},
+        'thought_records': {'latest': True, 'drop_duplicates': True},
+        'smqs': {'latest': None, 'drop_duplicates': False},
+    }
+
+    def __init__(self, snapshots: Union[Dict[str, pd.DataFrame], None] = None) -> None:
+        """
+        Loads the snapshots of the collections from the local storage,
+        unless they are given as dataframes keyed by the name of their collection
+        (see `MetabaseCollection.fetch()`).
+        """
+        if snapshots is None:
+            self.clients = ClientInfo().read_snapshot()
+            self.communications = Communication().read_snapshot()
+            self.custom_trackers = CustomTracker().read_snapshot()
+            self.diary_entries = DiaryEntry().read_snapshot()
+            self.notifications = Notification().read_snapshot()
+            self._events_completions_source = partial(PlannedEventCompletion().read_snapshot, clients=self.clients)
+            self.sessions = TherapySession().read_snapshot()
+            self.thought_records = ThoughtRecord().read_snapshot()
+            self.smqs = SMQ().read_snapshot()
+        else:
+            self.clients = snapshots['ClientInfo']
+            self.communications = snapshots['Communication']
+            self.custom_trackers = snapshots['CustomTracker']
+            self.diary_entries = snapshots['DiaryEntry']
+            self.notifications = snapshots['Notification']
+            self._events_completions_source = partial(
+                PlannedEventCompletion().read_snapshot,
+                clients=snapshots['ClientInfo'],
+                events=snapshots['PlannedEvent'],
+                events_reflections=snapshots['PlannedEventReflection']
+            )
+            self.sessions = snapshots['TherapySession']
+            self.thought_records = snapshots['ThoughtRecord']
+            self.smqs = snapshots['SMQ']
+
+        # The lazy planned event completions are generated along with the treatment snapshots (see `_create()`).
+        self.events_completions = None if settings.LAZY_PLANNED_EVENT_COMPLETIONS else self._events_completions_source()
+
+        self._client_ids = IdDictionary(enabled=settings.ENCODE_IDS)
+        self._days = DayOrdinals(enabled=settings.DAY_ORDINALS)
+
+        # The treatment snapshots are prepared once, for the criteria of all of them or of a single client.
+        self._snapshots = None
+
+        # The timeline of the clients is built on the first criteria of a single client (see `for_client()`).
+        self._timeline = None
+
+    def _complete_planned_events(self, windows: pd.DataFrame) -> None:
+        """
+        Generates the planned event completions within the treatment `windows` of the clients.
+        """
+        client_windows = windows.set_axis(self._client_ids.decode(windows.index.to_series()).to_numpy())
+
+        self.events_completions = self._events_completions_source(windows=client_windows)
+        self._encode_client_ids()
+
+    def _encode_client_ids(self) -> None:
+        """
+        Replaces the client IDs of every snapshot with their codes of the client IDs dictionary.
+        The snapshots whose client IDs are already encoded are left untouched.
+        """
+        snapshot_names = [
+            'clients',
+            'communications',
+            'custom_trackers',
+            'diary_entries',
+            'notifications',
+            'events_completions',
+            'sessions',
+            'thought_records',
+            'smqs',
+        ]
+        snapshots = {
+            name: getattr(self, name)
+            for name in snapshot_names
+            if getattr(self, name) is not None and
+            'client_id' in getattr(self, name).columns and getattr(self, name)['client_id'].dtype == object
+        }
+
+        self._client_ids.fit(snapshot['client_id'] for snapshot in snapshots.values())
+
+        for name, snapshot in snapshots.items():
+            setattr(self, name, snapshot.assign(client_id=self._client_ids.encode(snapshot['client_id'])))
+
+    def _treatment_windows(self, snapshots: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns the window of every client that the criteria of those treatment `snapshots` look at,
+        from the end of the look-back window of their first treatment snapshot (`from`, excluded)
+        to the end of the day of their last one (`to`, included).
+        """
+        windows = snapshots.groupby('client_id')['treatment_timestamp'].agg(['min', 'max'])
+
+        # The windows of the criteria end at the end of their days (see `_within_days()`).
+        end_of_day = pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+        windows['from'] = (windows['min'] - pd.Timedelta(days=Criteria.LOOK_BACK_DAYS)).dt.normalize() + end_of_day
+        windows['to'] = windows['max'].dt.normalize() + end_of_day
+
+        return windows[['from', 'to']]
+
+    def _prune(self, windows: pd.DataFrame) -> None:
+        """
+        Drops the rows of every snapshot that can't change the criteria within the treatment `windows`,
+        i.e. the rows of the clients without treatment snapshots, the rows after their last treatment snapshot,
+        and the rows before the look-back window of their first treatment snapshot
+        (except the latest ones, see `PRUNING`).
+        """
+        for name, pruning in Criteria.PRUNING.items():
+            snapshot = getattr(self, name)
+            if 'start_time' not in snapshot.columns:
+                continue
+
+            pruned = self._prune_snapshot(snapshot, windows, pruning['latest'])
+            if pruning['drop_duplicates']:
+                pruned = pruned.drop_duplicates()
+
+            logger.info(f"Prune the {name} from {len(snapshot.index)} to {len(pruned.index)} rows...")
+
+            setattr(self, name, pruned)
+
+    def _prune_snapshot(self, snapshot: pd.DataFrame, windows: pd.DataFrame, latest: Union[bool, List[str], None]) -> pd.DataFrame:
+        """
+        Returns the rows of that `snapshot` within the `windows` of their client,
+        along with the `latest` rows before them.
+        """
+        client_windows = windows.reindex(snapshot['client_id'])
+        start_times = snapshot['start_time'].to_numpy()
+
+        is_before_end = start_times <= client_windows['to'].to_numpy()
+        is_within = is_before_end & (start_times > client_windows['from'].to_numpy())
+        is_before = is_before_end & ~is_within
+
+        if latest is None:
+            return snapshot[is_before_end]
+
+        keep = is_within.copy()
+        if latest is not False:
+            conditions = [np.ones(len(snapshot.index), dtype=bool)] if latest is True else [
+                snapshot[column].to_numpy(dtype=bool) for column in latest
+            ]
+
+            for condition in conditions:
+                positions = np.flatnonzero(is_before & condition)
+                rows = pd.DataFrame({'client_id': snapshot['client_id'].to_numpy()[positions], 'start_time': start_times[positions]})
+                latest_rows = rows.sort_values('start_time', kind='stable').drop_duplicates('client_id', keep='last')
+
+                keep[positions[latest_rows.index]] = True
+
+        return snapshot[keep]
+
+    def _encode_days(self) -> None:
+        """
+        Adds the day ordinals of the start times (`start_day`) to every snapshot that is filtered by windows of days.
+
+        The start times are only kept in the snapshots whose criteria need the time of the day,
+        i.e. the days since the last contact, the last registration, and the last SMQs.
+        The snapshots whose day ordinals are already added are left untouched.
+        """
+        if not self._days.enabled:
+            return
+
+        snapshot_names = [
+            'custom_trackers',
+            'diary_entries',
+            'notifications',
+            'events_completions',
+            'thought_records',
+        ]
+        windowed_only_names = ['notifications', 'events_completions']
+
+        for name in snapshot_names:
+            snapshot = getattr(self, name)
+            if 'start_day' in snapshot.columns:
+                continue
+
+            snapshot = snapshot.assign(start_day=self._days.encode(snapshot['start_time']))
+            if name in windowed_only_names:
+                snapshot = snapshot.drop(columns=['start_time'])
+
+            setattr(self, name, snapshot)
 
     def load(self) -> None:
         """
@@ -104,24 +297,218 @@ class Criteria:
             Criteria.CODE_CRITERION_I__IS_COMPLETED: []
         }
 
-        snapshots = communications_to_treatment_snapshots(self.clients, self.communications)
+        snapshots = self._prepare()
+
+        # The criteria of the latest rows at or before the snapshots,
+        # and of the rows within the windows of days before them, are computed for all of them at once.
+        self._add_latest_criteria(snapshots, criteria_data)
+        self._add_windowed_criteria(snapshots, criteria_data)
+
+        # The snapshots share the client info of their client,
+        # along with their client ID that is decoded once for all of them (`client_name`).
+        clients = self.clients.assign(client_name=self._client_ids.decode(self.clients['client_id']))
+        client_infos = [client_info for _, client_info in clients.iterrows()]
+
+        for client_position, treatment_phase, timestamp in zip(
+            snapshots['client_position'],
+            snapshots['treatment_phase'],
+            snapshots['treatment_timestamp']
+        ):
+            client_info = client_infos[client_position]
+
+            self._add_common_information(client_info, criteria_data, timestamp, treatment_phase)
+
+        criteria = pd.DataFrame(criteria_data)
+        criteria[Criteria.CODE_CLIENT_ID] = self._client_ids.decode(criteria[Criteria.CODE_CLIENT_ID])
+
+        return criteria
+
+    def _prepare(self) -> pd.DataFrame:
+        """
+        Prepares the snapshots of the collections for the criteria,
+        and returns the treatment snapshots of the clients (see `communications_to_treatment_frame()`).
+
+        The snapshots are only prepared on the first call, since the treatment snapshots
+        can't be derived again from the pruned communications.
+        """
+        if self._snapshots is not None:
+            return self._snapshots
+
+        # The client IDs are filtered on integer codes,
+        # and they are only restored into strings in the created criteria data.
+        self._encode_client_ids()
 
-        for snapshot in snapshots:
-            client_info = snapshot['client_info']
-            timestamp = snapshot['treatment_timestamp']
+        snapshots = communications_to_treatment_frame(self.clients, self.communications)
+        windows = self._treatment_windows(snapshots)
 
-            self._add_common_information(snapshot, criteria_data)
-            self._add_days_since_last_contact(client_info, criteria_data, timestamp)
-            self._add_days_since_last_registration(client_info, criteria_data, timestamp)
-            self._add_total_registrations_of_custom_tracker(client_info, criteria_data, timestamp)
-            self._add_rate_of_change_neg_regs(client_info, criteria_data, timestamp)
-            self._add_rate_of_change_pos_regs(client_info, criteria_data, timestamp)
-            self._add_completion_of_planned_events(client_info, criteria_data, timestamp)
-            self._add_completion_of_thought_records(client_info, criteria_data, timestamp)
-            self._add_smq_answers(client_info, criteria_data, timestamp)
-            self._add_completion_of_diary_entries(client_info, criteria_data, timestamp)
+        # The planned event completions are only generated within the treatment windows, when they are lazy.
+        if self.events_completions is None:
+            self._complete_planned_events(windows)
 
-        return pd.DataFrame(criteria_data)
+        # The rows that can't change any criterion are dropped before the criteria are created.
+        if settings.PRUNE_SNAPSHOTS:
+            self._prune(windows)
+
+        # The windows of days are filtered on integer day ordinals.
+        self._encode_days()
+
+        self._snapshots = snapshots
+
+        return self._snapshots
+
+    def for_client(self, client_id: str, date: datetime) -> Dict:
+        """
+        Returns the criteria of that client on that date, i.e. of their treatment snapshot on that day,
+        as a single row of the criteria data keyed by the codes of its columns (see `_create()`).
+
+        The criteria are looked up in the timeline of the clients, which is built on the first call,
+        so that the following calls only do a few binary searches.
+        Raises `ValueError` when the client has no treatment snapshot on that day.
+        """
+        timeline = self._client_timeline()
+        code = self._client_ids.encode_one(client_id)
+
+        # The treatment snapshot of that day is the latest one at or before the end of that day.
+        end_of_day = datetime.combine(pd.Timestamp(date).date(), datetime.max.time())
+        position = timeline.latest('snapshots', code, end_of_day)[0]
+        timestamp = pd.Timestamp(self._timeline_timestamps[position]) if position >= 0 else None
+
+        if timestamp is None or timestamp.date() != end_of_day.date():
+            raise ValueError(f"No treatment snapshot for client {client_id} on {end_of_day.date()}")
+
+        # The batch transformators take the timestamp of the snapshot, and its latest times, as single-element arrays.
+        timestamps = self._timeline_timestamps[position:position + 1]
+
+        a__by_call, a__by_chat = interactions_to_criterion_batch(
+            timestamps,
+            np.array([timeline.latest_time('calls', code, timestamp)]),
+            np.array([timeline.latest_time('sessions', code, timestamp)]),
+            np.array([timeline.latest_time('chats', code, timestamp)])
+        )
+        b = registrations_to_criterion_batch(
+            timestamps,
+            *[
+                np.array([timeline.latest_time(name, code, timestamp)])
+                for name in ['diary_entries', 'thought_records', 'smqs', 'custom_trackers']
+            ]
+        )
+
+        def count(name: str, days_from: int = 7, days_to: int = 0) -> int:
+            return timeline.count(name, code, timestamp, days_from, days_to)
+
+        d = self._single_criterion(
+            negative_registrations_to_criterion_batch, count('negative_registrations'), count('negative_registrations', 14, 7)
+        )
+        e = self._single_criterion(
+            positive_registrations_to_criterion_batch, count('positive_registrations'), count('positive_registrations', 14, 7)
+        )
+        f__is_scheduled, f__completion_status = self._single_criterion(
+            planned_events_to_criterion_batch, count('events_completions'), count('incompleted_events_completions')
+        )
+        g__is_reminder_activated, g__is_completed = self._single_criterion(
+            thought_records_to_criterion_batch, count('thought_records'), count('gscheme_notifications')
+        )
+        i__is_reminder_activated, i__is_completed = self._single_criterion(
+            diary_entries_to_criterion_batch, count('diary_entries'), count('diary_entry_notifications')
+        )
+        h__scores_diff, h__low_score = self._single_criterion(
+            self._smqs_to_criterion_batch, *timeline.latest('smqs', code, timestamp, count=2)
+        )
+
+        return {
+            Criteria.CODE_CASE_ID: self._compute_case_id(client_id, self._timeline_therapist_ids[position], timestamp),
+            Criteria.CODE_CASE_CREATED_AT: timestamp.strftime("%Y-%m-%d"),
+            Criteria.CODE_CLIENT_ID: client_id,
+            Criteria.CODE_TREATMENT_PHASE: self._timeline_phases[position],
+            Criteria.CODE_CRITERION_A__BY_CALL: self._days_criterion(a__by_call)[0],
+            Criteria.CODE_CRITERION_A__BY_CHAT: self._days_criterion(a__by_chat)[0],
+            Criteria.CODE_CRITERION_B: self._days_criterion(b)[0],
+            Criteria.CODE_CRITERION_C: count('custom_trackers'),
+            Criteria.CODE_CRITERION_D: d,
+            Criteria.CODE_CRITERION_E: e,
+            Criteria.CODE_CRITERION_F__IS_SCHEDULED: f__is_scheduled,
+            Criteria.CODE_CRITERION_F__COMPLETION_STATUS: f__completion_status,
+            Criteria.CODE_CRITERION_G__IS_REMINDER_ACTIVATED: g__is_reminder_activated,
+            Criteria.CODE_CRITERION_G__IS_COMPLETED: g__is_completed,
+            Criteria.CODE_CRITERION_H: h__scores_diff,
+            Criteria.CODE_CRITERION_H__LOW_SCORE: h__low_score,
+            Criteria.CODE_CRITERION_I__IS_REMINDER_ACTIVATED: i__is_reminder_activated,
+            Criteria.CODE_CRITERION_I__IS_COMPLETED: i__is_completed,
+        }
+
+    def _single_criterion(self, transformator: Callable, *values: int) -> Union[int, Tuple[int, ...]]:
+        """
+        Returns the criterion of a single treatment snapshot (see `for_client()`)
+        by that batch `transformator` of those `values`, i.e. of the counts of its rows or of their positions.
+
+        The criteria are cached by their values, since the snapshots mostly share the same few of them,
+        so that the batch transformators are rarely called on single-element arrays.
+        """
+        key = (transformator, *values)
+
+        if key not in self._timeline_criteria:
+            criterion = transformator(*[np.array([value]) for value in values])
+            self._timeline_criteria[key] = tuple(int(c[0]) for c in criterion) if isinstance(criterion, tuple) else int(criterion[0])
+
+        return self._timeline_criteria[key]
+
+    def _smqs_to_criterion_batch(self, last_positions: np.ndarray, previous_positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Transforms the SMQs of the timeline at those positions into criterion (see `smqs_to_criterion_batch()`).
+        """
+        return smqs_to_criterion_batch(self._timeline_smq_scores, last_positions, previous_positions)
+
+    def _client_timeline(self) -> ClientTimeline:
+        """
+        Returns the timeline of the clients, with every table (and flag) that the criteria look at,
+        building it on the first call.
+        """
+        if self._timeline is not None:
+            return self._timeline
+
+        snapshots = self._prepare()
+
+        logger.info("Build the timeline of the clients...")
+
+        timeline = ClientTimeline()
+        timeline.add('snapshots', snapshots.rename(columns={'treatment_timestamp': 'start_time'}))
+
+        timeline.add('calls', self.communications, self.communications['call_made'])
+        timeline.add('chats', self.communications, self.communications['chat_msg_sent'])
+        timeline.add('sessions', self.sessions)
+        timeline.add('smqs', self.smqs)
+
+        is_negative = self._negative_registrations(self.custom_trackers)
+        is_measured = self.custom_trackers['name'].isin(['measure_avoidance', 'measure_safety_behaviour']).to_numpy()
+
+        timeline.add('custom_trackers', self.custom_trackers)
+        timeline.add('negative_registrations', self.custom_trackers, is_negative)
+        timeline.add('positive_registrations', self.custom_trackers, is_measured & ~is_negative)
+
+        timeline.add('events_completions', self.events_completions)
+        timeline.add(
+            'incompleted_events_completions',
+            self.events_completions,
+            self.events_completions['status'].isin(['INCOMPLETED', 'CANCELED'])
+        )
+
+        timeline.add('thought_records', self.thought_records)
+        timeline.add('diary_entries', self.diary_entries)
+        timeline.add('gscheme_notifications', self.notifications, self.notifications['type'] == 'gscheme_log')
+        timeline.add('diary_entry_notifications', self.notifications, self.notifications['type'] == 'diary_entry_log')
+
+        self._timeline_timestamps = snapshots['treatment_timestamp'].to_numpy(dtype='datetime64[ns]')
+        self._timeline_phases = snapshots['treatment_phase'].to_numpy()
+        self._timeline_criteria = {}
+
+        # The therapist of every snapshot is the one of its client info, like in the created criteria,
+        # since a client can have several client infos (see `client_position`).
+        self._timeline_therapist_ids = self.clients['therapist_id'].to_numpy()[snapshots['client_position'].to_numpy()]
+
+        self._timeline_smq_scores = smqs_to_scores(self.smqs)
+        self._timeline = timeline
+
+        return self._timeline
 
     def _store(self, criteria: pd.DataFrame) -> None:
         """
@@ -180,23 +567,26 @@ class Criteria:
             index=False
         )
 
-    def _add_common_information(self, snapshot: Dict, data: Dict) -> None:
+    def _add_common_information(
+        self,
+        client: pd.Series,
+        data: Dict,
+        treatment_timestamp: datetime,
+        treatment_phase: int
+    ) -> None:
         """
-        Add the common information from that `snapshot` to the criteria data.
+        Add the common information of that `client` snapshot to the criteria data.
 
         The common information consists of Case ID, Case Created At, Client ID,
         and their phase of the treatment.
         """
-        client = snapshot['client_info']
-        treatment_phase = snapshot['treatment_phase']
-        treatment_timestamp = snapshot['treatment_timestamp']
-
         client_id = client['client_id']
+        client_name = client['client_name']
 
-        logger.info(f"Add the {client_id} common information to the criteria data...")
+        logger.info(f"Add the {client_name} common information to the criteria data...")
 
         # Append Case ID
-        new_case_id = self._compute_case_id(client_id, client['therapist_id'], treatment_timestamp)
+        new_case_id = self._compute_case_id(client_name, client['therapist_id'], treatment_timestamp)
         data[Criteria.CODE_CASE_ID].append(new_case_id)
 
         # Append Snapshot's Timestamp
@@ -208,282 +598,129 @@ class Criteria:
         # Append treatment phase
         data[Criteria.CODE_TREATMENT_PHASE].append(treatment_phase)
 
-    def _add_days_since_last_contact(self, client: pd.Series, data: Dict, snapshot_timestamp: datetime) -> None:
+    def _add_latest_criteria(self, snapshots: pd.DataFrame, data: Dict) -> None:
         """
-        Add the number of days since the last interaction
-        between that `client` and their therapists to the criteria `a__by_call` and `a__by_chat`.
+        Add the criteria of the latest rows at or before every one of those treatment `snapshots`
+        to the criteria data, i.e. the number of days since the last contact (`a`),
+        the number of days since the last registration (`b`), and the answers of the last SMQs (`h`).
         """
-        client_id = client['client_id']
+        engine = AsOfEngine(snapshots)
 
-        logger.info(f"Add {client_id} number of days since last contact to the criteria data...")
-
-        # Filters communication data.
-        communications = self.communications[
-            (self.communications['client_id'] == client_id) &
-            (self.communications['start_time'] <= snapshot_timestamp)
-        ]
-
-        # Filters session data.
-        sessions = self.sessions[
-            (self.sessions['client_id'] == client_id) &
-            (self.sessions['start_time'] <= snapshot_timestamp)
-        ]
+        logger.info("Add the number of days since last contact to the criteria data...")
 
         # Append criterion `a`
-        a__by_call, a__by_chat = interactions_to_criterion(communications, sessions, snapshot_timestamp)
-        data[Criteria.CODE_CRITERION_A__BY_CALL].append(a__by_call)
-        data[Criteria.CODE_CRITERION_A__BY_CHAT].append(a__by_chat)
-
-    def _add_days_since_last_registration(self, client: pd.Series, data: Dict, snapshot_timestamp: datetime) -> None:
-        """
-        Add the number of days since the last time the `client` made a registration
-        for one of these trackers:
-        - Diary
-        - GSchema
-        - SMQ
-        - Custom trackers:
-            - Avoidance
-            - Safety behavior
-            - Worry
-        """
-        client_id = client['client_id']
+        calls = self.communications[self.communications['call_made']]
+        chats = self.communications[self.communications['chat_msg_sent']]
 
-        logger.info(f"Add {client_id} number of days since last registration to the criteria data...")
-
-        # Filters diary entries data.
-        diaries = self.diary_entries[
-            (self.diary_entries['client_id'] == client_id) &
-            (self.diary_entries['start_time'] <= snapshot_timestamp)
-        ]
-
-        # Filters thought records data.
-        thought_records = self.thought_records[
-            (self.thought_records['client_id'] == client_id) &
-            (self.thought_records['start_time'] <= snapshot_timestamp)
-        ]
-
-        # Filters sessions data.
-        smqs = self.smqs[
-            (self.smqs['client_id'] == client_id) &
-            (self.smqs['start_time'] <= snapshot_timestamp)
-        ]
-
-        # Filters custom trackers data.
-        custom_trackers = self.custom_trackers[
-            (self.custom_trackers['client_id'] == client_id) &
-            (self.custom_trackers['start_time'] <= snapshot_timestamp)
-        ]
-
-        # Append criterion `b`
-        data[Criteria.CODE_CRITERION_B].append(
-            registrations_to_criterion(diaries, thought_records, smqs, custom_trackers, snapshot_timestamp)
+        a__by_call, a__by_chat = interactions_to_criterion_batch(
+            snapshots, engine.latest_times(calls), engine.latest_times(self.sessions), engine.latest_times(chats)
         )
+        data[Criteria.CODE_CRITERION_A__BY_CALL] = self._days_criterion(a__by_call)
+        data[Criteria.CODE_CRITERION_A__BY_CHAT] = self._days_criterion(a__by_chat)
 
-    def _add_total_registrations_of_custom_tracker(self, client: pd.Series, data: Dict, snapshot_timestamp: datetime) -> None:
-        """
-        Add the number of the custom tracker registrations in the last 7 days
-        that have been submitted by that `client` to the criteria data.
-        """
-        client_id = client['client_id']
+        logger.info("Add the number of days since last registration to the criteria data...")
 
-        logger.info(f"Add {client_id} total registrations of the custom trackers to the criteria data...")
+        # Append criterion `b`
+        data[Criteria.CODE_CRITERION_B] = self._days_criterion(registrations_to_criterion_batch(
+            snapshots,
+            engine.latest_times(self.diary_entries),
+            engine.latest_times(self.thought_records),
+            engine.latest_times(self.smqs),
+            engine.latest_times(self.custom_trackers)
+        ))
 
-        # Filters custom trackers data in the last seven days (1-7)
-        from_datetime = datetime.combine(snapshot_timestamp - timedelta(days=7), datetime.max.time())
-        to_datetime = datetime.combine(snapshot_timestamp, datetime.max.time())
+        logger.info("Add the answers of the SMQs to the criteria data...")
 
-        custom_trackers = self.custom_trackers[
-            (self.custom_trackers['client_id'] == client_id) &
-            (self.custom_trackers['start_time'] > from_datetime) &
-            (self.custom_trackers['start_time'] <= to_datetime)
-        ]
+        # Append criterion `h`
+        last_positions, prev_positions = engine.latest(self.smqs, count=2)
 
-        # Append criterion `c`
-        total_registrations = len(custom_trackers.index)
-        data[Criteria.CODE_CRITERION_C].append(total_registrations)
+        h__scores_diff, h__low_score = smqs_to_criterion_batch(self.smqs, last_positions, prev_positions)
+        data[Criteria.CODE_CRITERION_H] = h__scores_diff
+        data[Criteria.CODE_CRITERION_H__LOW_SCORE] = h__low_score
 
-    def _add_rate_of_change_neg_regs(self, client: pd.Series, data: Dict, snapshot_timestamp: datetime) -> None:
+    def _add_windowed_criteria(self, snapshots: pd.DataFrame, data: Dict) -> None:
         """
-        Add the comparison result of the total negative registrations made by that `client`
-        between the last seven days (1-7) and the seven days before that (8-14)
-        to the criteria data.
+        Add the criteria of the rows within the windows of days before every one of those treatment `snapshots`
+        to the criteria data, i.e. the total registrations of the custom trackers (`c`),
+        the rate of change of the negative (`d`) and positive (`e`) registrations,
+        and the completion status of the planned events (`f`), thought records (`g`), and diary entries (`i`).
         """
-        client_id = client['client_id']
-
-        logger.info(f"Add {client_id} rate of change of the negative registrations to the criteria data...")
+        engine = WindowCountEngine(snapshots, Criteria.LOOK_BACK_DAYS)
 
-        # Filters custom trackers data from the last seven days (days 1-7)
-        from_datetime = datetime.combine(snapshot_timestamp - timedelta(days=7), datetime.max.time())
-        to_datetime = datetime.combine(snapshot_timestamp, datetime.max.time())
+        logger.info("Add the total registrations of the custom trackers to the criteria data...")
 
-        trackers_past_7d = self.custom_trackers[
-            (self.custom_trackers['client_id'] == client_id) &
-            (self.custom_trackers['start_time'] > from_datetime) &
-            (self.custom_trackers['start_time'] <= to_datetime)
-        ]
+        # Append criterion `c`
+        custom_trackers = engine.counter(self.custom_trackers)
+        data[Criteria.CODE_CRITERION_C] = engine.count(custom_trackers, 7)
 
-        # Filters custom trackers data from one week before the last seven days (days 8-14)
-        from_datetime = datetime.combine(snapshot_timestamp - timedelta(days=14), datetime.max.time())
-        to_datetime = datetime.combine(snapshot_timestamp - timedelta(days=7), datetime.max.time())
+        logger.info("Add the rate of change of the negative and positive registrations to the criteria data...")
 
-        trackers_1w_before_past_7d = self.custom_trackers[
-            (self.custom_trackers['client_id'] == client_id) &
-            (self.custom_trackers['start_time'] > from_datetime) &
-            (self.custom_trackers['start_time'] <= to_datetime)
-        ]
+        # Append criteria `d` and `e`, which compare the last seven days (1-7) and the seven days before that (8-14).
+        is_negative = self._negative_registrations(self.custom_trackers)
+        is_measured = self.custom_trackers['name'].isin(['measure_avoidance', 'measure_safety_behaviour']).to_numpy()
 
-        # Append criterion `d`
-        data[Criteria.CODE_CRITERION_D].append(
-            negative_registrations_to_criterion(trackers_past_7d, trackers_1w_before_past_7d)
+        negative_registrations = engine.counter(self.custom_trackers, is_negative)
+        data[Criteria.CODE_CRITERION_D] = negative_registrations_to_criterion_batch(
+            engine.count(negative_registrations, 7), engine.count(negative_registrations, 14, 7)
         )
 
-    def _add_rate_of_change_pos_regs(self, client: pd.Series, data: Dict, snapshot_timestamp: datetime) -> None:
-        """
-        Add the comparison result of the total positive registrations made by that `client`
-        between the last seven days (1-7) and the seven days before that (8-14)
-        to the criteria data.
-        """
-        client_id = client['client_id']
-
-        logger.info(f"Add {client_id} rate of change of the positive registrations to the criteria data...")
-
-        # Filters custom trackers data from the last seven days (days 1-7)
-        from_datetime = datetime.combine(snapshot_timestamp - timedelta(days=7), datetime.max.time())
-        to_datetime = datetime.combine(snapshot_timestamp, datetime.max.time())
-
-        trackers_past_7d = self.custom_trackers[
-            (self.custom_trackers['client_id'] == client_id) &
-            (self.custom_trackers['start_time'] > from_datetime) &
-            (self.custom_trackers['start_time'] <= to_datetime)
-        ]
-
-        # Filters custom trackers data from one week before the last seven days (days 8-14)
-        from_datetime = datetime.combine(snapshot_timestamp - timedelta(days=14), datetime.max.time())
-        to_datetime = datetime.combine(snapshot_timestamp - timedelta(days=7), datetime.max.time())
-
-        trackers_1w_before_past_7d = self.custom_trackers[
-            (self.custom_trackers['client_id'] == client_id) &
-            (self.custom_trackers['start_time'] > from_datetime) &
-            (self.custom_trackers['start_time'] <= to_datetime)
-        ]
-
-        # Append criterion `e`
-        data[Criteria.CODE_CRITERION_E].append(
-            positive_registrations_to_criterion(trackers_past_7d, trackers_1w_before_past_7d)
+        positive_registrations = engine.counter(self.custom_trackers, is_measured & ~is_negative)
+        data[Criteria.CODE_CRITERION_E] = positive_registrations_to_criterion_batch(
+            engine.count(positive_registrations, 7), engine.count(positive_registrations, 14, 7)
         )
 
-    def _add_completion_of_planned_events(self, client: pd.Series, data: Dict, snapshot_timestamp: datetime) -> None:
-        """
-        Add the completion status of the `client`'s planned events to the criteria data.
-        """
-        client_id = client['client_id']
-
-        logger.info(f"Add the completion status of the {client_id} planned events to the criteria data...")
-
-        # Filters planned event's completions in the last seven days (1-7)
-        from_datetime = datetime.combine(snapshot_timestamp - timedelta(days=7), datetime.max.time())
-        to_datetime = datetime.combine(snapshot_timestamp, datetime.max.time())
-
-        events = self.events_completions[
-            (self.events_completions['client_id'] == client_id) &
-            (self.events_completions['start_time'] > from_datetime) &
-            (self.events_completions['start_time'] <= to_datetime)
-        ]
+        logger.info("Add the completion status of the planned events to the criteria data...")
 
         # Append criterion `f`
-        schedule_priority, completion_priority = planned_events_to_criterion(events)
-        data[Criteria.CODE_CRITERION_F__IS_SCHEDULED].append(schedule_priority)
-        data[Criteria.CODE_CRITERION_F__COMPLETION_STATUS].append(completion_priority)
+        is_incompleted = self.events_completions['status'].isin(['INCOMPLETED', 'CANCELED']).to_numpy()
 
-    def _add_completion_of_thought_records(self, client: pd.Series, data: Dict, snapshot_timestamp: datetime) -> None:
-        """
-        Add the completion status of the `client`'s thought records to the criteria data.
-        """
-        client_id = client['client_id']
+        f__is_scheduled, f__completion_status = planned_events_to_criterion_batch(
+            engine.count(engine.counter(self.events_completions), 7),
+            engine.count(engine.counter(self.events_completions, is_incompleted), 7)
+        )
+        data[Criteria.CODE_CRITERION_F__IS_SCHEDULED] = f__is_scheduled
+        data[Criteria.CODE_CRITERION_F__COMPLETION_STATUS] = f__completion_status
 
-        logger.info(f"Add the completion status of the {client_id} thought records to the criteria data...")
+        logger.info("Add the completion status of the thought records and diary entries to the criteria data...")
 
-        # Filters thought records and theirs notification in the last seven days (1-7)
-        from_datetime = datetime.combine(snapshot_timestamp - timedelta(days=7), datetime.max.time())
-        to_datetime = datetime.combine(snapshot_timestamp, datetime.max.time())
+        # Append criterion `g`
+        gscheme_notifications = engine.counter(self.notifications, self.notifications['type'] == 'gscheme_log')
 
-        # Filters thought records data.
-        thought_records = self.thought_records[
-            (self.thought_records['client_id'] == client_id) &
-            (self.thought_records['start_time'] > from_datetime) &
-            (self.thought_records['start_time'] <= to_datetime)
-        ]
+        g__is_reminder_activated, g__is_completed = thought_records_to_criterion_batch(
+            engine.count(engine.counter(self.thought_records), 7), engine.count(gscheme_notifications, 7)
+        )
+        data[Criteria.CODE_CRITERION_G__IS_REMINDER_ACTIVATED] = g__is_reminder_activated
+        data[Criteria.CODE_CRITERION_G__IS_COMPLETED] = g__is_completed
 
-        # Filters notifications data.
-        notifications = self.notifications[
-            (self.notifications['client_id'] == client_id) &
-            (self.notifications['type'] == 'gscheme_log') &
-            (self.diary_entries['start_time'] > from_datetime) &
-            (self.diary_entries['start_time'] <= to_datetime)
-        ]
+        # Append criterion `i`
+        diary_entry_notifications = engine.counter(self.notifications, self.notifications['type'] == 'diary_entry_log')
 
-        # Append criterion `g`
-        reminder_priority, completion_priority = thought_records_to_criterion(
-            thought_records, notifications)
-        data[Criteria.CODE_CRITERION_G__IS_REMINDER_ACTIVATED].append(reminder_priority)
-        data[Criteria.CODE_CRITERION_G__IS_COMPLETED].append(completion_priority)
+        i__is_reminder_activated, i__is_completed = diary_entries_to_criterion_batch(
+            engine.count(engine.counter(self.diary_entries), 7), engine.count(diary_entry_notifications, 7)
+        )
+        data[Criteria.CODE_CRITERION_I__IS_REMINDER_ACTIVATED] = i__is_reminder_activated
+        data[Criteria.CODE_CRITERION_I__IS_COMPLETED] = i__is_completed
 
-    def _add_smq_answers(self, client: pd.Series, data: Dict, snapshot_timestamp: datetime) -> None:
+    def _negative_registrations(self, custom_trackers: pd.DataFrame) -> np.ndarray:
         """
-        Add the `client`'s answers of the Session Measurement Questionnaires (SMQ) to the criteria data.
+        Returns whether every registration of those `custom_trackers` is a negative registration,
+        i.e. an avoidance or a safety behaviour indicated by `value.boolean = True`, or any worry.
         """
-        client_id = client['client_id']
-
-        logger.info(f"Add the answers of the {client_id} SMQs to the criteria data...")
-
-        # Filters thought records data and sort them in descending order.
-        smqs = self.smqs[
-            (self.smqs['client_id'] == client_id) &
-            (self.smqs['start_time'] <= snapshot_timestamp)
-        ]
-        smqs = smqs.sort_values(by=['start_time'], ascending=False)
+        if 'is_negative_registration' in custom_trackers.columns:
+            return custom_trackers['is_negative_registration'].to_numpy(dtype=bool)
 
-        # Get the last two SMQs
-        last_smq = smqs.iloc[0] if len(smqs.index) > 0 else None
-        prev_smq = smqs.iloc[1] if len(smqs.index) > 1 else None
+        is_measured = custom_trackers['name'].isin(['measure_avoidance', 'measure_safety_behaviour'])
+        is_negative_measure = custom_trackers['value'].where(is_measured).map(
+            lambda item: bool(to_dict(item)['boolean']), na_action='ignore'
+        )
 
-        # Append criterion `h`
-        h__scores_diff, h__low_score = smqs_to_criterion(last_smq, prev_smq)
-        data[Criteria.CODE_CRITERION_H].append(h__scores_diff)
-        data[Criteria.CODE_CRITERION_H__LOW_SCORE].append(h__low_score)
+        return ((custom_trackers['name'] == 'measure_worry') | (is_measured & is_negative_measure.fillna(False).astype(bool))).to_numpy(dtype=bool)
 
-    def _add_completion_of_diary_entries(self, client: pd.Series, data: Dict, snapshot_timestamp: datetime) -> None:
+    def _days_criterion(self, days: np.ndarray) -> np.ndarray:
         """
-        Add the completion status of the `client`'s diary entries to the criteria data.
+        Returns those numbers of `days` as the criterion values, i.e. as integers unless some of them are missing.
         """
-        client_id = client['client_id']
-
-        logger.info(f"Add the completion status of the {client_id} diary entries to the criteria data...")
-
-        # Filters thought records and theirs notification in the last seven days (1-7)
-        from_datetime = datetime.combine(snapshot_timestamp - timedelta(days=7), datetime.max.time())
-        to_datetime = datetime.combine(snapshot_timestamp, datetime.max.time())
-
-        # Filters thought records data.
-        diary_entries = self.diary_entries[
-            (self.diary_entries['client_id'] == client_id) &
-            (self.diary_entries['start_time'] > from_datetime) &
-            (self.diary_entries['start_time'] <= to_datetime)
-        ]
-
-        # Filters notifications data.
-        notifications = self.notifications[
-            (self.notifications['client_id'] == client_id) &
-            (self.notifications['type'] == 'diary_entry_log') &
-            (self.diary_entries['start_time'] > from_datetime) &
-            (self.diary_entries['start_time'] <= to_datetime)
-        ]
-
-        # Append criterion `i`
-        reminder_priority, completion_priority = diary_entries_to_criterion(
-            diary_entries, notifications)
-        data[Criteria.CODE_CRITERION_I__IS_REMINDER_ACTIVATED].append(reminder_priority)
-        data[Criteria.CODE_CRITERION_I__IS_COMPLETED].append(completion_priority)
+        return days if np.isnan(days).any() else days.astype(np.int64)
 
     def _valid_treatments(self, group: any) -> any:
         """
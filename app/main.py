@@ -6,6 +6,13 @@ from app.settings import app_settings as settings
 class Main:
 
     def __init__(self) -> None:
+        # Streams all collections from Metabase straight into the criteria loader
+        # when necessary.
+        if settings.USE_REMOTE_DATA and settings.METABASE_STREAMING:
+            snapshots = MetabaseCollection().fetch(persist=settings.METABASE_PERSIST_SNAPSHOTS)
+            Criteria(snapshots).load()
+            return
+
         # Extracts all collections from Metabase
         # when necessary.
         if settings.USE_REMOTE_DATA:
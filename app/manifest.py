@@ -0,0 +1,114 @@
+import csv
+import hashlib
+import json
+import os
+
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, Union
+
+from app.settings import FileLocator
+
+
+class SnapshotManifest:
+    """
+    A class that records the download time, the number of rows, the size
+    and the content hash of every snapshot of the snapshots directory.
+    """
+
+    HASH_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, file_locator: FileLocator) -> None:
+        self._file_locator = file_locator
+        self._lock = Lock()
+
+        directory, filename = file_locator.manifest
+        self._path = f'{directory}/{filename}'
+
+        self.entries = self._read()
+
+    def describe(self, path: str, downloaded_at: Union[datetime, None] = None) -> Dict:
+        """
+        Returns the manifest entry of the snapshot located at that `path`.
+        """
+        with open(path, 'r', newline='') as file:
+            # Excludes the header
+            rows = max(0, sum(1 for _ in csv.reader(file)) - 1)
+
+        return {
+            'downloaded_at': (downloaded_at or datetime.now()).isoformat(timespec='seconds'),
+            'rows': rows,
+            'bytes': os.path.getsize(path),
+            # The snapshot keeps its modification time when it's moved into the snapshots directory.
+            'mtime_ns': os.stat(path).st_mtime_ns,
+            'sha256': self._hash(path)
+        }
+
+    def record(self, filename: str, entry: Dict) -> None:
+        """
+        Records that `entry` for the snapshot of that `filename`.
+        The time when the content of the snapshot last changed is kept as `changed_at`.
+        """
+        with self._lock:
+            previous_entry = self.entries.get(filename, {})
+
+            if previous_entry.get('sha256') == entry['sha256']:
+                entry['changed_at'] = previous_entry.get('changed_at', previous_entry['downloaded_at'])
+            else:
+                entry['changed_at'] = entry['downloaded_at']
+
+            self.entries[filename] = entry
+
+    def is_fresh(self, filename: str, ttl: timedelta, now: Union[datetime, None] = None) -> bool:
+        """
+        Checks whether the snapshot of that `filename` was downloaded within that `ttl`,
+        and it has been left untouched since, i.e. it has the same modification time and size,
+        or the same content hash when only the modification time changed.
+        """
+        entry = self.entries.get(filename)
+        if entry is None or ttl <= timedelta(0):
+            return False
+
+        if datetime.fromisoformat(entry['downloaded_at']) + ttl <= (now or datetime.now()):
+            return False
+
+        directory = self._file_locator.root_dir
+        path = f'{directory}/{filename}'
+
+        if not os.path.exists(path) or os.path.getsize(path) != entry['bytes']:
+            return False
+
+        return os.stat(path).st_mtime_ns == entry.get('mtime_ns') or self._hash(path) == entry['sha256']
+
+    def save(self) -> None:
+        """
+        Writes the manifest into the snapshots directory.
+        """
+        temp_path = f'{self._path}.tmp'
+
+        with self._lock:
+            with open(temp_path, 'w') as file:
+                json.dump(self.entries, file, indent=2, sort_keys=True)
+
+            os.replace(temp_path, self._path)
+
+    def _hash(self, path: str) -> str:
+        """
+        Returns the SHA-256 content hash of the file located at that `path`.
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(self.HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def _read(self) -> Dict[str, Dict]:
+        """
+        Reads the manifest from the snapshots directory.
+        """
+        if not os.path.exists(self._path):
+            return {}
+
+        with open(self._path, 'r') as file:
+            return json.load(file)
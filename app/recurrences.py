@@ -0,0 +1,288 @@
+import logging
+import numpy as np
+import pandas as pd
+
+from datetime import datetime
+from dateutil.rrule import rrulestr
+from typing import Dict, List, Union
+
+
+logger = logging.getLogger(__name__)
+
+
+class RecurrenceExpander:
+    """
+    A class that expands the recurring expressions (RFC 5545 `rrule` strings) of many events at once,
+    into their instances between the given start and end times, like
+    `rrulestr(rrule, dtstart=start_time).between(start_time, end_time, inc=True)` does for one event.
+
+    The common shapes of the recurring expressions are expanded as NumPy `datetime64` ranges:
+    daily and weekly (on plain weekdays) rules, with an optional interval, count, until date,
+    and excluded dates. The other ones are expanded by `dateutil`.
+    """
+
+    WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+    DATETIME_FORMATS = ['%Y%m%dT%H%M%S', '%Y%m%d']
+
+    def expand(
+        self,
+        rrules: pd.Series,
+        start_times: pd.Series,
+        end_times: pd.Series,
+        after_times: Union[pd.Series, None] = None
+    ) -> pd.DataFrame:
+        """
+        Returns the instances of those `rrules` between their `start_times` and `end_times` (both included),
+        as the `event` position of their rule and their `timestamp`, sorted by event and timestamp.
+
+        The instances before the `after_times` are left out when they are given,
+        while the rules still start at their start times.
+        """
+        rrules = list(rrules)
+        start_times = pd.to_datetime(pd.Series(list(start_times), dtype=object)).to_numpy(dtype='datetime64[ns]')
+        end_times = pd.to_datetime(pd.Series(list(end_times), dtype=object)).to_numpy(dtype='datetime64[ns]')
+
+        after_times = start_times if after_times is None else np.maximum(
+            start_times, pd.to_datetime(pd.Series(list(after_times), dtype=object)).to_numpy(dtype='datetime64[ns]')
+        )
+
+        rules = [self.parse(rrule, start_time) for rrule, start_time in zip(rrules, start_times)]
+        is_simple = np.array([rule is not None for rule in rules], dtype=bool)
+
+        logger.info(f"Expanding the recurring expressions of {len(rules)} events ({(~is_simple).sum()} with dateutil)...")
+
+        simple_positions = np.flatnonzero(is_simple)
+        instances = [
+            self._expand_simple(
+                [rules[position] for position in simple_positions], simple_positions, after_times, end_times
+            ),
+            self._expand_with_dateutil(rrules, np.flatnonzero(~is_simple), start_times, after_times, end_times),
+        ]
+
+        return pd.concat(instances, ignore_index=True)\
+            .sort_values(['event', 'timestamp'], kind='stable')\
+            .reset_index(drop=True)
+
+    def parse(self, rrule: str, start_time: Union[datetime, np.datetime64]) -> Union[Dict, None]:
+        """
+        Parses that `rrule` string into a rule of a common shape.
+
+        Returns None when the rule can't be expanded as `datetime64` ranges.
+        """
+        if not isinstance(rrule, str) or not rrule.strip():
+            return None
+
+        # The rule starts from the given start time, unless it has its own `DTSTART`.
+        # Like `dateutil`, the microseconds of the start are ignored.
+        dtstart = np.datetime64(pd.Timestamp(start_time).to_datetime64(), 's')
+        rule_parts = None
+        exdates = []
+
+        for line in rrule.upper().split():
+            name, separator, value = line.partition(':')
+            if not separator:
+                return None
+
+            if name == 'DTSTART':
+                dtstart = self._parse_datetime(value)
+                if dtstart is None:
+                    return None
+
+            elif name == 'RRULE' and rule_parts is None:
+                rule_parts = dict(part.partition('=')[::2] for part in value.split(';'))
+
+            elif name == 'EXDATE':
+                for exdate in value.split(','):
+                    exdate = self._parse_datetime(exdate)
+                    if exdate is None:
+                        return None
+
+                    exdates.append(exdate)
+
+            else:
+                return None
+
+        if rule_parts is None:
+            return None
+
+        return self._parse_rule(rule_parts, dtstart, exdates)
+
+    def _parse_rule(self, parts: Dict[str, str], dtstart: np.datetime64, exdates: List[np.datetime64]) -> Union[Dict, None]:
+        """
+        Parses the `parts` of a `RRULE` line into a rule of a common shape.
+        """
+        supported_parts = {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'BYDAY', 'WKST'}
+        if not set(parts).issubset(supported_parts) or parts.get('WKST', 'MO') != 'MO':
+            return None
+
+        frequency = parts.get('FREQ')
+        if frequency not in ['DAILY', 'WEEKLY'] or (frequency == 'DAILY' and 'BYDAY' in parts):
+            return None
+
+        if not parts.get('INTERVAL', '1').isdigit() or not parts.get('COUNT', '1').isdigit():
+            return None
+
+        interval = int(parts.get('INTERVAL', '1'))
+        if interval < 1 or int(parts.get('COUNT', '1')) < 1:
+            return None
+
+        until = None
+        if 'UNTIL' in parts:
+            until = self._parse_datetime(parts['UNTIL'])
+            if until is None:
+                return None
+
+        weekdays = [(dtstart.astype('datetime64[D]').astype(np.int64) + 3) % 7]
+        if 'BYDAY' in parts:
+            if any(weekday not in self.WEEKDAYS for weekday in parts['BYDAY'].split(',')):
+                return None
+
+            weekdays = sorted({self.WEEKDAYS.index(weekday) for weekday in parts['BYDAY'].split(',')})
+
+        return {
+            'frequency': frequency,
+            'interval': interval,
+            'count': int(parts['COUNT']) if 'COUNT' in parts else None,
+            'until': until,
+            'weekdays': weekdays,
+            'dtstart': dtstart,
+            'exdates': exdates,
+        }
+
+    def _parse_datetime(self, value: str) -> Union[np.datetime64, None]:
+        """
+        Parses a floating date-time of a recurring expression, e.g. `20230901T103000`.
+
+        Returns None for the other formats, e.g. the UTC date-times.
+        """
+        for format in self.DATETIME_FORMATS:
+            try:
+                return np.datetime64(datetime.strptime(value, format), 's')
+            except ValueError:
+                continue
+
+        return None
+
+    def _expand_simple(
+        self,
+        rules: List[Dict],
+        positions: np.ndarray,
+        after_times: np.ndarray,
+        end_times: np.ndarray
+    ) -> pd.DataFrame:
+        """
+        Expands the simple `rules` of the events at those `positions` as `datetime64` ranges,
+        between their `after_times` and `end_times`.
+
+        Every rule is split into series of instances with a constant step:
+        a daily rule is one series, and a weekly rule is one series per weekday.
+        """
+        one_day = np.timedelta64(1, 'D')
+
+        series_events, series_firsts, series_steps = [], [], []
+        for position, rule in zip(positions, rules):
+            if rule['frequency'] == 'DAILY':
+                series_events.append(position)
+                series_firsts.append(rule['dtstart'])
+                series_steps.append(rule['interval'])
+                continue
+
+            # The weeks start on Monday, and the first week only has the days from the start.
+            start_day = rule['dtstart'].astype('datetime64[D]')
+            week_start = rule['dtstart'] - ((start_day.astype(np.int64) + 3) % 7) * one_day
+
+            for weekday in rule['weekdays']:
+                first = week_start + weekday * one_day
+                if first < rule['dtstart']:
+                    first = first + 7 * rule['interval'] * one_day
+
+                series_events.append(position)
+                series_firsts.append(first)
+                series_steps.append(7 * rule['interval'])
+
+        if not series_events:
+            return pd.DataFrame({'event': np.array([], dtype=np.int64), 'timestamp': np.array([], dtype='datetime64[ns]')})
+
+        series_events = np.array(series_events, dtype=np.int64)
+        firsts = np.array(series_firsts, dtype='datetime64[ns]')
+        steps = np.array(series_steps, dtype=np.int64) * one_day.astype('timedelta64[ns]')
+
+        rules_by_position = dict(zip(positions, rules))
+        counts = np.array([rules_by_position[event]['count'] or 0 for event in series_events], dtype=np.int64)
+        untils = np.array(
+            [rules_by_position[event]['until'] for event in series_events], dtype='datetime64[ns]'
+        )
+
+        # Every series stops at the end time, or at its until date when it's sooner.
+        lasts = end_times[series_events]
+        has_until = ~np.isnat(untils)
+        lasts[has_until] = np.minimum(lasts[has_until], untils[has_until])
+
+        # The series with a count start from their first instance, because the count includes
+        # the instances before the after time. The other ones start at the after time.
+        has_count = counts > 0
+        first_steps = np.zeros(len(series_events), dtype=np.int64)
+        first_steps[~has_count] = np.maximum(
+            0, -((firsts[~has_count] - after_times[series_events][~has_count]) // steps[~has_count])
+        )
+
+        last_steps = np.where(lasts >= firsts, (lasts - firsts) // steps, -1)
+        last_steps[has_count] = np.minimum(last_steps[has_count], counts[has_count] - 1)
+
+        lengths = np.maximum(0, last_steps - first_steps + 1)
+        series = np.repeat(np.arange(len(series_events)), lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+        instances = pd.DataFrame({
+            'event': series_events[series],
+            'timestamp': firsts[series] + (first_steps[series] + offsets) * steps[series],
+        }).sort_values(['event', 'timestamp'], kind='stable')
+
+        # The count applies to the instances of every series of the rule together.
+        instance_counts = counts[series][instances.index.to_numpy()]
+        ranks = instances.groupby('event').cumcount().to_numpy()
+        instances = instances[(instance_counts == 0) | (ranks < instance_counts)]
+
+        # Drops the excluded dates.
+        exdates = pd.DataFrame(
+            [(position, exdate) for position, rule in zip(positions, rules) for exdate in rule['exdates']],
+            columns=['event', 'timestamp']
+        ).astype({'event': np.int64, 'timestamp': 'datetime64[ns]'}).drop_duplicates()
+
+        if not exdates.empty:
+            is_excluded = instances.merge(exdates, how='left', on=['event', 'timestamp'], indicator=True)['_merge'] == 'both'
+            instances = instances[~is_excluded.to_numpy()]
+
+        timestamps = instances['timestamp'].to_numpy()
+        events = instances['event'].to_numpy()
+        is_between = (timestamps >= after_times[events]) & (timestamps <= end_times[events])
+
+        return instances[is_between].reset_index(drop=True)
+
+    def _expand_with_dateutil(
+        self,
+        rrules: List[str],
+        positions: np.ndarray,
+        start_times: np.ndarray,
+        after_times: np.ndarray,
+        end_times: np.ndarray
+    ) -> pd.DataFrame:
+        """
+        Expands the `rrules` of the events at those `positions` with `dateutil`.
+        """
+        events, timestamps = [], []
+
+        for position in positions:
+            start_time = pd.Timestamp(start_times[position]).to_pydatetime()
+            after_time = pd.Timestamp(after_times[position]).to_pydatetime()
+            end_time = pd.Timestamp(end_times[position]).to_pydatetime()
+
+            for timestamp in rrulestr(rrules[position], dtstart=start_time).between(after_time, end_time, inc=True):
+                events.append(position)
+                timestamps.append(timestamp)
+
+        return pd.DataFrame({
+            'event': np.array(events, dtype=np.int64),
+            'timestamp': np.array(timestamps, dtype='datetime64[ns]'),
+        })
@@ -54,6 +54,13 @@ class FileLocator:
         """
         return (f'{self.root_dir}', 'notifications.csv')
 
+    @property
+    def daily_notifications(self) -> Tuple:
+        """
+        Returns tuple of directory and filename of the daily counts of the notification data.
+        """
+        return (f'{self.root_dir}', 'daily_notifications.csv')
+
     @property
     def events(self) -> Tuple:
         """
@@ -75,6 +82,13 @@ class FileLocator:
         """
         return (f'{self.root_dir}', 'planned_event_completions.csv')
 
+    @property
+    def event_completions_fingerprints(self) -> Tuple:
+        """
+        Returns tuple of directory and filename of the fingerprints of the events of the event's completions data.
+        """
+        return (f'{self.root_dir}', 'planned_event_completions.json')
+
     @property
     def therapy_sessions(self) -> Tuple:
         """
@@ -96,6 +110,13 @@ class FileLocator:
         """
         return (f'{self.root_dir}', 'smqs.csv')
 
+    @property
+    def manifest(self) -> Tuple:
+        """
+        Returns tuple of directory and filename of the snapshots manifest.
+        """
+        return (f'{self.root_dir}', 'manifest.json')
+
     @property
     def criteria(self) -> Tuple:
         """
@@ -114,6 +135,63 @@ class CommonSetting:
     METABASE_SERVICE_ACCOUNT = os.environ.get('METABASE_SERVICE_ACCOUNT', '')
     METABASE_SERVICE_ACCOUNT_PASSWORD = os.environ.get('METABASE_SERVICE_ACCOUNT_PASSWORD', '')
 
+    # Number of Metabase cards that are downloaded concurrently.
+    # Set it to `1` to download the cards one after another.
+    METABASE_DOWNLOAD_WORKERS = int(os.environ.get('METABASE_DOWNLOAD_WORKERS', '4'))
+
+    # Number of times a failed Metabase download is retried.
+    METABASE_DOWNLOAD_RETRIES = int(os.environ.get('METABASE_DOWNLOAD_RETRIES', '3'))
+
+    # Whether the cards that only grow are downloaded from their last `start_time` watermark
+    # and appended to the local snapshots, instead of being downloaded as a whole.
+    METABASE_INCREMENTAL_DOWNLOAD = os.environ.get('METABASE_INCREMENTAL_DOWNLOAD', 'false').lower() == 'true'
+
+    # Number of date-range shards that the largest cards are exported in concurrently.
+    # Set it to `1` to export them at once.
+    METABASE_EXPORT_SHARDS = int(os.environ.get('METABASE_EXPORT_SHARDS', '1'))
+
+    # Whether only the snapshots that outlived their card's TTL are refreshed.
+    METABASE_REFRESH_STALE_ONLY = os.environ.get('METABASE_REFRESH_STALE_ONLY', 'false').lower() == 'true'
+
+    # Whether the cards are parsed into dataframes while they are downloaded,
+    # instead of being read back from the local snapshots.
+    # The streamed cards are stored as local snapshots as well, unless it is disabled.
+    METABASE_STREAMING = os.environ.get('METABASE_STREAMING', 'false').lower() == 'true'
+    METABASE_PERSIST_SNAPSHOTS = os.environ.get('METABASE_PERSIST_SNAPSHOTS', 'true').lower() == 'true'
+
+    # Whether the cards are exported through ad-hoc queries that only select the used columns
+    # of the rows of the treated clients, instead of exporting the whole cards.
+    METABASE_PROJECTED_QUERIES = os.environ.get('METABASE_PROJECTED_QUERIES', 'false').lower() == 'true'
+
+    # Whether the notifications are extracted as the number of notifications per client, type, and day,
+    # instead of the raw notifications.
+    METABASE_AGGREGATED_NOTIFICATIONS = os.environ.get('METABASE_AGGREGATED_NOTIFICATIONS', 'false').lower() == 'true'
+
+    # Whether the parsed snapshots are cached in a columnar format,
+    # so that the unchanged snapshots aren't parsed again on the next runs.
+    SNAPSHOT_CACHE = os.environ.get('SNAPSHOT_CACHE', 'true').lower() == 'true'
+
+    # Number of processes that generate the planned event completions, partitioned by client.
+    # Set it to `1` to generate them in the main process.
+    PLANNED_EVENT_COMPLETION_WORKERS = int(os.environ.get('PLANNED_EVENT_COMPLETION_WORKERS', '1'))
+
+    # Whether the stored planned event completions are patched with the completions of the new and changed events only,
+    # instead of being generated again as a whole.
+    PLANNED_EVENT_COMPLETION_INCREMENTAL = os.environ.get('PLANNED_EVENT_COMPLETION_INCREMENTAL', 'false').lower() == 'true'
+
+    # Whether the planned event completions are only generated within the windows of the treatment snapshots,
+    # when the criteria are created, instead of being generated as a whole and stored beforehand.
+    LAZY_PLANNED_EVENT_COMPLETIONS = os.environ.get('LAZY_PLANNED_EVENT_COMPLETIONS', 'false').lower() == 'true'
+
+    # Whether the client and planned event IDs are encoded into integer codes while the criteria are created.
+    ENCODE_IDS = os.environ.get('ENCODE_IDS', 'true').lower() == 'true'
+
+    # Whether the windows of days of the criteria are filtered on integer day ordinals instead of date-times.
+    DAY_ORDINALS = os.environ.get('DAY_ORDINALS', 'false').lower() == 'true'
+
+    # Whether the rows that can't change the criteria are dropped from the snapshots before the criteria are created.
+    PRUNE_SNAPSHOTS = os.environ.get('PRUNE_SNAPSHOTS', 'true').lower() == 'true'
+
     # App variables
     SECRET_KEY = os.environ.get('SECRET_KEY', '')
     RUN_FOR_SPECIFIC_DATE = os.environ.get('RUN_FOR_SPECIFIC_DATE', '')
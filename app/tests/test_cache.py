@@ -0,0 +1,103 @@
+import os
+import pandas as pd
+import tempfile
+
+from unittest import (
+    mock,
+    TestCase,
+)
+
+from app.cache import SnapshotCache
+from app.helpers import to_dict
+
+
+def parse_trackers(source: str) -> pd.DataFrame:
+    """
+    Parses the dummy custom trackers from that `source`.
+    """
+    df = pd.read_csv(source, dtype={'client_id': str, 'value': str}, parse_dates=['start_time'])
+    df['value'] = df['value'].apply(lambda item: to_dict(item))
+
+    return df
+
+
+class TestSnapshotCache(TestCase):
+    """
+    Test the `SnapshotCache`.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = f'{self.temp_dir.name}/custom_trackers.csv'
+
+        with open(self.path, 'w') as file:
+            file.write(
+                'client_id,start_time,value\n'
+                'CID-1,2023-09-01 08:00:00,"{\'boolean\': True}"\n'
+                'CID-2,2023-09-02 09:00:00,\n'
+            )
+
+        self.parse = mock.Mock(side_effect=parse_trackers)
+
+        self.cache = SnapshotCache()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_read_from_cache(self):
+        """
+        Test to ensure the snapshot is only parsed once, and the cached snapshot equals the parsed one.
+        """
+        expected = self.cache.read(self.path, self.parse, json_columns=['value'])
+        actual = self.cache.read(self.path, self.parse, json_columns=['value'])
+
+        self.assertEqual(self.parse.call_count, 1)
+        pd.testing.assert_frame_equal(actual, expected)
+        self.assertEqual(actual['value'][0], {'boolean': 'true'})
+        self.assertTrue(pd.isna(actual['value'][1]))
+
+    def test_read_touched_snapshot(self):
+        """
+        Test to ensure the cache is still used when the snapshot was touched without being changed.
+        """
+        self.cache.read(self.path, self.parse, json_columns=['value'])
+
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+        self.cache.read(self.path, self.parse, json_columns=['value'])
+        self.assertEqual(self.parse.call_count, 1)
+
+    def test_read_changed_snapshot(self):
+        """
+        Test to ensure the snapshot is parsed again once it changed.
+        """
+        self.cache.read(self.path, self.parse, json_columns=['value'])
+
+        with open(self.path, 'a') as file:
+            file.write('CID-3,2023-09-03 10:00:00,\n')
+
+        actual = self.cache.read(self.path, self.parse, json_columns=['value'])
+
+        self.assertEqual(self.parse.call_count, 2)
+        self.assertEqual(len(actual), 3)
+
+    def test_read_with_disabled_cache(self):
+        """
+        Test to ensure nothing is cached when the cache is disabled.
+        """
+        SnapshotCache(enabled=False).read(self.path, self.parse)
+
+        self.assertFalse(os.path.exists(f'{self.temp_dir.name}/.cache'))
+
+    def test_read_with_new_parser_version(self):
+        """
+        Test to ensure a snapshot is parsed again when the version of its parser is bumped.
+        """
+        self.cache.read(self.path, self.parse, 1, json_columns=['value'])
+        self.cache.read(self.path, self.parse, 1, json_columns=['value'])
+        self.assertEqual(self.parse.call_count, 1)
+
+        self.cache.read(self.path, self.parse, 2, json_columns=['value'])
+        self.cache.read(self.path, self.parse, 2, json_columns=['value'])
+        self.assertEqual(self.parse.call_count, 2)
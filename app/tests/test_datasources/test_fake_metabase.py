@@ -0,0 +1,85 @@
+import io
+import os
+import pandas as pd
+import tempfile
+
+from cryptography.fernet import Fernet
+from unittest import (
+    mock,
+    TestCase,
+)
+
+from app.benchmarks.fake_metabase import FakeMetabase
+from app.datasources import metabase
+
+
+class TestFakeMetabase(TestCase):
+    """
+    Test the Metabase downloads against the `FakeMetabase`.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.current_dir = os.getcwd()
+
+        # The session file is located relatively to the working directory.
+        os.chdir(self.temp_dir.name)
+
+        self.fake = FakeMetabase(rows=2000, failure_rate=0.3, truncate_rate=0.3, seed=1).start()
+
+        secret_key = Fernet.generate_key()
+        self.mock_settings = mock.patch.multiple(
+            metabase.settings,
+            METABASE_URL=self.fake.url,
+            SECRET_KEY=secret_key,
+            METABASE_SERVICE_ACCOUNT=Fernet(secret_key).encrypt(b'service-account@example.com'),
+            METABASE_SERVICE_ACCOUNT_PASSWORD=Fernet(secret_key).encrypt(b'password'),
+            METABASE_DOWNLOAD_RETRIES=10,
+        )
+        self.mock_settings.start()
+
+        self.mock_backoff = mock.patch.object(metabase.BaseAPI, 'RETRY_BACKOFF', 0)
+        self.mock_backoff.start()
+
+        self.mock_shared_client = mock.patch.object(
+            metabase.MetabaseClient, 'shared', return_value=metabase.MetabaseClient(pool_size=1)
+        )
+        self.mock_shared_client.start()
+
+    def tearDown(self):
+        self.mock_shared_client.stop()
+        self.mock_backoff.stop()
+        self.mock_settings.stop()
+
+        self.fake.stop()
+
+        os.chdir(self.current_dir)
+        self.temp_dir.cleanup()
+
+    def test_download_with_injected_failures(self):
+        """
+        Test to ensure the card is downloaded intact despite the injected failures and truncations.
+        """
+        api = metabase.NotificationAPI(metabase.FileLocator(self.temp_dir.name))
+        api.download()
+
+        with open(f'{self.temp_dir.name}/notifications.csv', 'rb') as file:
+            self.assertEqual(file.read(), self.fake.card(2250))
+
+        self.assertGreater(self.fake.stats['failures'] + self.fake.stats['truncations'], 0)
+
+    def test_stream_with_injected_failures(self):
+        """
+        Test to ensure the card is streamed intact despite the injected failures and truncations,
+        i.e. no truncated stream is read as a shorter card.
+        """
+        api = metabase.SMQAPI(metabase.FileLocator(self.temp_dir.name))
+        expected = pd.read_csv(io.BytesIO(self.fake.card(2251)), dtype=str)
+
+        for _ in range(5):
+            actual = api.stream(lambda stream: pd.read_csv(stream, dtype=str))
+
+            self.assertEqual(len(actual.index), 2000)
+            pd.testing.assert_frame_equal(actual, expected)
+
+        self.assertGreater(self.fake.stats['truncations'], 0)
@@ -0,0 +1,818 @@
+import io
+import json
+import os
+import pandas as pd
+import tempfile
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Union
+from requests import ConnectionError, HTTPError
+from requests.exceptions import ChunkedEncodingError
+from unittest import (
+    mock,
+    TestCase,
+)
+
+from app.datasources import metabase
+
+
+class TestMetabaseAPI(TestCase):
+    """
+    Test the session handling of the `MetabaseAPI`.
+    """
+
+    def setUp(self):
+        self.working_dir = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+
+        # Every test starts with a new process-wide client
+        self.client = metabase.MetabaseClient(pool_size=1)
+        self.client.http = mock.Mock()
+
+        self.mock_shared_client = mock.patch.object(metabase.MetabaseClient, 'shared', return_value=self.client)
+        self.mock_shared_client.start()
+
+    def tearDown(self):
+        self.mock_shared_client.stop()
+
+        os.chdir(self.working_dir)
+        self.temp_dir.cleanup()
+
+    def _write_session_file(self, content: str) -> None:
+        with open('.metabase.session.tmp', 'w') as file:
+            file.write(content)
+
+    def test_fresh_session(self):
+        """
+        Test to ensure a fresh session is used without validating it against Metabase.
+        """
+        self._write_session_file(json.dumps({
+            'id': 'SID-1',
+            'created_at': (datetime.now() - timedelta(days=2)).isoformat()
+        }))
+
+        apis = [metabase.ClientInfoAPI(), metabase.NotificationAPI(), metabase.SMQAPI()]
+
+        self.assertListEqual([api._session_id for api in apis], ['SID-1', 'SID-1', 'SID-1'])
+        self.client.http.request.assert_not_called()
+
+    def test_expiring_session(self):
+        """
+        Test to ensure a session that is about to expire is validated once
+        and shared by every Metabase API.
+        """
+        self._write_session_file(json.dumps({
+            'id': 'SID-1',
+            'created_at': (datetime.now() - timedelta(days=13, hours=12)).isoformat()
+        }))
+
+        apis = [metabase.ClientInfoAPI(), metabase.NotificationAPI(), metabase.SMQAPI()]
+
+        self.assertListEqual([api._session_id for api in apis], ['SID-1', 'SID-1', 'SID-1'])
+        self.assertEqual(self.client.http.request.call_count, 1)
+
+        method, url = self.client.http.request.call_args.args
+        self.assertEqual(method, 'GET')
+        self.assertTrue(url.endswith('/api/user/current'))
+
+    def test_session_without_creation_time(self):
+        """
+        Test to ensure a session file that only holds the session ID is validated.
+        """
+        self._write_session_file('SID-1')
+
+        api = metabase.ClientInfoAPI()
+
+        self.assertEqual(api._session_id, 'SID-1')
+        self.assertEqual(self.client.http.request.call_count, 1)
+
+    def _mock_response(self, status_code: int, content: Dict = {}) -> mock.Mock:
+        response = mock.Mock(status_code=status_code)
+        response.json.return_value = content
+        response.raise_for_status.side_effect = HTTPError(response=response) if status_code >= 400 else None
+
+        return response
+
+    def test_rejected_session(self):
+        """
+        Test to ensure a fresh session that is rejected by Metabase is renewed once,
+        and that the renewed session replaces the session file.
+        """
+        self._write_session_file(json.dumps({'id': 'SID-1', 'created_at': datetime.now().isoformat()}))
+
+        api = metabase.ClientInfoAPI()
+        self.client.http.request.side_effect = [
+            self._mock_response(401),
+            self._mock_response(200, {'id': 'SID-2'}),
+            self._mock_response(200),
+        ]
+
+        with mock.patch.object(metabase.MetabaseAPI, '_decrypt', return_value='secret'):
+            api._api_request('GET', '/card/2254', api._session_id)
+
+        self.assertEqual(api._session_id, 'SID-2')
+        self.assertEqual(self.client.session_id, 'SID-2')
+        self.assertEqual(self.client.http.request.call_args.kwargs['headers']['X-Metabase-Session'], 'SID-2')
+
+        with open('.metabase.session.tmp', 'r') as file:
+            self.assertEqual(json.load(file)['id'], 'SID-2')
+
+    def test_rejected_session_of_download(self):
+        """
+        Test to ensure a download that is rejected because of its session is restarted once with a renewed session,
+        and a download that is rejected again is not retried.
+        """
+        self._write_session_file(json.dumps({'id': 'SID-1', 'created_at': datetime.now().isoformat()}))
+
+        api = metabase.ClientInfoAPI()
+        self.client.http.request.return_value = self._mock_response(200, {'id': 'SID-2'})
+        self.client.http.post.side_effect = [
+            MockDownloadResponse([], status_code=401),
+            MockDownloadResponse([b'client_id\n', b'CID-1\n']),
+            MockDownloadResponse([], status_code=401),
+            MockDownloadResponse([], status_code=401),
+        ]
+
+        with mock.patch.object(metabase.MetabaseAPI, '_decrypt', return_value='secret'):
+            api._download_file('/card/2254/query/csv', 'clients.csv', 'csv', api._session_id)
+
+            with open('clients.csv', 'rb') as file:
+                self.assertEqual(file.read(), b'client_id\nCID-1\n')
+
+            self.assertEqual(self.client.http.post.call_args.kwargs['headers']['X-Metabase-Session'], 'SID-2')
+
+            with self.assertRaises(HTTPError):
+                api._download_file('/card/2254/query/csv', 'clients.csv', 'csv', api._session_id)
+
+        # Every rejected session is renewed once: SID-1 by the first download, and SID-2 by the second one.
+        self.assertEqual(self.client.http.request.call_count, 2)
+        self.assertEqual(self.client.http.post.call_count, 4)
+
+
+class TestIncrementalDownload(TestCase):
+    """
+    Test the incremental download of the `MetabaseAPI`.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = self.temp_dir.name
+
+        self.client = metabase.MetabaseClient(pool_size=1)
+        self.client.session_id = 'SID-1'
+
+        self.mock_shared_client = mock.patch.object(metabase.MetabaseClient, 'shared', return_value=self.client)
+        self.mock_shared_client.start()
+
+        self.mock_file_locator = mock.patch.object(metabase, 'FILE_LOCATOR', metabase.FileLocator(self.root_dir))
+        self.mock_file_locator.start()
+
+        self.mock_settings = mock.patch.object(metabase.settings, 'METABASE_INCREMENTAL_DOWNLOAD', True)
+        self.mock_settings.start()
+
+        # The saved card is assumed to declare the `start_time` parameter.
+        self.api = metabase.NotificationAPI(metabase.FileLocator(self.root_dir))
+        self.api.start_time_tag = True
+        self.api._download_file = mock.Mock()
+
+    def tearDown(self):
+        self.mock_settings.stop()
+        self.mock_file_locator.stop()
+        self.mock_shared_client.stop()
+
+        self.temp_dir.cleanup()
+
+    def _mock_download(self, content: str) -> None:
+        def download_file(path, save_to, format, session_id, payload=None):
+            with open(save_to, 'w') as file:
+                file.write(content)
+
+        self.api._download_file.side_effect = download_file
+
+    def _read(self, filename: str) -> str:
+        with open(f'{self.root_dir}/{filename}', 'r') as file:
+            return file.read()
+
+    def test_download_without_watermark(self):
+        """
+        Test to ensure the whole card is downloaded when there is no watermark.
+        """
+        self._mock_download(
+            'client_id,type,start_time\n'
+            'CID-1,gscheme_log,2023-09-01\n'
+            'CID-1,gscheme_log,2023-09-03\n'
+        )
+
+        self.api.download()
+
+        self.assertIsNone(self.api._download_file.call_args.kwargs.get('payload'))
+        self.assertEqual(self._read('notifications.watermark'), '2023-09-03')
+
+    def test_download_with_watermark(self):
+        """
+        Test to ensure only the rows since the watermark's day are downloaded
+        and appended to the local snapshot.
+        """
+        with open(f'{self.root_dir}/notifications.csv', 'w') as file:
+            file.write(
+                'client_id,type,start_time\n'
+                'CID-1,gscheme_log,2023-09-01\n'
+                'CID-1,gscheme_log,2023-09-03\n'
+            )
+
+        with open(f'{self.root_dir}/notifications.watermark', 'w') as file:
+            file.write('2023-09-03')
+
+        self._mock_download(
+            'client_id,type,start_time\n'
+            'CID-1,gscheme_log,2023-09-03\n'
+            'CID-2,diary_entry_log,2023-09-03\n'
+            'CID-1,gscheme_log,2023-09-05\n'
+        )
+
+        self.api.download()
+
+        parameters = json.loads(self.api._download_file.call_args.kwargs['payload']['parameters'])
+        self.assertEqual(parameters[0]['value'], '2023-09-03')
+
+        self.assertEqual(
+            self._read('notifications.csv'),
+            'client_id,type,start_time\n'
+            'CID-1,gscheme_log,2023-09-01\n'
+            'CID-1,gscheme_log,2023-09-03\n'
+            'CID-2,diary_entry_log,2023-09-03\n'
+            'CID-1,gscheme_log,2023-09-05\n'
+        )
+        self.assertEqual(self._read('notifications.watermark'), '2023-09-05')
+        self.assertListEqual(
+            sorted(os.listdir(self.root_dir)),
+            ['notifications.csv', 'notifications.watermark']
+        )
+
+    def test_download_without_start_time_tag(self):
+        """
+        Test to ensure the whole card is downloaded when the saved card doesn't declare the `start_time` parameter.
+        """
+        self._write_snapshot()
+        self.api.start_time_tag = False
+
+        self._mock_download(
+            'client_id,type,start_time\n'
+            'CID-1,gscheme_log,2023-09-01\n'
+            'CID-1,gscheme_log,2023-09-03\n'
+            'CID-1,gscheme_log,2023-09-05\n'
+        )
+
+        self.api.download()
+
+        self.assertIsNone(self.api._download_file.call_args.kwargs.get('payload'))
+        self.assertEqual(
+            self._read('notifications.csv'),
+            'client_id,type,start_time\n'
+            'CID-1,gscheme_log,2023-09-01\n'
+            'CID-1,gscheme_log,2023-09-03\n'
+            'CID-1,gscheme_log,2023-09-05\n'
+        )
+
+    def test_download_with_unfiltered_increment(self):
+        """
+        Test to ensure the increment fails to be merged when it holds rows started before the watermark's day,
+        e.g. when the card ignored the `start_time` parameter, and that the local snapshot is left untouched.
+        """
+        self._write_snapshot()
+
+        self._mock_download(
+            'client_id,type,start_time\n'
+            'CID-1,gscheme_log,2023-09-01\n'
+            'CID-1,gscheme_log,2023-09-03\n'
+            'CID-1,gscheme_log,2023-09-05\n'
+        )
+
+        with self.assertRaises(ValueError):
+            self.api.download()
+
+        self.assertEqual(
+            self._read('notifications.csv'),
+            'client_id,type,start_time\n'
+            'CID-1,gscheme_log,2023-09-01\n'
+            'CID-1,gscheme_log,2023-09-03\n'
+        )
+        self.assertListEqual(
+            sorted(os.listdir(self.root_dir)),
+            ['notifications.csv', 'notifications.watermark']
+        )
+
+    def _write_snapshot(self) -> None:
+        with open(f'{self.root_dir}/notifications.csv', 'w') as file:
+            file.write(
+                'client_id,type,start_time\n'
+                'CID-1,gscheme_log,2023-09-01\n'
+                'CID-1,gscheme_log,2023-09-03\n'
+            )
+
+        with open(f'{self.root_dir}/notifications.watermark', 'w') as file:
+            file.write('2023-09-03')
+
+
+class MockDownloadResponse:
+    """
+    A streamed download response that might be interrupted after some chunks.
+    """
+
+    def __init__(self, chunks, status_code=200, headers={}, interrupted=False):
+        self.chunks = chunks
+        self.status_code = status_code
+        self.headers = headers
+        self.interrupted = interrupted
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise HTTPError(f'{self.status_code} Error', response=self)
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            yield chunk
+
+        if self.interrupted:
+            raise ChunkedEncodingError('Connection broken.')
+
+
+class TestDownloadFile(TestCase):
+    """
+    Test the `_download_file` method of the `BaseAPI`.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.save_to = f'{self.temp_dir.name}/smqs.csv'
+
+        self.client = metabase.MetabaseClient(pool_size=1)
+        self.client.http = mock.Mock()
+
+        self.mock_shared_client = mock.patch.object(metabase.MetabaseClient, 'shared', return_value=self.client)
+        self.mock_shared_client.start()
+
+        self.mock_sleep = mock.patch('app.datasources.metabase.time.sleep')
+        self.mock_sleep.start()
+
+        self.api = metabase.BaseAPI()
+
+    def tearDown(self):
+        self.mock_sleep.stop()
+        self.mock_shared_client.stop()
+
+        self.temp_dir.cleanup()
+
+    def test_download_file_resumed(self):
+        """
+        Test to ensure an interrupted download is resumed from the downloaded bytes.
+        """
+        headers = {'Accept-Ranges': 'bytes'}
+        self.client.http.post.side_effect = [
+            MockDownloadResponse([b'client_id\n', b'CID-1'], headers=headers, interrupted=True),
+            MockDownloadResponse([b'\nCID-2\n'], status_code=206, headers=headers),
+        ]
+
+        actual = self.api._download_file('/card/1/query/csv', self.save_to, 'csv', 'SID-1')
+
+        self.assertEqual(actual, 22)
+        self.assertEqual(self.client.http.post.call_args.kwargs['headers']['Range'], 'bytes=15-')
+
+        with open(self.save_to, 'rb') as file:
+            self.assertEqual(file.read(), b'client_id\nCID-1\nCID-2\n')
+
+    def test_download_file_restarted(self):
+        """
+        Test to ensure an interrupted download is restarted
+        when the server doesn't support range requests.
+        """
+        self.client.http.post.side_effect = [
+            MockDownloadResponse([b'client_id\n', b'CID-1'], interrupted=True),
+            MockDownloadResponse([b'client_id\n', b'CID-1\nCID-2\n']),
+        ]
+
+        self.api._download_file('/card/1/query/csv', self.save_to, 'csv', 'SID-1')
+
+        self.assertNotIn('Range', self.client.http.post.call_args.kwargs['headers'])
+
+        with open(self.save_to, 'rb') as file:
+            self.assertEqual(file.read(), b'client_id\nCID-1\nCID-2\n')
+
+    def test_download_file_failed(self):
+        """
+        Test to ensure a failed download leaves neither the file nor its partial download behind.
+        """
+        self.client.http.post.side_effect = [
+            MockDownloadResponse([b'client_id\n'], interrupted=True)
+            for _ in range(0, metabase.settings.METABASE_DOWNLOAD_RETRIES + 1)
+        ]
+
+        with self.assertRaises(ChunkedEncodingError):
+            self.api._download_file('/card/1/query/csv', self.save_to, 'csv', 'SID-1')
+
+        self.assertListEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_download_file_client_error(self):
+        """
+        Test to ensure a download that is rejected by the server is not retried.
+        """
+        self.client.http.post.side_effect = [MockDownloadResponse([], status_code=401)]
+
+        with self.assertRaises(HTTPError):
+            self.api._download_file('/card/1/query/csv', self.save_to, 'csv', 'SID-1')
+
+        self.assertEqual(self.client.http.post.call_count, 1)
+
+
+class TestStream(TestCase):
+    """
+    Test the `stream` method of the `MetabaseAPI`.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_locator = metabase.FileLocator(self.temp_dir.name)
+
+        self.client = metabase.MetabaseClient(pool_size=1)
+        self.client.http = mock.Mock()
+        self.client.session_id = 'SID-1'
+
+        self.mock_shared_client = mock.patch.object(metabase.MetabaseClient, 'shared', return_value=self.client)
+        self.mock_shared_client.start()
+
+        self.content = b'client_id,start_time\nCID-1,2023-09-01\nCID-2,2023-09-02\n'
+
+        self.client.http.post.return_value = self._response(self.content)
+
+        self.mock_sleep = mock.patch('app.datasources.metabase.time.sleep')
+        self.mock_sleep.start()
+
+    def tearDown(self):
+        self.mock_sleep.stop()
+        self.mock_shared_client.stop()
+
+        self.temp_dir.cleanup()
+
+    def _response(self, content: bytes, content_length: Union[int, None] = None) -> MockDownloadResponse:
+        response = MockDownloadResponse([], headers={'Content-Length': str(content_length or len(content))})
+        response.raw = io.BytesIO(content)
+
+        return response
+
+    def test_stream(self):
+        """
+        Test to ensure the card is parsed while it is streamed, without being stored.
+        """
+        actual = metabase.TherapySessionAPI(self.file_locator).stream(pd.read_csv)
+
+        self.assertListEqual(actual['client_id'].tolist(), ['CID-1', 'CID-2'])
+        self.assertListEqual(os.listdir(self.temp_dir.name), [])
+
+    def test_stream_persisted(self):
+        """
+        Test to ensure the streamed card is stored as it is received.
+        """
+        actual = metabase.TherapySessionAPI(self.file_locator).stream(pd.read_csv, persist=True)
+
+        self.assertListEqual(actual['client_id'].tolist(), ['CID-1', 'CID-2'])
+
+        with open(f'{self.temp_dir.name}/therapy_sessions.csv', 'rb') as file:
+            self.assertEqual(file.read(), self.content)
+
+    def test_stream_truncated(self):
+        """
+        Test to ensure a stream that is cut off before its `Content-Length` is retried from the beginning.
+        """
+        truncated_content = self.content[:len(self.content) - 10]
+        self.client.http.post.side_effect = [
+            self._response(truncated_content, content_length=len(self.content)),
+            self._response(self.content),
+        ]
+
+        actual = metabase.TherapySessionAPI(self.file_locator).stream(pd.read_csv, persist=True)
+
+        self.assertListEqual(actual['client_id'].tolist(), ['CID-1', 'CID-2'])
+        self.assertEqual(self.client.http.post.call_count, 2)
+
+        with open(f'{self.temp_dir.name}/therapy_sessions.csv', 'rb') as file:
+            self.assertEqual(file.read(), self.content)
+
+    def test_stream_always_truncated(self):
+        """
+        Test to ensure a stream that is always cut off fails without leaving a partial card behind.
+        """
+        truncated_content = self.content[:len(self.content) - 10]
+        self.client.http.post.side_effect = [
+            self._response(truncated_content, content_length=len(self.content))
+            for _ in range(0, metabase.settings.METABASE_DOWNLOAD_RETRIES + 1)
+        ]
+
+        with self.assertRaises(ConnectionError):
+            metabase.TherapySessionAPI(self.file_locator).stream(pd.read_csv, persist=True)
+
+        self.assertListEqual(os.listdir(self.temp_dir.name), [])
+
+
+class TestDatasetQuery(TestCase):
+    """
+    Test the projected export requests of the `MetabaseAPI`.
+    """
+
+    def setUp(self):
+        self.client = metabase.MetabaseClient(pool_size=1)
+        self.client.session_id = 'SID-1'
+
+        self.mock_shared_client = mock.patch.object(metabase.MetabaseClient, 'shared', return_value=self.client)
+        self.mock_shared_client.start()
+
+        self.mock_database_id = mock.patch.object(metabase.MetabaseAPI, '_database_id', return_value=3)
+        self.mock_database_id.start()
+
+        self.treatment_windows = {
+            'CID-2': (date(2023, 8, 1), date(2023, 8, 30)),
+            'CID-1': (date(2023, 9, 1), date(2023, 9, 30)),
+        }
+
+    def tearDown(self):
+        self.mock_database_id.stop()
+        self.mock_shared_client.stop()
+
+    def test_export_request_without_treatment_windows(self):
+        """
+        Test to ensure the saved card is exported when the treatment windows are unknown.
+        """
+        actual = metabase.SMQAPI()._export_request('csv')
+        self.assertEqual(actual, ('/card/2251/query/csv', None))
+
+    def test_export_request_of_clients(self):
+        """
+        Test to ensure the card is narrowed down to its columns of the treated clients.
+        """
+        path, payload = metabase.TherapySessionAPI(treatment_windows=self.treatment_windows)._export_request('csv')
+
+        client_id = ['field', 'client_id', {'base-type': 'type/Text'}]
+        start_time = ['field', 'start_time', {'base-type': 'type/Date'}]
+
+        self.assertEqual(path, '/dataset/csv')
+        self.assertDictEqual(json.loads(payload['query']), {
+            'database': 3,
+            'type': 'query',
+            'query': {
+                'source-table': 'card__2258',
+                'fields': [client_id, start_time],
+                'filter': ['=', client_id, 'CID-1', 'CID-2']
+            }
+        })
+
+    def test_export_request_of_treatments(self):
+        """
+        Test to ensure the card is narrowed down to the treatment windows of the clients,
+        and to the rows since the given date.
+        """
+        _, payload = metabase.NotificationAPI(treatment_windows=self.treatment_windows)._export_request(
+            'csv', since='2023-09-15'
+        )
+
+        client_id = ['field', 'client_id', {'base-type': 'type/Text'}]
+        start_time = ['field', 'start_time', {'base-type': 'type/Date'}]
+
+        self.assertEqual(json.loads(payload['query'])['query']['filter'], [
+            'and',
+            [
+                'or',
+                ['and', ['=', client_id, 'CID-1'], ['between', start_time, '2023-08-11', '2023-09-30']],
+                ['and', ['=', client_id, 'CID-2'], ['between', start_time, '2023-07-11', '2023-08-30']]
+            ],
+            ['>=', start_time, '2023-09-15']
+        ])
+
+    def test_export_request_of_ongoing_treatments(self):
+        """
+        Test to ensure the treatment windows without end date select every row since they start.
+        """
+        self.treatment_windows['CID-3'] = (date(2023, 9, 10), None)
+
+        _, payload = metabase.NotificationAPI(treatment_windows=self.treatment_windows)._export_request('csv')
+
+        client_id = ['field', 'client_id', {'base-type': 'type/Text'}]
+        start_time = ['field', 'start_time', {'base-type': 'type/Date'}]
+
+        self.assertNotIn('NaT', payload['query'])
+        self.assertEqual(
+            json.loads(payload['query'])['query']['filter'][3],
+            ['and', ['=', client_id, 'CID-3'], ['>=', start_time, '2023-08-20']]
+        )
+
+    def test_export_request_of_daily_treatments(self):
+        """
+        Test to ensure the daily counts are narrowed down to the treatment windows of the clients,
+        and to the days since the given date.
+        """
+        self.treatment_windows["CID-3'"] = (date(2023, 9, 10), None)
+
+        _, payload = metabase.DailyNotificationAPI(treatment_windows=self.treatment_windows)._export_request(
+            'csv', since='2023-09-15'
+        )
+
+        self.assertIn(
+            "WHERE ("
+            "(client_id = 'CID-1' AND CAST(start_time AS DATE) >= DATE '2023-08-11' "
+            "AND CAST(start_time AS DATE) <= DATE '2023-09-30') OR "
+            "(client_id = 'CID-2' AND CAST(start_time AS DATE) >= DATE '2023-07-11' "
+            "AND CAST(start_time AS DATE) <= DATE '2023-08-30') OR "
+            "(client_id = 'CID-3''' AND CAST(start_time AS DATE) >= DATE '2023-08-20')"
+            ") AND CAST(start_time AS DATE) >= DATE '2023-09-15' GROUP BY",
+            json.loads(payload['query'])['native']['query']
+        )
+
+    def test_database_id(self):
+        """
+        Test to ensure the database ID of a card is requested once, and shared by the Metabase APIs.
+        """
+        self.mock_database_id.stop()
+
+        self.client.http = mock.Mock()
+        self.client.http.request.return_value.status_code = 200
+        self.client.http.request.return_value.json.return_value = {'database_id': 3}
+
+        apis = [metabase.NotificationAPI(treatment_windows=self.treatment_windows) for _ in range(2)]
+        for api in apis:
+            api._export_request('csv')
+            api._export_request('csv', since='2023-09-15')
+
+        self.assertEqual(apis[1]._database_id(), 3)
+        self.assertEqual(self.client.http.request.call_count, 1)
+
+        self.mock_database_id.start()
+
+
+class TestShardedExport(TestCase):
+    """
+    Test the date-sharded export of the `MetabaseAPI`.
+    """
+
+    ROWS = [
+        ('CID-1', 'gscheme_log', ''),
+        ('CID-1', 'gscheme_log', '2023-09-01T08:00:00'),
+        ('CID-2', 'diary_entry_log', '2023-09-02T09:00:00'),
+        ('CID-1', 'gscheme_log', '2023-09-03T10:00:00'),
+        ('CID-2', 'gscheme_log', '2023-09-04T23:59:59'),
+    ]
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root_dir = self.temp_dir.name
+
+        self.client = metabase.MetabaseClient(pool_size=1)
+        self.client.session_id = 'SID-1'
+
+        self.mock_shared_client = mock.patch.object(metabase.MetabaseClient, 'shared', return_value=self.client)
+        self.mock_shared_client.start()
+
+        self.mock_database_id = mock.patch.object(metabase.MetabaseAPI, '_database_id', return_value=3)
+        self.mock_database_id.start()
+
+        self.mock_shards = mock.patch.object(metabase.settings, 'METABASE_EXPORT_SHARDS', 3)
+        self.mock_shards.start()
+
+        self.api = metabase.NotificationAPI(metabase.FileLocator(self.root_dir))
+        self.api._date_range = mock.Mock(return_value=(date(2023, 9, 1), date(2023, 9, 4), len(self.ROWS)))
+        self.api._download_file = mock.Mock(side_effect=self._download_shard)
+
+        self.shard_filters = []
+
+    def tearDown(self):
+        self.mock_shards.stop()
+        self.mock_database_id.stop()
+        self.mock_shared_client.stop()
+
+        self.temp_dir.cleanup()
+
+    def _download_shard(self, path, save_to, format, session_id, payload=None):
+        query = json.loads(payload['query'])['query']
+        self.shard_filters.append(query['filter'])
+
+        since, until = None, None
+        for filter in query['filter'][1:] if query['filter'][0] == 'and' else [query['filter']]:
+            if filter[0] == '>=':
+                since = filter[2]
+            elif filter[0] == '<':
+                until = filter[2]
+            elif filter[0] == 'or':
+                until = filter[2][2]
+
+        with open(save_to, 'w') as file:
+            file.write('client_id,type,start_time\n')
+            for row in self.ROWS:
+                start_date = row[2][:10]
+                if (since is None or (start_date and start_date >= since)) and (until is None or start_date < until):
+                    file.write(','.join(row) + '\n')
+
+    def _read(self, filename: str) -> str:
+        with open(f'{self.root_dir}/{filename}', 'r') as file:
+            return file.read()
+
+    def test_download_in_shards(self):
+        """
+        Test to ensure the card is exported in contiguous date-range shards,
+        which are reassembled in order without leftovers.
+        """
+        self.api.download()
+
+        start_time = ['field', 'start_time', {'base-type': 'type/Date'}]
+
+        # The shards are exported concurrently, hence in any order.
+        self.assertCountEqual(self.shard_filters, [
+            ['or', ['is-null', start_time], ['<', start_time, '2023-09-02']],
+            ['and', ['>=', start_time, '2023-09-02'], ['<', start_time, '2023-09-04']],
+            ['>=', start_time, '2023-09-04'],
+        ])
+        self.assertEqual(
+            self._read('notifications.csv'),
+            'client_id,type,start_time\n' + ''.join(','.join(row) + '\n' for row in self.ROWS)
+        )
+        self.assertListEqual(os.listdir(self.root_dir), ['notifications.csv'])
+
+    def test_download_with_missing_rows(self):
+        """
+        Test to ensure the export fails when the shards hold fewer rows than the card.
+        """
+        self.api._date_range.return_value = (date(2023, 9, 1), date(2023, 9, 4), len(self.ROWS) + 1)
+
+        with self.assertRaises(ValueError):
+            self.api.download()
+
+        self.assertListEqual(os.listdir(self.root_dir), [])
+
+    def test_download_with_extra_rows(self):
+        """
+        Test to ensure the export fails when the shards hold more rows than the card.
+        """
+        self.api._date_range.return_value = (date(2023, 9, 1), date(2023, 9, 4), len(self.ROWS) - 1)
+
+        with self.assertRaises(ValueError):
+            self.api.download()
+
+        self.assertListEqual(os.listdir(self.root_dir), [])
+
+    def test_download_with_repeated_rows(self):
+        """
+        Test to ensure the rows that are repeated within a shard are kept.
+        """
+        self.ROWS = [*self.ROWS, self.ROWS[-1]]
+        self.api._date_range.return_value = (date(2023, 9, 1), date(2023, 9, 4), len(self.ROWS))
+
+        self.api.download()
+
+        self.assertEqual(
+            self._read('notifications.csv'),
+            'client_id,type,start_time\n' + ''.join(','.join(row) + '\n' for row in self.ROWS)
+        )
+
+    def test_write_shards_with_duplicate_rows(self):
+        """
+        Test to ensure the shards fail to be reassembled when a row is in more than one shard,
+        i.e. when their date ranges overlap, or when a shard holds the rows of another one.
+        """
+        shard_files = [f'{self.root_dir}/shard-0', f'{self.root_dir}/shard-1']
+        for shard_file in shard_files:
+            self._write_all(shard_file)
+
+        with self.assertRaises(ValueError):
+            self.api._write_shards(shard_files, [(None, None), (None, None)], f'{self.root_dir}/assembled')
+
+        with self.assertRaises(ValueError):
+            self.api._write_shards(shard_files, [(None, '2023-09-03'), ('2023-09-02', None)], f'{self.root_dir}/assembled')
+
+        with self.assertRaises(ValueError):
+            self.api._write_shards(shard_files, [(None, '2023-09-03'), ('2023-09-03', None)], f'{self.root_dir}/assembled')
+
+    def test_download_with_row_outside_of_shard(self):
+        """
+        Test to ensure the export fails when a shard holds a row outside of its date range.
+        """
+        self.ROWS = [*self.ROWS, ('CID-2', 'gscheme_log', '2023-08-30T10:00:00')]
+        self.api._date_range.return_value = (date(2023, 9, 1), date(2023, 9, 4), len(self.ROWS))
+
+        self.api._download_file.side_effect = lambda path, save_to, *args, **kwargs: self._write_all(save_to)
+
+        with self.assertRaises(ValueError):
+            self.api.download()
+
+        self.assertListEqual(os.listdir(self.root_dir), [])
+
+    def _write_all(self, save_to: str) -> None:
+        with open(save_to, 'w') as file:
+            file.write('client_id,type,start_time\n')
+            for row in self.ROWS:
+                file.write(','.join(row) + '\n')
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from dateutil.parser import parse
+from unittest import TestCase
+
+from app.encoders import DayOrdinals, IdDictionary
+
+
+class TestIdDictionary(TestCase):
+    """
+    Test the `IdDictionary`.
+    """
+
+    def test_encode(self):
+        """
+        Test to ensure the IDs are encoded consistently across the tables.
+        """
+        users = pd.Series(['CID-2', 'CID-1'])
+        trackers = pd.Series(['CID-1', 'CID-3', np.nan, 'CID-1'])
+
+        ids = IdDictionary().fit([users, trackers])
+
+        self.assertListEqual(ids.encode(users).tolist(), [1, 0])
+        self.assertListEqual(ids.encode(trackers).tolist(), [0, 2, -1, 0])
+        self.assertEqual(ids.encode(trackers).dtype, np.int32)
+
+    def test_fit_keeps_codes(self):
+        """
+        Test to ensure the codes of the known IDs are kept when new IDs are added.
+        """
+        ids = IdDictionary().fit([pd.Series(['CID-2', 'CID-1'])])
+        ids.fit([pd.Series(['CID-0', 'CID-2'])])
+
+        self.assertListEqual(ids.encode(pd.Series(['CID-0', 'CID-1', 'CID-2'])).tolist(), [2, 0, 1])
+
+    def test_fit_without_columns(self):
+        """
+        Test to ensure the dictionary is left untouched when there are no columns to add.
+        """
+        ids = IdDictionary().fit([pd.Series(['CID-2', 'CID-1'])])
+        ids.fit([])
+
+        self.assertListEqual(ids.encode(pd.Series(['CID-1', 'CID-2'])).tolist(), [0, 1])
+
+    def test_decode(self):
+        """
+        Test to ensure the codes are decoded back into their IDs.
+        """
+        trackers = pd.Series(['CID-1', 'CID-3', np.nan, 'CID-4'], index=[3, 5, 7, 9], name='client_id')
+
+        ids = IdDictionary().fit([trackers.iloc[:3]])
+        actual = ids.decode(ids.encode(trackers))
+
+        pd.testing.assert_series_equal(
+            actual, pd.Series(['CID-1', 'CID-3', np.nan, np.nan], index=[3, 5, 7, 9], name='client_id', dtype=object)
+        )
+        self.assertEqual(ids.decode_one(1), 'CID-3')
+
+    def test_disabled(self):
+        """
+        Test to ensure the IDs are left untouched when the dictionary is disabled.
+        """
+        trackers = pd.Series(['CID-1', 'CID-3'])
+
+        ids = IdDictionary(enabled=False).fit([trackers])
+
+        self.assertIs(ids.encode(trackers), trackers)
+        self.assertEqual(ids.decode_one('CID-1'), 'CID-1')
+
+
+class TestDayOrdinals(TestCase):
+    """
+    Test the `DayOrdinals`.
+    """
+
+    def test_encode(self):
+        """
+        Test to ensure the timestamps are encoded into the days since 1970-01-01.
+        """
+        timestamps = pd.Series(pd.to_datetime(['1970-01-01T23:59:59.999', '2023-10-06T00:00:00', None, '1969-12-31T12:00:00'], format='ISO8601'))
+
+        actual = DayOrdinals().encode(timestamps)
+
+        self.assertListEqual(actual.tolist(), [0, 19636, DayOrdinals.MISSING_DAY, -1])
+        self.assertEqual(actual.dtype, np.int32)
+        self.assertEqual(DayOrdinals().encode_one(parse('2023-10-06 18:30')), 19636)
+
+    def test_disabled(self):
+        """
+        Test to ensure the timestamps are left untouched when the ordinals are disabled.
+        """
+        timestamps = pd.Series(pd.to_datetime(['2023-10-06']))
+
+        self.assertIs(DayOrdinals(enabled=False).encode(timestamps), timestamps)
+        self.assertEqual(DayOrdinals(enabled=False).encode_one(parse('2023-10-06')), parse('2023-10-06'))
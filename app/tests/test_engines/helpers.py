@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from datetime import datetime, timedelta
+from typing import Callable
+
+
+def random_table(
+    rng: np.random.Generator,
+    client_ids: list,
+    size: int,
+    days: int = 60,
+    unit: str = 'min',
+    **columns: Callable[[int], np.ndarray]
+) -> pd.DataFrame:
+    """
+    Returns a random table of the clients, with start times within that number of `days` since 2023-09-01
+    to the `unit` (minutes or hours), a random flag, and the given random columns.
+    """
+    periods = days * {'min': 24 * 60, 'h': 24}[unit]
+
+    return pd.DataFrame({
+        'client_id': rng.choice(client_ids, size),
+        'start_time': datetime(2023, 9, 1) + pd.to_timedelta(rng.integers(0, periods, size), unit=unit),
+        'is_flagged': rng.random(size) < 0.5,
+        **{name: column(size) for name, column in columns.items()},
+    })
+
+
+def within_days(table: pd.DataFrame, client_id: str, timestamp: datetime, days_from: int, days_to: int = 0) -> pd.Series:
+    """
+    Returns the condition of the rows of that client in that `table` that started on the days
+    from `days_from` (excluded) to `days_to` (included) days before that `timestamp`,
+    by comparing their start time with the end of those days.
+    """
+    from_datetime = datetime.combine(timestamp - timedelta(days=days_from), datetime.max.time())
+    to_datetime = datetime.combine(timestamp - timedelta(days=days_to), datetime.max.time())
+
+    return (table['client_id'] == client_id) & (table['start_time'] > from_datetime) & (table['start_time'] <= to_datetime)
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import warnings
+
+from dateutil.parser import parse
+from unittest import TestCase
+
+from app.engines import AsOfEngine
+from app.tests.test_engines.helpers import random_table
+from app.transformators import (
+    interactions_to_criterion,
+    registrations_to_criterion,
+)
+
+
+class TestAsOfEngine(TestCase):
+    """
+    Test the `AsOfEngine`.
+    """
+
+    def test_latest(self):
+        """
+        Test to ensure the latest rows at or before the snapshots are the first rows of
+        the rows of their client sorted by their start time in descending order.
+        """
+        snapshots = pd.DataFrame(data={
+            'client_id': ['C1', 'C1', 'C2', 'C1', 'C3'],
+            'treatment_timestamp': [
+                parse('2023-09-05T10:00:00'),
+                parse('2023-09-01'),
+                parse('2023-09-05'),
+                parse('2023-09-03T12:00:00'),
+                parse('2023-09-05'),
+            ],
+        })
+        table = pd.DataFrame(data={
+            'client_id': ['C1', 'C2', 'C1', 'C1', 'C1', 'C2'],
+            'start_time': [
+                parse('2023-09-02'),
+                parse('2023-09-01'),
+                parse('2023-09-03T12:00:00'),
+                parse('2023-09-03T12:00:00'),
+                parse('2023-09-06'),
+                pd.NaT,
+            ],
+        })
+
+        last_positions, prev_positions = AsOfEngine(snapshots).latest(table, count=2)
+
+        np.testing.assert_array_equal(last_positions, [2, -1, 1, 2, -1])
+        np.testing.assert_array_equal(prev_positions, [3, -1, -1, 3, -1])
+
+    def test_days_since_latest(self):
+        """
+        Test to ensure the days since the latest rows of the tables are the same as
+        those of the snapshot by snapshot transformators (criteria `a` and `b`).
+        """
+        rng = np.random.default_rng(0)
+        client_ids = ['C1', 'C2', 'C3', 'C4']
+
+        snapshots = random_table(rng, client_ids + ['C5'], 300, days=30).rename(columns={'start_time': 'treatment_timestamp'})
+        communications = random_table(
+            rng,
+            client_ids,
+            400,
+            days=30,
+            call_made=lambda size: rng.random(size) < 0.3,
+            chat_msg_sent=lambda size: rng.random(size) < 0.6
+        )
+        sessions = random_table(rng, client_ids[:2], 20, days=30)
+        diaries = random_table(rng, client_ids, 50, days=30)
+        thought_records = random_table(rng, client_ids, 50, days=30)
+        smqs = random_table(rng, client_ids[1:], 10, days=30)
+        custom_trackers = random_table(rng, client_ids[:3], 100, days=30)
+
+        engine = AsOfEngine(snapshots)
+
+        actual__a = list(zip(
+            engine.days_since_latest(communications[communications['call_made']], sessions),
+            engine.days_since_latest(communications[communications['chat_msg_sent']])
+        ))
+        actual__b = engine.days_since_latest(diaries, thought_records, smqs, custom_trackers)
+
+        def before(table, client_id, timestamp):
+            return table[(table['client_id'] == client_id) & (table['start_time'] <= timestamp)]
+
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            expected__a, expected__b = [], []
+            for client_id, timestamp in zip(snapshots['client_id'], snapshots['treatment_timestamp']):
+                expected__a.append(interactions_to_criterion(
+                    before(communications, client_id, timestamp), before(sessions, client_id, timestamp), timestamp
+                ))
+                expected__b.append(registrations_to_criterion(
+                    before(diaries, client_id, timestamp),
+                    before(thought_records, client_id, timestamp),
+                    before(smqs, client_id, timestamp),
+                    before(custom_trackers, client_id, timestamp),
+                    timestamp
+                ))
+
+        self.assertEqual(len(actual__a), len(expected__a))
+        for actual, expected in zip(actual__a + list(zip(actual__b)), expected__a + list(zip(expected__b))):
+            self.assertListEqual([None if np.isnan(days) else days for days in actual], list(expected))
+
+    def test_days_since_latest_without_rows(self):
+        """
+        Test to ensure the days since the latest rows are missing when the tables are empty.
+        """
+        snapshots = pd.DataFrame(data={'client_id': ['C1'], 'treatment_timestamp': [parse('2023-09-05')]})
+        table = pd.DataFrame(data={'client_id': pd.Series([], dtype=object), 'start_time': pd.Series([], dtype='datetime64[ns]')})
+
+        actual = AsOfEngine(snapshots).days_since_latest(table)
+
+        self.assertTrue(np.isnan(actual).all())
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from unittest import TestCase
+
+from app.encoders import DayOrdinals
+from app.engines import AsOfEngine, ClientTimeline
+from app.tests.test_engines.helpers import random_table, within_days
+
+
+class TestClientTimeline(TestCase):
+    """
+    Test the `ClientTimeline`.
+    """
+
+    def test_latest(self):
+        """
+        Test to ensure the latest rows of a client at or before a timestamp
+        are the same as the latest rows of the as-of engine, ties included.
+        """
+        rng = np.random.default_rng(0)
+
+        snapshots = random_table(rng, ['C1', 'C2', 'C3'], 200, unit='h').rename(columns={'start_time': 'treatment_timestamp'})
+        table = random_table(rng, ['C1', 'C2', 'C4'], 1000, unit='h')
+
+        timeline = ClientTimeline()
+        timeline.add('table', table)
+
+        expected = AsOfEngine(snapshots).latest(table, count=2)
+        expected_times = AsOfEngine(snapshots).latest_times(table)
+
+        for snapshot, (client_id, timestamp) in enumerate(zip(snapshots['client_id'], snapshots['treatment_timestamp'])):
+            self.assertEqual(timeline.latest('table', client_id, timestamp, count=2), [expected[0][snapshot], expected[1][snapshot]])
+            np.testing.assert_array_equal(timeline.latest_time('table', client_id, timestamp), expected_times[snapshot])
+
+    def test_count(self):
+        """
+        Test to ensure the rows of a client within the windows of days before a timestamp are counted
+        the same as the windows of date-times do, with or without the day ordinals of the rows.
+        """
+        rng = np.random.default_rng(0)
+
+        table = random_table(rng, ['C1', 'C2'], 1000, unit='h')
+
+        timeline = ClientTimeline()
+        timeline.add('start_time', table, table['is_flagged'])
+        timeline.add(
+            'start_day',
+            table.assign(start_day=DayOrdinals().encode(table['start_time'])).drop(columns=['start_time']),
+            table['is_flagged']
+        )
+
+        for client_id in ['C1', 'C2', 'C3']:
+            for timestamp in pd.date_range('2023-09-10 12:00', '2023-11-10 12:00', freq='5D'):
+                for days_from, days_to in [(7, 0), (14, 7)]:
+                    expected = int((table['is_flagged'] & within_days(table, client_id, timestamp, days_from, days_to)).sum())
+
+                    self.assertEqual(timeline.count('start_time', client_id, timestamp, days_from, days_to), expected)
+                    self.assertEqual(timeline.count('start_day', client_id, timestamp, days_from, days_to), expected)
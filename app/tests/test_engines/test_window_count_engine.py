@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from dateutil.parser import parse
+from unittest import (
+    mock,
+    TestCase,
+)
+
+from app.encoders import DayOrdinals
+from app.engines import WindowCountEngine
+from app.tests.test_engines.helpers import random_table, within_days
+
+
+class TestWindowCountEngine(TestCase):
+    """
+    Test the `WindowCountEngine`.
+    """
+
+    def expected_counts(self, snapshots, table, days_from, days_to):
+        """
+        Counts the rows of that `table` within the window of days before every snapshot, one by one.
+        """
+        return [
+            int(within_days(table, client_id, timestamp, days_from, days_to).sum())
+            for client_id, timestamp in zip(snapshots['client_id'], snapshots['treatment_timestamp'])
+        ]
+
+    def test_count(self):
+        """
+        Test to ensure the rows within the windows of days before the snapshots are counted
+        the same as the windows of date-times do, with or without the day ordinals of the rows.
+        """
+        rng = np.random.default_rng(0)
+
+        snapshots = random_table(rng, ['C1', 'C2', 'C3'], 200).rename(columns={'start_time': 'treatment_timestamp'})
+        table = random_table(rng, ['C1', 'C2', 'C4'], 1000)
+
+        engine = WindowCountEngine(snapshots, 14)
+        counters = {
+            'start_time': engine.counter(table, table['is_flagged']),
+            'start_day': engine.counter(
+                table.assign(start_day=DayOrdinals().encode(table['start_time'])).drop(columns=['start_time']),
+                table['is_flagged']
+            ),
+        }
+
+        for days_from, days_to in [(7, 0), (14, 7), (14, 0), (1, 0), (0, 0)]:
+            expected = self.expected_counts(snapshots, table[table['is_flagged']], days_from, days_to)
+
+            for name, counter in counters.items():
+                with self.subTest(window=(days_from, days_to), days=name):
+                    self.assertListEqual(engine.count(counter, days_from, days_to).tolist(), expected)
+
+    def test_counter_encodes_days_once(self):
+        """
+        Test to ensure the days of a table are only encoded once for all of its counters.
+        """
+        rng = np.random.default_rng(0)
+
+        snapshots = random_table(rng, ['C1', 'C2'], 20).rename(columns={'start_time': 'treatment_timestamp'})
+        table = random_table(rng, ['C1', 'C2'], 100)
+
+        engine = WindowCountEngine(snapshots, 14)
+
+        with mock.patch.object(engine._days, 'encode', wraps=engine._days.encode) as encode:
+            flagged = engine.counter(table, table['is_flagged'])
+            unflagged = engine.counter(table, ~table['is_flagged'])
+            every = engine.counter(table)
+
+        self.assertEqual(encode.call_count, 1)
+        np.testing.assert_array_equal(flagged + unflagged, every)
+
+    def test_count_out_of_look_back_days(self):
+        """
+        Test to ensure the windows of days out of the look-back days aren't counted.
+        """
+        snapshots = pd.DataFrame(data={'client_id': ['C1'], 'treatment_timestamp': [parse('2023-09-05')]})
+        table = pd.DataFrame(data={'client_id': ['C1'], 'start_time': [parse('2023-09-01')]})
+
+        engine = WindowCountEngine(snapshots, 7)
+
+        with self.assertRaises(ValueError):
+            engine.count(engine.counter(table), 14, 7)
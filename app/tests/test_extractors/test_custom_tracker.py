@@ -0,0 +1,32 @@
+import io
+import pandas as pd
+
+from unittest import TestCase
+
+from app import extractors
+
+
+class TestCustomTracker(TestCase):
+    """
+    Test the `CustomTracker` extractor.
+    """
+
+    def test_parse_typed_columns(self):
+        """
+        Test to ensure the fields of the `value` JSON are extracted into typed columns,
+        along with the negative registration flag.
+        """
+        source = io.StringIO(
+            'client_id,start_time,name,value\n'
+            'CID-1,2021-03-02T21:18:58.975,measure_worry,"{""duration"": 900}"\n'
+            'CID-1,2021-03-03T21:18:58.975,measure_worry,{}\n'
+            'CID-1,2021-03-04T21:18:58.975,measure_avoidance,"{""boolean"": true}"\n'
+            'CID-1,2021-03-05T21:18:58.975,measure_avoidance,"{""boolean"": false}"\n'
+            'CID-1,2021-03-06T21:18:58.975,measure_safety_behaviour,"{""duration"": 60, ""boolean"": true}"\n'
+        )
+
+        actual = extractors.CustomTracker()._parse(source)
+
+        self.assertListEqual(actual['boolean'].tolist(), [pd.NA, pd.NA, True, False, True])
+        self.assertListEqual(actual['duration'].tolist(), [900, pd.NA, pd.NA, pd.NA, 60])
+        self.assertListEqual(actual['is_negative_registration'].tolist(), [True, True, True, False, True])
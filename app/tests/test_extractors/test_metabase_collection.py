@@ -0,0 +1,291 @@
+import hashlib
+import json
+import os
+import pandas as pd
+import shutil
+import tempfile
+
+from datetime import date, datetime, timedelta
+from unittest import (
+    mock,
+    TestCase,
+)
+
+from app import extractors
+from app.datasources import metabase
+from app.settings import FileLocator
+
+
+COLLECTIONS = [
+    'ClientInfo',
+    'Communication',
+    'CustomTracker',
+    'DiaryEntry',
+    'Notification',
+    'PlannedEvent',
+    'PlannedEventReflection',
+    'TherapySession',
+    'ThoughtRecord',
+    'SMQ',
+]
+
+
+def mock_download(self, file_locator: FileLocator, treatment_windows=None):
+    """
+    Mock the collection's `download()` method to write a dummy snapshot
+    instead of pulling it from Metabase.
+    """
+    directory, filename = getattr(file_locator, self.card.snapshot)
+
+    with open(f'{directory}/{filename}', 'w') as file:
+        file.write('client_id\nCID-1\n')
+
+
+def snapshot_filename(name: str) -> str:
+    """
+    Returns the filename of the snapshot of the collection of that `name`.
+    """
+    collection = getattr(extractors, name)()
+    _, filename = getattr(FileLocator(), collection.card.snapshot)
+
+    return filename
+
+
+def mock_failed_download(self, file_locator: FileLocator, treatment_windows=None):
+    """
+    Mock the collection's `download()` method to fail.
+    """
+    raise ConnectionError('Connection aborted.')
+
+
+class TestMetabaseCollection(TestCase):
+    """
+    Test the `MetabaseCollection` extractor.
+    """
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+
+        self.mock_file_locator = mock.patch.object(extractors, 'FILE_LOCATOR', FileLocator(self.root_dir))
+        self.mock_file_locator.start()
+
+        self.mock_downloads = [
+            mock.patch.object(getattr(extractors, name), 'download', mock_download)
+            for name in COLLECTIONS
+        ]
+        for mock_download_collection in self.mock_downloads:
+            mock_download_collection.start()
+
+    def tearDown(self):
+        for mock_download_collection in self.mock_downloads:
+            mock_download_collection.stop()
+
+        self.mock_file_locator.stop()
+
+        shutil.rmtree(self.root_dir, ignore_errors=True)
+
+    def test_download(self):
+        """
+        Test to ensure the `download` method publishes every collection
+        into the snapshots directory.
+        """
+        extractors.MetabaseCollection().download()
+
+        actual = sorted(os.listdir(self.root_dir))
+        expected = sorted([snapshot_filename(name) for name in COLLECTIONS] + ['manifest.json'])
+        self.assertListEqual(actual, expected)
+
+    def test_download_records_manifest(self):
+        """
+        Test to ensure the `download` method records every published snapshot in the manifest.
+        """
+        extractors.MetabaseCollection().download()
+
+        with open(f'{self.root_dir}/manifest.json', 'r') as file:
+            manifest = json.load(file)
+
+        self.assertListEqual(sorted(manifest), sorted(snapshot_filename(name) for name in COLLECTIONS))
+
+        entry = manifest['users.csv']
+        self.assertEqual(entry['rows'], 1)
+        self.assertEqual(entry['bytes'], len('client_id\nCID-1\n'))
+        self.assertEqual(entry['sha256'], hashlib.sha256(b'client_id\nCID-1\n').hexdigest())
+        self.assertEqual(entry['changed_at'], entry['downloaded_at'])
+
+    def test_download_records_snapshots_only(self):
+        """
+        Test to ensure the files that come with the snapshots (e.g. their watermarks)
+        are published, but not recorded in the manifest.
+        """
+        def download_with_watermark(self, file_locator: FileLocator, treatment_windows=None):
+            mock_download(self, file_locator, treatment_windows)
+
+            with open(f'{file_locator.root_dir}/notifications.watermark', 'w') as file:
+                file.write('2023-09-03')
+
+        with mock.patch.object(extractors.Notification, 'download', download_with_watermark):
+            extractors.MetabaseCollection().download()
+
+        with open(f'{self.root_dir}/manifest.json', 'r') as file:
+            manifest = json.load(file)
+
+        self.assertTrue(os.path.exists(f'{self.root_dir}/notifications.watermark'))
+        self.assertListEqual(sorted(manifest), sorted(snapshot_filename(name) for name in COLLECTIONS))
+
+    def test_download_stale_only(self):
+        """
+        Test to ensure the `download` method skips the collections
+        whose snapshot is still fresh, when only the stale snapshots are refreshed.
+        """
+        extractors.MetabaseCollection().download()
+
+        # Makes the planned events snapshot outlive its TTL
+        with open(f'{self.root_dir}/manifest.json', 'r') as file:
+            manifest = json.load(file)
+        manifest['planned_events.csv']['downloaded_at'] = (datetime.now() - timedelta(days=2)).isoformat()
+        manifest['planned_events.csv']['changed_at'] = (datetime.now() - timedelta(days=2)).isoformat()
+        with open(f'{self.root_dir}/manifest.json', 'w') as file:
+            json.dump(manifest, file)
+
+        downloaded = []
+
+        def mock_tracked_download(collection, file_locator, treatment_windows=None):
+            downloaded.append(type(collection).__name__)
+            mock_download(collection, file_locator, treatment_windows)
+
+        tracked_downloads = [
+            mock.patch.object(getattr(extractors, name), 'download', mock_tracked_download)
+            for name in COLLECTIONS
+        ]
+
+        with mock.patch.object(extractors.settings, 'METABASE_REFRESH_STALE_ONLY', True):
+            for tracked_download in tracked_downloads:
+                tracked_download.start()
+
+            try:
+                extractors.MetabaseCollection().download()
+            finally:
+                for tracked_download in tracked_downloads:
+                    tracked_download.stop()
+
+        # Only the clients and the planned events have a TTL.
+        self.assertCountEqual(downloaded, [name for name in COLLECTIONS if name != 'ClientInfo'])
+
+        with open(f'{self.root_dir}/manifest.json', 'r') as file:
+            manifest = json.load(file)
+
+        # The content of the planned events didn't change
+        self.assertLess(manifest['planned_events.csv']['changed_at'], manifest['planned_events.csv']['downloaded_at'])
+
+    def test_download_partial_failure(self):
+        """
+        Test to ensure the `download` method leaves the existing snapshots untouched
+        when one of the collections fails to download.
+        """
+        with open(f'{self.root_dir}/users.csv', 'w') as file:
+            file.write('client_id\nCID-0\n')
+
+        with mock.patch.object(extractors.Notification, 'download', mock_failed_download):
+            with self.assertRaises(ConnectionError):
+                extractors.MetabaseCollection().download()
+
+        self.assertListEqual(os.listdir(self.root_dir), ['users.csv'])
+
+        with open(f'{self.root_dir}/users.csv', 'r') as file:
+            self.assertEqual(file.read(), 'client_id\nCID-0\n')
+
+    def test_download_with_new_client(self):
+        """
+        Test to ensure the rows of a client that is added between two downloads
+        are exported whole, including the ones started before the watermark.
+        """
+        clients = [
+            'client_id,therapist_id,start_time,end_time,no_of_registrations\n'
+            'CID-1,TID-1,2023-09-01,2023-09-30,1\n'
+        ]
+
+        custom_trackers = [
+            ('CID-1', '2023-09-01'),
+            ('CID-2', '2023-09-02'),
+            ('CID-1', '2023-09-05'),
+        ]
+
+        def download_clients(self, file_locator: FileLocator, treatment_windows=None):
+            directory, filename = file_locator.clients
+
+            with open(f'{directory}/{filename}', 'w') as file:
+                file.write(clients[0])
+
+        def download_custom_trackers(self, file_locator: FileLocator, treatment_windows=None):
+            extractors.CustomTrackerAPI(file_locator, treatment_windows).download()
+
+        def download_file(self, path, save_to, format, session_id, payload=None):
+            """
+            Exports the custom trackers of the clients selected by the dataset query,
+            started on or after its `start_time` filter.
+            """
+            client_ids, since = [], ''
+
+            def select(filter):
+                nonlocal since
+
+                if filter[0] == '=' and filter[1][1] == 'client_id':
+                    client_ids.extend(filter[2:])
+                elif filter[0] == '>=' and filter[1][1] == 'start_time':
+                    since = filter[2]
+                elif filter[0] == 'and':
+                    for condition in filter[1:]:
+                        select(condition)
+
+            select(json.loads(payload['query'])['query']['filter'])
+
+            with open(save_to, 'w') as file:
+                file.write('client_id,start_time,name,value\n')
+
+                for client_id, start_time in custom_trackers:
+                    if client_id in client_ids and start_time >= since:
+                        file.write(f'{client_id},{start_time},mood,5\n')
+
+        client = metabase.MetabaseClient(pool_size=1)
+        client.session_id = 'SID-1'
+
+        with mock.patch.object(extractors.ClientInfo, 'download', download_clients), \
+                mock.patch.object(extractors.CustomTracker, 'download', download_custom_trackers), \
+                mock.patch.object(metabase.MetabaseAPI, '_download_file', download_file), \
+                mock.patch.object(metabase.MetabaseAPI, '_database_id', return_value=3), \
+                mock.patch.object(metabase.MetabaseClient, 'shared', return_value=client), \
+                mock.patch.object(metabase, 'FILE_LOCATOR', FileLocator(self.root_dir)), \
+                mock.patch.multiple(extractors.settings, METABASE_PROJECTED_QUERIES=True, METABASE_INCREMENTAL_DOWNLOAD=True):
+            extractors.MetabaseCollection().download()
+
+            with open(f'{self.root_dir}/custom_trackers.watermark', 'r') as file:
+                self.assertEqual(file.read(), '2023-09-05')
+
+            clients[0] += 'CID-2,TID-1,2023-09-01,2023-09-30,1\n'
+            extractors.MetabaseCollection().download()
+
+        with open(f'{self.root_dir}/custom_trackers.csv', 'r') as file:
+            self.assertEqual(
+                file.read(),
+                'client_id,start_time,name,value\n'
+                'CID-1,2023-09-01,mood,5\n'
+                'CID-2,2023-09-02,mood,5\n'
+                'CID-1,2023-09-05,mood,5\n'
+            )
+
+    def test_treatment_windows_of_ongoing_treatments(self):
+        """
+        Test to ensure the missing treatment dates (e.g. of an ongoing treatment) are None.
+        """
+        clients = pd.DataFrame({
+            'client_id': ['CID-1', 'CID-2'],
+            'start_time': pd.to_datetime(['2023-09-01', '2023-09-10']),
+            'end_time': pd.to_datetime(['2023-09-30', None]),
+        })
+
+        actual = extractors.MetabaseCollection()._treatment_windows(clients)
+        expected = {
+            'CID-1': (date(2023, 9, 1), date(2023, 9, 30)),
+            'CID-2': (date(2023, 9, 10), None),
+        }
+        self.assertDictEqual(actual, expected)
@@ -0,0 +1,299 @@
+import os
+import pandas as pd
+import tempfile
+
+from dateutil.parser import parse
+from unittest import (
+    mock,
+    TestCase,
+)
+
+from app import extractors
+from app.settings import FileLocator
+
+
+class TestPlannedEventCompletion(TestCase):
+    """
+    Test the `PlannedEventCompletion` extractor.
+    """
+
+    def test_create_event_completions(self):
+        """
+        Test to ensure every instance of the planned events gets the status of its first reflection on its date,
+        and the instances without reflection are incompleted.
+        """
+        events = pd.DataFrame(data={
+            'id': ['PE-1', 'PE-2'],
+            'client_id': ['CID-1', 'CID-2'],
+            'recurring_expression': [{'rrule': 'FREQ=DAILY;COUNT=3'}, {'rrule': 'FREQ=DAILY;COUNT=1'}],
+            'start_time': [parse('2023-09-01T10:30:00'), parse('2023-09-02T08:00:00')],
+            'calculated_end_time': [parse('2023-09-30'), parse('2023-09-30')],
+        })
+        events_reflections = pd.DataFrame(data={
+            'planned_event_id': ['PE-1', 'PE-1', 'PE-1', 'PE-2', 'PE-1'],
+            'start_time': [
+                parse('2023-09-01'),
+                parse('2023-09-03'),
+                parse('2023-09-03'),
+                parse('2023-09-01'),
+                parse('2023-09-02T10:30:00'),
+            ],
+            'status': ['COMPLETED', 'CANCELED', 'COMPLETED', 'COMPLETED', 'COMPLETED'],
+        })
+
+        actual = extractors.PlannedEventCompletion()._create_event_completions(events, events_reflections)
+
+        expected = pd.DataFrame(data={
+            'client_id': ['CID-1', 'CID-1', 'CID-1', 'CID-2'],
+            'planned_event_id': ['PE-1', 'PE-1', 'PE-1', 'PE-2'],
+            'start_time': [parse('2023-09-01'), parse('2023-09-02'), parse('2023-09-03'), parse('2023-09-02')],
+            'status': ['COMPLETED', 'INCOMPLETED', 'CANCELED', 'INCOMPLETED'],
+        })
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_create_event_completions_in_parallel(self):
+        """
+        Test to ensure the completions created in a pool of processes are the same as in the main process.
+        """
+        events = pd.DataFrame(data={
+            'id': ['PE-1', 'PE-2', 'PE-3', 'PE-4'],
+            'client_id': ['CID-1', 'CID-2', 'CID-1', 'CID-3'],
+            'recurring_expression': [
+                {'rrule': 'FREQ=DAILY;COUNT=3'},
+                {'rrule': 'FREQ=WEEKLY;BYDAY=MO,TH;COUNT=4'},
+                {'rrule': 'FREQ=DAILY;INTERVAL=2'},
+                {'rrule': 'FREQ=MONTHLY;BYDAY=+1FR'},
+            ],
+            'start_time': [
+                parse('2023-09-01T10:30:00'),
+                parse('2023-09-02T08:00:00'),
+                parse('2023-08-30T08:00:00'),
+                parse('2023-08-01T08:00:00'),
+            ],
+            'calculated_end_time': [parse('2023-09-10'), parse('2023-09-30'), parse('2023-09-10'), parse('2023-12-31')],
+        })
+        events_reflections = pd.DataFrame(data={
+            'planned_event_id': ['PE-1', 'PE-2', 'PE-3', 'PE-4'],
+            'start_time': [parse('2023-09-02'), parse('2023-09-04'), parse('2023-09-01'), parse('2023-09-01')],
+            'status': ['COMPLETED', 'CANCELED', 'COMPLETED', 'COMPLETED'],
+        })
+
+        completion = extractors.PlannedEventCompletion()
+
+        expected = completion._create_event_completions(events, events_reflections)
+        actual = completion._create_event_completions_in_parallel(events, events_reflections, workers=2)
+
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_create_event_completions_in_parallel_with_duplicate_ids(self):
+        """
+        Test to ensure the completions of the events that share their ID are merged back
+        in the same order as in the main process.
+        """
+        events = pd.DataFrame(data={
+            'id': ['PE-1', 'PE-1', 'PE-2', 'PE-3'],
+            'client_id': ['CID-1', 'CID-1', 'CID-2', 'CID-1'],
+            'recurring_expression': [
+                {'rrule': 'FREQ=DAILY;COUNT=2'},
+                {'rrule': 'FREQ=DAILY;COUNT=3'},
+                {'rrule': 'FREQ=DAILY;COUNT=2'},
+                {'rrule': 'FREQ=DAILY;COUNT=1'},
+            ],
+            'start_time': [
+                parse('2023-09-01T10:30:00'),
+                parse('2023-09-05T10:30:00'),
+                parse('2023-09-02T08:00:00'),
+                parse('2023-08-30T08:00:00'),
+            ],
+            'calculated_end_time': [parse('2023-09-30') for _ in range(0, 4)],
+        })
+        events_reflections = pd.DataFrame(data={
+            'planned_event_id': ['PE-1', 'PE-2'],
+            'start_time': [parse('2023-09-06'), parse('2023-09-02')],
+            'status': ['COMPLETED', 'CANCELED'],
+        })
+
+        completion = extractors.PlannedEventCompletion()
+
+        expected = completion._create_event_completions(events, events_reflections)
+        actual = completion._create_event_completions_in_parallel(events, events_reflections, workers=2)
+
+        pd.testing.assert_frame_equal(actual, expected)
+        self.assertEqual(len(actual.index), 8)
+
+    def test_partition_by_client(self):
+        """
+        Test to ensure the clients are partitioned with about the same number of events each.
+        """
+        events = pd.DataFrame(data={'client_id': ['CID-1'] * 4 + ['CID-2'] * 3 + ['CID-3'] * 2 + ['CID-4'] * 2})
+
+        actual = extractors.PlannedEventCompletion()._partition_by_client(events, 2)
+
+        self.assertListEqual(actual, [['CID-1', 'CID-4'], ['CID-2', 'CID-3']])
+
+    def test_create_event_completions_without_instances(self):
+        """
+        Test to ensure no completions are created when there are no planned events.
+        """
+        events = pd.DataFrame(columns=['id', 'client_id', 'recurring_expression', 'start_time', 'calculated_end_time'])
+        events_reflections = pd.DataFrame(columns=['planned_event_id', 'start_time', 'status'])
+
+        actual = extractors.PlannedEventCompletion()._create_event_completions(events, events_reflections)
+
+        self.assertTrue(actual.empty)
+
+    def test_read_snapshot_incrementally(self):
+        """
+        Test to ensure the stored completions patched with the new and changed events
+        are the same as the completions generated as a whole.
+        """
+        clients = pd.DataFrame(data={
+            'client_id': ['CID-1', 'CID-2'],
+            'start_time': [parse('2023-08-01'), parse('2023-08-01')],
+            'end_time': [parse('2023-10-01'), parse('2023-10-01')],
+        })
+        events = pd.DataFrame(data={
+            'id': ['PE-1', 'PE-2', 'PE-3', 'PE-4'],
+            'recurring_expression': [
+                {'rrule': 'FREQ=DAILY;COUNT=3'},
+                {'rrule': 'FREQ=WEEKLY;BYDAY=MO,TH'},
+                {'rrule': 'FREQ=DAILY;INTERVAL=2'},
+                {'rrule': 'FREQ=DAILY;COUNT=2'},
+            ],
+            'client_id': ['CID-1', 'CID-2', 'CID-1', 'CID-2'],
+            'start_time': [
+                parse('2023-09-01T10:30:00'),
+                parse('2023-09-02T08:00:00'),
+                parse('2023-08-30T08:00:00'),
+                parse('2023-09-05T08:00:00'),
+            ],
+            'end_time': [pd.NaT, parse('2023-09-20'), pd.NaT, pd.NaT],
+            'terminated_time': [pd.NaT, pd.NaT, parse('2023-09-10'), pd.NaT],
+        })
+        events_reflections = pd.DataFrame(data={
+            'planned_event_id': ['PE-1', 'PE-2', 'PE-3', 'PE-4'],
+            'start_time': [parse('2023-09-02'), parse('2023-09-04'), parse('2023-09-01'), parse('2023-09-06')],
+            'status': ['COMPLETED', 'CANCELED', 'COMPLETED', 'COMPLETED'],
+        })
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(extractors, 'FILE_LOCATOR', FileLocator(temp_dir)), \
+                mock.patch.object(extractors.settings, 'PLANNED_EVENT_COMPLETION_INCREMENTAL', True):
+            completion = extractors.PlannedEventCompletion()
+            completion.read_snapshot(clients, events, events_reflections)
+
+            # Changes an event and a reflection, and removes an event.
+            events.at[1, 'recurring_expression'] = {'rrule': 'FREQ=WEEKLY;BYDAY=TU'}
+            events_reflections.loc[2, 'status'] = 'CANCELED'
+            events = events.drop(index=[3])
+
+            with mock.patch.object(completion, '_create_event_completions', wraps=completion._create_event_completions) as create:
+                actual = completion.read_snapshot(clients, events, events_reflections)
+
+                # Only the changed events are expanded again.
+                self.assertEqual(len(create.call_args.args[0].index), 2)
+
+            with open(f'{temp_dir}/planned_event_completions.csv', 'rb') as file:
+                actual_content = file.read()
+
+            os.remove(f'{temp_dir}/planned_event_completions.json')
+            expected = completion.read_snapshot(clients, events, events_reflections)
+
+            with open(f'{temp_dir}/planned_event_completions.csv', 'rb') as file:
+                expected_content = file.read()
+
+        pd.testing.assert_frame_equal(actual, expected)
+        self.assertEqual(actual_content, expected_content)
+
+    def test_read_snapshot_without_fingerprints(self):
+        """
+        Test to ensure the events are neither fingerprinted nor their fingerprints stored
+        when the completions aren't generated incrementally.
+        """
+        clients = pd.DataFrame(data={
+            'client_id': ['CID-1'],
+            'start_time': [parse('2023-08-01')],
+            'end_time': [parse('2023-10-01')],
+        })
+        events = pd.DataFrame(data={
+            'id': ['PE-1'],
+            'recurring_expression': [{'rrule': 'FREQ=DAILY;COUNT=3'}],
+            'client_id': ['CID-1'],
+            'start_time': [parse('2023-09-01T10:30:00')],
+            'end_time': [pd.NaT],
+            'terminated_time': [pd.NaT],
+        })
+        events_reflections = pd.DataFrame(columns=['planned_event_id', 'start_time', 'status'])
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(extractors, 'FILE_LOCATOR', FileLocator(temp_dir)), \
+                mock.patch.object(extractors.settings, 'PLANNED_EVENT_COMPLETION_INCREMENTAL', False):
+            completion = extractors.PlannedEventCompletion()
+
+            with mock.patch.object(completion, '_fingerprint') as fingerprint:
+                actual = completion.read_snapshot(clients, events, events_reflections)
+
+            fingerprint.assert_not_called()
+            self.assertListEqual(os.listdir(temp_dir), ['planned_event_completions.csv'])
+
+        self.assertEqual(len(actual.index), 3)
+
+    def test_read_snapshot_within_windows(self):
+        """
+        Test to ensure the completions generated within the windows of the clients are
+        the same as the completions generated as a whole, within those windows.
+        """
+        clients = pd.DataFrame(data={
+            'client_id': ['CID-1', 'CID-2', 'CID-3'],
+            'start_time': [parse('2023-08-01'), parse('2023-08-01'), parse('2023-08-01')],
+            'end_time': [parse('2023-10-01'), parse('2023-10-01'), parse('2023-10-01')],
+        })
+        events = pd.DataFrame(data={
+            'id': ['PE-1', 'PE-2', 'PE-3', 'PE-4'],
+            'recurring_expression': [
+                {'rrule': 'FREQ=DAILY;COUNT=10'},
+                {'rrule': 'FREQ=WEEKLY;BYDAY=MO,TH'},
+                {'rrule': 'FREQ=DAILY;INTERVAL=2'},
+                {'rrule': 'FREQ=DAILY'},
+            ],
+            'client_id': ['CID-1', 'CID-2', 'CID-1', 'CID-3'],
+            'start_time': [
+                parse('2023-09-01T10:30:00'),
+                parse('2023-08-02T08:00:00'),
+                parse('2023-08-30T08:00:00'),
+                parse('2023-08-05T08:00:00'),
+            ],
+            'end_time': [pd.NaT, parse('2023-09-20'), pd.NaT, pd.NaT],
+            'terminated_time': [pd.NaT, pd.NaT, parse('2023-09-10'), pd.NaT],
+        })
+        events_reflections = pd.DataFrame(data={
+            'planned_event_id': ['PE-1', 'PE-2', 'PE-3', 'PE-4'],
+            'start_time': [parse('2023-09-05'), parse('2023-09-04'), parse('2023-09-01'), parse('2023-09-06')],
+            'status': ['COMPLETED', 'CANCELED', 'COMPLETED', 'COMPLETED'],
+        })
+        windows = pd.DataFrame(
+            data={
+                'from': [parse('2023-09-03T23:59:59.999999'), parse('2023-08-20T23:59:59.999999')],
+                'to': [parse('2023-09-08T23:59:59.999999'), parse('2023-09-14T23:59:59.999999')],
+            },
+            index=['CID-1', 'CID-2']
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir, \
+                mock.patch.object(extractors, 'FILE_LOCATOR', FileLocator(temp_dir)):
+            completion = extractors.PlannedEventCompletion()
+
+            actual = completion.read_snapshot(clients, events, events_reflections, windows=windows)
+
+            # The completions within windows aren't stored.
+            self.assertFalse(os.path.exists(f'{temp_dir}/planned_event_completions.csv'))
+
+            expected = completion.read_snapshot(clients, events, events_reflections)
+
+        client_windows = windows.reindex(expected['client_id'])
+        expected = expected[
+            (expected['start_time'] > client_windows['from'].to_numpy()) &
+            (expected['start_time'] <= client_windows['to'].to_numpy())
+        ]
+
+        pd.testing.assert_frame_equal(actual.reset_index(drop=True), expected.reset_index(drop=True))
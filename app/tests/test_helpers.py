@@ -1,10 +1,15 @@
+import numpy as np
+import pandas as pd
+
 from dateutil.parser import parse
 from json.decoder import JSONDecodeError
 from unittest import TestCase
 
 from app.helpers import (
     max_timestamp,
-    to_dict
+    max_timestamps,
+    to_dict,
+    treatment_timestamps
 )
 
 
@@ -44,6 +49,46 @@ class TestHelpers(TestCase):
         actual = max_timestamp([])
         self.assertIsNone(actual)
 
+    def test_max_timestamps_1(self):
+        """
+        Test to ensure the `max_timestamps` method returns correct result.
+        """
+        actual = max_timestamps([
+            np.array(['2023-09-01', '2023-09-06'], dtype='datetime64[ns]'),
+            np.array(['2023-09-05', '2023-09-02'], dtype='datetime64[ns]'),
+            np.array(['2023-09-03', '2023-09-04'], dtype='datetime64[ns]'),
+        ])
+        expected = np.array(['2023-09-05', '2023-09-06'], dtype='datetime64[ns]')
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_max_timestamps_2(self):
+        """
+        Test to ensure the `max_timestamps` method returns correct result
+        when some timestamps are missing.
+        """
+        actual = max_timestamps([
+            np.array(['2023-09-01', 'NaT'], dtype='datetime64[ns]'),
+            np.array(['NaT', 'NaT'], dtype='datetime64[ns]'),
+            np.array(['2023-09-03', 'NaT'], dtype='datetime64[ns]'),
+        ])
+        expected = np.array(['2023-09-03', 'NaT'], dtype='datetime64[ns]')
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_max_timestamps_3(self):
+        """
+        Test to ensure the `max_timestamps` method returns correct result.
+        """
+        actual = max_timestamps([np.array(['2023-09-01'], dtype='datetime64[ns]')])
+        expected = np.array(['2023-09-01'], dtype='datetime64[ns]')
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_max_timestamps_4(self):
+        """
+        Test to ensure the `max_timestamps` method returns correct result.
+        """
+        actual = max_timestamps([])
+        self.assertEqual(len(actual), 0)
+
     def test_to_dict_1(self):
         """
         Test to ensure the `to_dict` method returns correct result
@@ -84,3 +129,14 @@ class TestHelpers(TestCase):
         # Assert when parameter is invalid stringify JSON
         with self.assertRaises(JSONDecodeError):
             to_dict('{"key": $}')
+
+    def test_treatment_timestamps(self):
+        """
+        Test to ensure the `treatment_timestamps` method returns the timestamps
+        of the treatment snapshots, or the given timestamps as they are.
+        """
+        timestamps = np.array(['2023-09-01', '2023-09-05'], dtype='datetime64[ns]')
+        snapshots = pd.DataFrame(data={'treatment_timestamp': timestamps})
+
+        np.testing.assert_array_equal(treatment_timestamps(snapshots), timestamps)
+        np.testing.assert_array_equal(treatment_timestamps(timestamps), timestamps)
@@ -224,6 +224,247 @@ class TestCriteria(TestCase):
             self.maxDiff = None
             self.assertListEqual(actual__dict, expected__dict)
 
+    def test_create_with_daily_notifications(self):
+        """
+        Test to ensure the daily counts of the notifications produce
+        the same criteria as the raw notifications.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            notifications = pd.DataFrame(data={
+                'client_id': ['C1' for _ in range(0, 5)],
+                'type': ['gscheme_log', 'gscheme_log', 'diary_entry_log', 'gscheme_log', 'diary_entry_log'],
+                'start_time': [
+                    parse('2022-11-01'),
+                    parse('2022-11-01'),
+                    parse('2022-11-03'),
+                    parse('2022-11-10'),
+                    parse('2022-11-10'),
+                ]
+            })
+            daily_notifications = notifications.groupby(['client_id', 'type', 'start_time']).size().reset_index(name='count')
+
+            criteria = self.class_loader()
+            criteria.notifications = notifications
+            expected = criteria._create()
+
+            criteria = self.class_loader()
+            criteria.notifications = daily_notifications
+            actual = criteria._create()
+
+            pd.testing.assert_frame_equal(actual, expected)
+
+            self.assertEqual(expected['g__is_reminder_activated'].sum(), 13)
+            self.assertEqual(expected['i__is_reminder_activated'].sum(), 13)
+
+    def test_create_with_notifications_on_other_days(self):
+        """
+        Test to ensure the notifications of criteria g and i are counted on their own days,
+        not on the days of the diary entries at the same positions.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            criteria = self.class_loader()
+            criteria.notifications = pd.DataFrame(data={
+                'client_id': ['C1', 'C1'],
+                'type': ['gscheme_log', 'diary_entry_log'],
+                'start_time': [parse('2022-11-10 08:00:00'), parse('2022-11-13 08:00:00')],
+            })
+            criteria.diary_entries = pd.DataFrame(data={
+                'client_id': ['C1', 'C1'],
+                'start_time': [parse('2022-10-01 08:00:00'), parse('2022-10-02 08:00:00')],
+            })
+
+            actual = criteria._create().set_index('case_created_at')
+
+            dates = ['2022-10-01', '2022-10-02', '2022-11-09', '2022-11-10', '2022-11-12', '2022-11-13']
+            self.assertListEqual(actual.loc[dates, 'g__is_reminder_activated'].tolist(), [0, 0, 0, 1, 1, 1])
+            self.assertListEqual(actual.loc[dates, 'i__is_reminder_activated'].tolist(), [0, 0, 0, 0, 0, 1])
+            self.assertListEqual(actual.loc[dates, 'i__is_completed'].tolist(), [1, 1, 0, 0, 0, 0])
+
+    def test_negative_registrations_with_raw_values(self):
+        """
+        Test to ensure the raw `value` JSON strings of the custom trackers are converted
+        when their negative registrations aren't precomputed.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            criteria = self.class_loader()
+
+        trackers = pd.DataFrame(data={
+            'name': ['measure_worry', 'measure_safety_behaviour', 'measure_avoidance', 'measure_avoidance', 'measure_custom'],
+            'value': ['{}', '{"boolean": true}', '{"boolean": false}', "{'boolean': True}", None],
+        })
+
+        actual = criteria._negative_registrations(trackers)
+        self.assertListEqual(actual.tolist(), [True, True, False, True, False])
+
+    def test_create_twice(self):
+        """
+        Test to ensure the criteria are created again from the snapshots that are already prepared.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            criteria = self.class_loader()
+            expected = criteria._create()
+            actual = criteria._create()
+
+            pd.testing.assert_frame_equal(actual, expected)
+
+    def test_create_without_encoded_ids(self):
+        """
+        Test to ensure the encoded client IDs produce the same criteria as the raw client IDs.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            expected = self.class_loader()._create()
+
+            with mock.patch.object(loaders.settings, 'ENCODE_IDS', False):
+                actual = self.class_loader()._create()
+
+            pd.testing.assert_frame_equal(actual, expected)
+
+    def test_create_with_day_ordinals(self):
+        """
+        Test to ensure the windows filtered on day ordinals produce the same criteria as the date-times.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            expected = self.class_loader()._create()
+
+            with mock.patch.object(loaders.settings, 'DAY_ORDINALS', True):
+                criteria = self.class_loader()
+                actual = criteria._create()
+
+            pd.testing.assert_frame_equal(actual, expected)
+            self.assertNotIn('start_time', criteria.notifications.columns)
+
+    def test_create_with_windows_of_days(self):
+        """
+        Test to ensure the criteria count the rows within the windows of days before every snapshot,
+        i.e. on the snapshot's day and the six days before it (1-7), and on the seven days before that (8-14).
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            criteria = self.class_loader()
+            criteria.custom_trackers = pd.DataFrame(data={
+                'client_id': ['C1', 'C1', 'C1'],
+                'start_time': [parse('2022-11-08 12:00:00'), parse('2022-11-14 23:59:59'), parse('2022-11-15 00:00:00')],
+                'name': ['measure_worry', 'measure_worry', 'measure_worry'],
+                'value': [{}, {}, {}],
+            })
+            criteria.notifications = pd.DataFrame(data={
+                'client_id': ['C1', 'C1', 'C1'],
+                'type': ['gscheme_log', 'gscheme_log', 'diary_entry_log'],
+                'start_time': [parse('2022-11-02 12:00:00'), parse('2022-11-10 08:00:00'), parse('2022-11-13 08:00:00')],
+            })
+            criteria.diary_entries = pd.DataFrame(data={
+                'client_id': ['C1'],
+                'start_time': [parse('2022-11-14 09:00:00')],
+            })
+
+            actual = criteria._create().set_index('case_created_at')
+
+            dates = ['2022-11-07', '2022-11-08', '2022-11-09', '2022-11-10', '2022-11-13', '2022-11-14', '2022-11-15']
+            expected = pd.DataFrame(
+                data={
+                    'c': [0, 1, 1, 1, 1, 2, 2],
+                    'd': [1, 2, 2, 2, 2, 3, 2],
+                    'g__is_reminder_activated': [1, 1, 0, 1, 1, 1, 1],
+                    'i__is_reminder_activated': [0, 0, 0, 0, 1, 1, 1],
+                    'i__is_completed': [0, 0, 0, 0, 0, 1, 1],
+                },
+                index=pd.Index(dates, name='case_created_at')
+            )
+
+            pd.testing.assert_frame_equal(actual.loc[dates, expected.columns], expected, check_dtype=False)
+
+    def test_create_with_pruned_snapshots(self):
+        """
+        Test to ensure the pruned snapshots produce the same criteria as the whole snapshots.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            with mock.patch.object(loaders.settings, 'PRUNE_SNAPSHOTS', False):
+                expected = self.class_loader()._create()
+
+            criteria = self.class_loader()
+            custom_trackers_count = len(criteria.custom_trackers.index)
+            actual = criteria._create()
+
+            pd.testing.assert_frame_equal(actual, expected)
+            self.assertLess(len(criteria.custom_trackers.index), custom_trackers_count)
+
+    def test_create_with_lazy_completions(self):
+        """
+        Test to ensure the lazy planned event completions are generated within the treatment windows
+        and produce the same criteria as the eager ones.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            expected = self.class_loader()._create()
+
+            with mock.patch.object(loaders.settings, 'LAZY_PLANNED_EVENT_COMPLETIONS', True):
+                self.mock_read_snapshot_event_completion.target.read_snapshot.reset_mock()
+
+                criteria = self.class_loader()
+                self.assertIsNone(criteria.events_completions)
+
+                actual = criteria._create()
+
+            read_snapshot = self.mock_read_snapshot_event_completion.target.read_snapshot
+            windows = read_snapshot.call_args.kwargs['windows']
+
+            pd.testing.assert_frame_equal(actual, expected)
+            self.assertEqual(read_snapshot.call_count, 1)
+            # The windows are keyed by the client IDs, not by their codes.
+            self.assertListEqual(list(windows.index), ['C1'])
+
+    def test_prune_snapshot(self):
+        """
+        Test to ensure the rows out of the windows are pruned, except the latest ones before the windows.
+        """
+        criteria = self.class_loader()
+
+        windows = pd.DataFrame(
+            data={'from': [parse('2022-11-01T23:59:59.999999')], 'to': [parse('2022-11-20T23:59:59.999999')]},
+            index=['C1']
+        )
+        communications = pd.DataFrame(data={
+            'client_id': ['C1', 'C1', 'C1', 'C1', 'C1', 'C2'],
+            'start_time': [
+                parse('2022-10-01'),
+                parse('2022-10-02'),
+                parse('2022-10-03'),
+                parse('2022-11-05'),
+                parse('2022-11-21'),
+                parse('2022-11-05'),
+            ],
+            'call_made': [True, True, False, True, True, True],
+            'chat_msg_sent': [True, False, True, False, False, True],
+        })
+
+        actual = criteria._prune_snapshot(communications, windows, ['call_made', 'chat_msg_sent'])
+        self.assertListEqual(actual.index.tolist(), [1, 2, 3])
+
+        actual = criteria._prune_snapshot(communications, windows, True)
+        self.assertListEqual(actual.index.tolist(), [2, 3])
+
+        actual = criteria._prune_snapshot(communications, windows, False)
+        self.assertListEqual(actual.index.tolist(), [3])
+
+        actual = criteria._prune_snapshot(communications, windows, None)
+        self.assertListEqual(actual.index.tolist(), [0, 1, 2, 3])
+
     def test_compute_case_id(self):
         """
         Test to ensure the `compute_case_id` method returns correct Case ID.
@@ -233,3 +474,72 @@ class TestCriteria(TestCase):
         actual = criteria._compute_case_id('CID-1', 'TID-1', parse('2023-10-05'))
         expected = 'a3c2c63911d765afb8f6ec7bf69fcc1c'
         self.assertEqual(actual, expected)
+
+    def test_for_client(self):
+        """
+        Test to ensure the criteria of a single client on a single date
+        are the same as the criteria of their treatment snapshot on that day.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            expected = self.class_loader()._create()
+
+            for settings_name in ['ENCODE_IDS', 'DAY_ORDINALS']:
+                with mock.patch.object(loaders.settings, settings_name, not getattr(loaders.settings, settings_name)):
+                    criteria = self.class_loader()
+                    actual = pd.DataFrame([
+                        criteria.for_client(client_id, parse(case_created_at))
+                        for client_id, case_created_at in zip(expected['client_id'], expected['case_created_at'])
+                    ])
+
+                pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+            with self.assertRaises(ValueError):
+                criteria.for_client(expected['client_id'].iloc[0], parse('2000-01-01'))
+
+    def test_for_client_after_create(self):
+        """
+        Test to ensure the criteria of a single client are looked up in the snapshots
+        that are already prepared by the creation of the criteria.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            with mock.patch.object(
+                loaders, 'communications_to_treatment_frame', wraps=loaders.communications_to_treatment_frame
+            ) as mock_treatment_frame:
+                criteria = self.class_loader()
+                expected = criteria._create()
+
+                actual = pd.DataFrame([
+                    criteria.for_client(client_id, parse(case_created_at))
+                    for client_id, case_created_at in zip(expected['client_id'], expected['case_created_at'])
+                ])
+
+                pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+                pd.testing.assert_frame_equal(criteria._create(), expected)
+
+                mock_treatment_frame.assert_called_once()
+
+    def test_for_client_with_several_client_infos(self):
+        """
+        Test to ensure the criteria of a single client have the therapist of the client info of their snapshot
+        when the client has several client infos, e.g. after a change of their therapist.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            criteria = self.class_loader()
+            criteria.clients = pd.concat([criteria.clients, criteria.clients.assign(therapist_id='T2')], ignore_index=True)
+
+            created = criteria._create()
+
+            # The snapshots of the first client info are looked up, since both client infos have the same snapshots.
+            expected = created.drop_duplicates(['client_id', 'case_created_at'], keep='first').reset_index(drop=True)
+            actual = pd.DataFrame([
+                criteria.for_client(client_id, parse(case_created_at))
+                for client_id, case_created_at in zip(expected['client_id'], expected['case_created_at'])
+            ])
+
+            pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
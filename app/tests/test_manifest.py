@@ -0,0 +1,91 @@
+import os
+import tempfile
+
+from datetime import datetime, timedelta
+from unittest import TestCase
+
+from app.manifest import SnapshotManifest
+from app.settings import FileLocator
+
+
+class TestSnapshotManifest(TestCase):
+    """
+    Test the `SnapshotManifest`.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_locator = FileLocator(self.temp_dir.name)
+
+        self.path = f'{self.temp_dir.name}/users.csv'
+        with open(self.path, 'w') as file:
+            file.write('client_id,notes\nCID-1,"multi\nline"\nCID-2,\n')
+
+        self.downloaded_at = datetime(2023, 10, 5, 8)
+
+        manifest = SnapshotManifest(self.file_locator)
+        manifest.record('users.csv', manifest.describe(self.path, self.downloaded_at))
+        manifest.save()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_describe(self):
+        """
+        Test to ensure the rows are counted as CSV records.
+        """
+        entry = SnapshotManifest(self.file_locator).entries['users.csv']
+
+        self.assertEqual(entry['rows'], 2)
+        self.assertEqual(entry['downloaded_at'], '2023-10-05T08:00:00')
+        self.assertEqual(entry['changed_at'], '2023-10-05T08:00:00')
+
+    def test_is_fresh(self):
+        """
+        Test to ensure a snapshot is fresh within its TTL only.
+        """
+        manifest = SnapshotManifest(self.file_locator)
+
+        self.assertTrue(manifest.is_fresh('users.csv', timedelta(hours=24), now=datetime(2023, 10, 6, 7)))
+        self.assertFalse(manifest.is_fresh('users.csv', timedelta(hours=24), now=datetime(2023, 10, 6, 9)))
+        self.assertFalse(manifest.is_fresh('users.csv', timedelta(0), now=datetime(2023, 10, 5, 8)))
+        self.assertFalse(manifest.is_fresh('planned_events.csv', timedelta(hours=24), now=datetime(2023, 10, 5, 8)))
+
+    def test_is_fresh_modified_snapshot(self):
+        """
+        Test to ensure a snapshot that was modified since its download is stale.
+        """
+        with open(self.path, 'a') as file:
+            file.write('CID-3,\n')
+
+        manifest = SnapshotManifest(self.file_locator)
+        self.assertFalse(manifest.is_fresh('users.csv', timedelta(hours=24), now=datetime(2023, 10, 5, 9)))
+
+    def test_is_fresh_rewritten_snapshot(self):
+        """
+        Test to ensure a snapshot that was rewritten with the same size since its download is stale,
+        unless its content is unchanged.
+        """
+        with open(self.path, 'r') as file:
+            content = file.read()
+
+        with open(self.path, 'w') as file:
+            file.write(content)
+        os.utime(self.path, ns=(0, 0))
+
+        manifest = SnapshotManifest(self.file_locator)
+        self.assertTrue(manifest.is_fresh('users.csv', timedelta(hours=24), now=datetime(2023, 10, 5, 9)))
+
+        with open(self.path, 'w') as file:
+            file.write(content.replace('CID-2', 'CID-3'))
+
+        self.assertFalse(manifest.is_fresh('users.csv', timedelta(hours=24), now=datetime(2023, 10, 5, 9)))
+
+    def test_record_unchanged_content(self):
+        """
+        Test to ensure the change time is kept when the content of the snapshot is unchanged.
+        """
+        manifest = SnapshotManifest(self.file_locator)
+        manifest.record('users.csv', manifest.describe(self.path, datetime(2023, 10, 6, 8)))
+
+        self.assertEqual(manifest.entries['users.csv']['changed_at'], '2023-10-05T08:00:00')
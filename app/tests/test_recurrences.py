@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+import random
+import warnings
+
+from datetime import datetime, timedelta
+from dateutil.parser import parse
+from dateutil.rrule import rrulestr
+from unittest import TestCase
+
+from app.recurrences import RecurrenceExpander
+
+
+class TestRecurrenceExpander(TestCase):
+    """
+    Test the `RecurrenceExpander`.
+    """
+
+    def expected_instances(self, rrules, start_times, end_times):
+        """
+        Expands those `rrules` with `dateutil`, one by one.
+        """
+        with warnings.catch_warnings():
+            # Using both the count and the until date is deprecated by `dateutil`.
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            return [
+                (event, timestamp)
+                for event, (rrule, start_time, end_time) in enumerate(zip(rrules, start_times, end_times))
+                for timestamp in rrulestr(rrule, dtstart=start_time).between(start_time, end_time, inc=True)
+            ]
+
+    def actual_instances(self, rrules, start_times, end_times):
+        """
+        Expands those `rrules` with the `RecurrenceExpander`.
+        """
+        instances = RecurrenceExpander().expand(pd.Series(rrules), pd.Series(start_times), pd.Series(end_times))
+        return list(zip(instances['event'].tolist(), instances['timestamp'].dt.to_pydatetime().tolist()))
+
+    def random_rrule(self, rng, dtstart):
+        """
+        Returns a random recurring expression of a common shape.
+        """
+        parts = [f"FREQ={rng.choice(['DAILY', 'WEEKLY'])}"]
+
+        if rng.random() < 0.3:
+            parts.append(f'INTERVAL={rng.randint(1, 3)}')
+
+        if rng.random() < 0.5:
+            parts.append(f'COUNT={rng.randint(1, 30)}')
+
+        if rng.random() < 0.5:
+            until = dtstart + timedelta(days=rng.randint(-2, 60), hours=rng.randint(-12, 12))
+            parts.append(f"UNTIL={until.strftime('%Y%m%dT%H%M%S')}")
+
+        if parts[0] == 'FREQ=WEEKLY' and rng.random() < 0.7:
+            parts.append(f"BYDAY={','.join(rng.sample(RecurrenceExpander.WEEKDAYS, rng.randint(1, 4)))}")
+
+        rng.shuffle(parts)
+        lines = [f"DTSTART:{dtstart.strftime('%Y%m%dT%H%M%S')}", f"RRULE:{';'.join(parts)}"]
+
+        if rng.random() < 0.3:
+            exdates = [dtstart + timedelta(days=rng.randint(0, 20)) for _ in range(rng.randint(1, 3))]
+            lines.append(f"EXDATE:{','.join(exdate.strftime('%Y%m%dT%H%M%S') for exdate in exdates)}")
+
+        return '\n'.join(lines)
+
+    def test_expand_common_shapes(self):
+        """
+        Test to ensure the common shapes of the recurring expressions are expanded into
+        the same instances as `dateutil` does (differential test).
+        """
+        rng = random.Random(0)
+
+        rrules, start_times, end_times = [], [], []
+        for _ in range(500):
+            dtstart = datetime(2023, 1, 1, 8, 0, 0) + timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86399))
+
+            # The start time is mostly the start of the rule, but it can be later or have microseconds.
+            start_time = dtstart + rng.choice([
+                timedelta(0),
+                timedelta(microseconds=rng.randint(1, 999999)),
+                timedelta(days=rng.randint(1, 10), hours=rng.randint(0, 23)),
+            ])
+
+            rrules.append(self.random_rrule(rng, dtstart))
+            start_times.append(start_time)
+            end_times.append(start_time + timedelta(days=rng.randint(0, 90)))
+
+        rules = [RecurrenceExpander().parse(rrule, start_time) for rrule, start_time in zip(rrules, start_times)]
+        self.assertTrue(all(rule is not None for rule in rules))
+
+        self.assertListEqual(
+            self.actual_instances(rrules, start_times, end_times),
+            self.expected_instances(rrules, start_times, end_times)
+        )
+
+    def test_expand_after_times(self):
+        """
+        Test to ensure the instances before the after times are left out,
+        while the counts of the rules still include them (differential test).
+        """
+        rng = random.Random(1)
+
+        rrules, start_times, after_times, end_times = [], [], [], []
+        for _ in range(300):
+            dtstart = datetime(2023, 1, 1, 8, 0, 0) + timedelta(days=rng.randint(0, 365), seconds=rng.randint(0, 86399))
+
+            rrules.append(self.random_rrule(rng, dtstart))
+            start_times.append(dtstart)
+            after_times.append(dtstart + timedelta(days=rng.randint(-5, 30), hours=rng.randint(0, 23)))
+            end_times.append(dtstart + timedelta(days=rng.randint(0, 90)))
+
+        rrules.append('DTSTART:20230905T103000\nRRULE:FREQ=MONTHLY;BYDAY=+1TU;COUNT=5')
+        start_times.append(parse('2023-09-05T10:30:00'))
+        after_times.append(parse('2023-11-01'))
+        end_times.append(parse('2024-06-01'))
+
+        instances = RecurrenceExpander().expand(
+            pd.Series(rrules), pd.Series(start_times), pd.Series(end_times), pd.Series(after_times)
+        )
+        actual = list(zip(instances['event'].tolist(), instances['timestamp'].dt.to_pydatetime().tolist()))
+
+        expected = [
+            (event, timestamp)
+            for event, timestamp in self.expected_instances(rrules, start_times, end_times)
+            if timestamp >= after_times[event]
+        ]
+        self.assertListEqual(actual, expected)
+
+    def test_expand_without_dtstart(self):
+        """
+        Test to ensure the rules without their own start are expanded from the start time.
+        """
+        rrules = ['RRULE:FREQ=DAILY;COUNT=3', 'RRULE:FREQ=WEEKLY;BYDAY=MO,FR']
+        start_times = [parse('2023-09-01T10:30:00.500'), parse('2023-09-01T10:30:00')]
+        end_times = [parse('2023-09-30'), parse('2023-09-15')]
+
+        self.assertListEqual(
+            self.actual_instances(rrules, start_times, end_times),
+            self.expected_instances(rrules, start_times, end_times)
+        )
+
+    def test_expand_exotic_shapes(self):
+        """
+        Test to ensure the other shapes of the recurring expressions are expanded by `dateutil`.
+        """
+        rrules = [
+            'DTSTART:20230905T103000\nRRULE:FREQ=MONTHLY;BYDAY=+4TU',
+            'DTSTART:20230901T103000\nRRULE:FREQ=DAILY;COUNT=3',
+            'DTSTART:20230901T103000\nRRULE:FREQ=DAILY;BYHOUR=9,18;COUNT=4',
+        ]
+        start_times = [parse('2023-09-05T10:30:00'), parse('2023-09-01T10:30:00'), parse('2023-09-01T10:30:00')]
+        end_times = [parse('2024-01-01'), parse('2024-01-01'), parse('2024-01-01')]
+
+        expander = RecurrenceExpander()
+        self.assertIsNone(expander.parse(rrules[0], start_times[0]))
+        self.assertIsNotNone(expander.parse(rrules[1], start_times[1]))
+        self.assertIsNone(expander.parse(rrules[2], start_times[2]))
+
+        self.assertListEqual(
+            self.actual_instances(rrules, start_times, end_times),
+            self.expected_instances(rrules, start_times, end_times)
+        )
+
+    def test_expand_without_events(self):
+        """
+        Test to ensure no instances are expanded when there are no events.
+        """
+        instances = RecurrenceExpander().expand(pd.Series([], dtype=object), pd.Series([], dtype=object), pd.Series([], dtype=object))
+
+        self.assertTrue(instances.empty)
+        self.assertEqual(instances['timestamp'].dtype, np.dtype('datetime64[ns]'))
@@ -7,6 +7,7 @@ from dateutil.parser import parse
 from unittest import TestCase
 
 from app.transformators.communications_to_treatment_snapshots import (
+    communications_to_treatment_frame,
     communications_to_treatment_snapshots,
     _to_client_treatments,
     _create_snapshot_lists_from,
@@ -109,6 +110,69 @@ class TestCommunicationsToTreatmentSnapshots(TestCase):
             ]
             self.assertListEqual(actual__treatments, expected__treatments)
 
+    def test_communications_to_treatment_frame_1(self):
+        """
+        Test to ensure the `communications_to_treatment_frame` method
+        returns the same snapshots as the `communications_to_treatment_snapshots` method, in the same order.
+        """
+        clients = pd.DataFrame(data={
+            'client_id': ['cid-2', 'cid-1', 'cid-3'],
+            'therapist_id': ['tid-2', 'tid-1', 'tid-1'],
+            'start_time': [parse('2023-08-01T10:00:00'), parse('2023-09-01T09:00:00'), parse('2023-09-10')],
+            'end_time': [parse('2023-10-30'), parse('2023-11-30'), parse('2023-11-30')],
+            'no_of_registrations': [8, 13, 2]
+        })
+
+        # Client 1 has two calls on the same day, client 2 has chats between their calls,
+        # and client 3 hasn't got any treatment yet.
+        call_days = {'cid-1': [0, 1, 2, 2, 9, 16, 30], 'cid-2': list(range(0, 14 * 7, 7)), 'cid-3': [0, 7]}
+        communications = pd.DataFrame(data={
+            'client_id': [client_id for client_id, days in call_days.items() for _ in days] + ['cid-2', 'cid-2'],
+            'start_time': [
+                clients.set_index('client_id').loc[client_id, 'start_time'] + timedelta(days=day, hours=day % 3)
+                for client_id, days in call_days.items() for day in days
+            ] + [parse('2023-08-05'), parse('2023-08-12')],
+            'call_made': [True for days in call_days.values() for _ in days] + [False, False],
+            'chat_msg_sent': [False for days in call_days.values() for _ in days] + [True, True]
+        }).sample(frac=1, random_state=0)
+
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+            treatment_snapshots = communications_to_treatment_snapshots(clients, communications)
+
+        actual = communications_to_treatment_frame(clients, communications)
+
+        expected = pd.DataFrame(data={
+            'client_position': [clients.index.get_loc(t['client_info'].name) for t in treatment_snapshots],
+            'client_id': [t['client_info']['client_id'] for t in treatment_snapshots],
+            'treatment_phase': [t['treatment_phase'] for t in treatment_snapshots],
+            'treatment_timestamp': [t['treatment_timestamp'] for t in treatment_snapshots],
+        })
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_communications_to_treatment_frame_2(self):
+        """
+        Test to ensure the `communications_to_treatment_frame` method raise `ValueError`
+        if the date of client's first call is not equal with the date of client's first treatment.
+        """
+        clients = pd.DataFrame(data={
+            'client_id': ['cid-1', 'cid-2'],
+            'therapist_id': ['tid-1', 'tid-2'],
+            'start_time': [parse('2023-09-01'), parse('2023-09-01')],
+            'end_time': [parse('2023-09-30'), parse('2023-09-30')],
+            'no_of_registrations': [13, 8]
+        })
+        communications = pd.DataFrame(data={
+            'client_id': ['cid-1', 'cid-2'],
+            'start_time': [parse('2023-09-01'), parse('2023-09-02')],
+            'call_made': [True, True],
+            'chat_msg_sent': [True, True]
+        })
+
+        with self.assertRaisesRegex(ValueError, 'cid-2'):
+            communications_to_treatment_frame(clients, communications)
+
     def test_to_client_treatments_1(self):
         """
         Test to ensure the `_to_client_treatments` method raise `ValueError`
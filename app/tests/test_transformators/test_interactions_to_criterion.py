@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 from dateutil.parser import parse
@@ -5,6 +6,7 @@ from unittest import TestCase
 
 from app.transformators.interactions_to_criterion import (
     interactions_to_criterion,
+    interactions_to_criterion_batch,
 )
 
 
@@ -126,3 +128,26 @@ class TestInteractionsToCriterion(TestCase):
         actual = interactions_to_criterion(communications, sessions, snapshot_timestamp)
         expected = (None, None)
         self.assertEqual(actual, expected)
+
+    def test_interactions_to_criterion_batch(self):
+        """
+        Test to ensure the `interactions_to_criterion_batch` method
+        returns the days since the last contacts at every snapshot, or `NaN` when there's none.
+        """
+        snapshots = pd.DataFrame(data={
+            'treatment_timestamp': [parse('2023-09-10'), parse('2023-09-10')]
+        })
+        last_calls = np.array([parse('2023-09-03'), None], dtype='datetime64[ns]')
+        last_sessions = np.array([parse('2023-09-07'), None], dtype='datetime64[ns]')
+        last_chats = np.array([None, parse('2023-09-09')], dtype='datetime64[ns]')
+
+        actual = interactions_to_criterion_batch(snapshots, last_calls, last_sessions, last_chats)
+        np.testing.assert_array_equal(actual[0], [3, np.nan])
+        np.testing.assert_array_equal(actual[1], [np.nan, 1])
+
+        # The timestamps of the snapshots can be given instead of the snapshots
+        actual = interactions_to_criterion_batch(
+            snapshots['treatment_timestamp'].to_numpy(), last_calls, last_sessions, last_chats
+        )
+        np.testing.assert_array_equal(actual[0], [3, np.nan])
+        np.testing.assert_array_equal(actual[1], [np.nan, 1])
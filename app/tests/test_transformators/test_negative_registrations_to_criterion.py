@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 from datetime import timedelta
@@ -6,6 +7,7 @@ from unittest import TestCase
 
 from app.transformators.negative_registrations_to_criterion import (
     negative_registrations_to_criterion,
+    negative_registrations_to_criterion_batch,
     _total_neg_regs,
     _to_criterion,
 )
@@ -309,6 +311,38 @@ class TestNegativeRegistrationsToCriterion(TestCase):
         expected = 4
         self.assertEqual(actual, expected)
 
+    def test_total_neg_regs_with_typed_columns(self):
+        """
+        Test to ensure the `_total_neg_regs` method counts the precomputed negative registrations.
+        """
+        trackers = pd.DataFrame(data={
+            'client_id': ['cid-1' for _ in range(0, 5)],
+            'start_time': [parse('2021-03-02T00:00:00') + timedelta(days=d) for d in range(0, 5)],
+            'name': ['measure_worry', 'measure_safety_behaviour', 'measure_safety_behaviour', 'measure_avoidance', 'measure_avoidance'],
+            'value': ['{}', '{"boolean": true}', '{"boolean": false}', '{"boolean": true}', '{"boolean": false}'],
+            'is_negative_registration': [True, True, False, True, False]
+        })
+
+        actual = _total_neg_regs(trackers)
+        expected = 3
+        self.assertEqual(actual, expected)
+
+    def test_total_neg_regs_with_raw_values(self):
+        """
+        Test to ensure the `_total_neg_regs` method converts the raw `value` JSON strings
+        when the negative registrations aren't precomputed.
+        """
+        trackers = pd.DataFrame(data={
+            'client_id': ['cid-1' for _ in range(0, 5)],
+            'start_time': [parse('2021-03-02T00:00:00') + timedelta(days=d) for d in range(0, 5)],
+            'name': ['measure_worry', 'measure_safety_behaviour', 'measure_safety_behaviour', 'measure_avoidance', 'measure_avoidance'],
+            'value': ['{}', '{"boolean": true}', '{"boolean": false}', '{"boolean": true}', '{"boolean": false}']
+        })
+
+        actual = _total_neg_regs(trackers)
+        expected = 3
+        self.assertEqual(actual, expected)
+
     def test_to_criterion_1(self):
         """
         Test to ensure the `_to_criterion` method returns correct criterion.
@@ -340,3 +374,18 @@ class TestNegativeRegistrationsToCriterion(TestCase):
         actual = _to_criterion(-20)
         expected = 0  # Decrease
         self.assertEqual(actual, expected)
+
+    def test_negative_registrations_to_criterion_batch(self):
+        """
+        Test to ensure the `negative_registrations_to_criterion_batch` method
+        returns the same criteria as `_to_criterion` for every snapshot.
+        """
+        total_neg_regs_past_7d = np.array([0, 10, 3, 1])
+        total_neg_regs_1w_before_past_7d = np.array([0, 1, 2, 3])
+
+        actual = negative_registrations_to_criterion_batch(total_neg_regs_past_7d, total_neg_regs_1w_before_past_7d)
+        expected = [
+            _to_criterion(((regs_past_7d - regs_1w_before) / (regs_1w_before + 1)) * 100)
+            for regs_past_7d, regs_1w_before in zip(total_neg_regs_past_7d, total_neg_regs_1w_before_past_7d)
+        ]
+        self.assertEqual(actual.tolist(), expected)
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 from dateutil.parser import parse
@@ -5,6 +6,7 @@ from unittest import TestCase
 
 from app.transformators.planned_events_to_criterion import (
     planned_events_to_criterion,
+    planned_events_to_criterion_batch,
 )
 
 
@@ -76,3 +78,16 @@ class TestPlannedEventsToCriterion(TestCase):
         actual = planned_events_to_criterion(events_completion)
         expected = (1, 2)  # Planned, some complete
         self.assertEqual(actual, expected)
+
+    def test_planned_events_to_criterion_batch(self):
+        """
+        Test to ensure the `planned_events_to_criterion_batch` method
+        returns the same criteria as `planned_events_to_criterion` for every snapshot.
+        """
+        events_counts = np.array([0, 1, 2, 2])
+        incomplete_events_counts = np.array([0, 1, 1, 0])
+
+        actual = planned_events_to_criterion_batch(events_counts, incomplete_events_counts)
+        expected = ([0, 1, 1, 1], [0, 1, 2, 3])  # Not planned, incomplete, some complete, complete
+        self.assertEqual(actual[0].tolist(), expected[0])
+        self.assertEqual(actual[1].tolist(), expected[1])
@@ -192,6 +192,39 @@ class TestPositiveRegistrationsToCriterion(TestCase):
         expected = 2
         self.assertEqual(actual, expected)
 
+    def test_total_pos_regs_with_typed_columns(self):
+        """
+        Test to ensure the `_total_pos_regs` method counts the avoidances and the safety behaviours
+        that aren't precomputed as negative registrations.
+        """
+        trackers = pd.DataFrame(data={
+            'client_id': ['cid-1' for _ in range(0, 5)],
+            'start_time': [parse('2021-03-02T00:00:00') + timedelta(days=d) for d in range(0, 5)],
+            'name': ['measure_worry', 'measure_safety_behaviour', 'measure_safety_behaviour', 'measure_avoidance', 'measure_avoidance'],
+            'value': ['{}', '{"boolean": true}', '{"boolean": false}', '{"boolean": true}', '{"boolean": false}'],
+            'is_negative_registration': [True, True, False, True, False]
+        })
+
+        actual = _total_pos_regs(trackers)
+        expected = 2
+        self.assertEqual(actual, expected)
+
+    def test_total_pos_regs_with_raw_values(self):
+        """
+        Test to ensure the `_total_pos_regs` method converts the raw `value` JSON strings
+        when the positive registrations aren't precomputed.
+        """
+        trackers = pd.DataFrame(data={
+            'client_id': ['cid-1' for _ in range(0, 5)],
+            'start_time': [parse('2021-03-02T00:00:00') + timedelta(days=d) for d in range(0, 5)],
+            'name': ['measure_worry', 'measure_safety_behaviour', 'measure_safety_behaviour', 'measure_avoidance', 'measure_avoidance'],
+            'value': ['{}', '{"boolean": true}', '{"boolean": false}', '{"boolean": true}', '{"boolean": false}']
+        })
+
+        actual = _total_pos_regs(trackers)
+        expected = 2
+        self.assertEqual(actual, expected)
+
     def test_to_criterion_1(self):
         """
         Test to ensure the `_to_criterion` method returns correct criterion.
@@ -1,21 +1,59 @@
-from app.transformators.communications_to_treatment_snapshots import communications_to_treatment_snapshots
-from app.transformators.diary_entries_to_criterion import diary_entries_to_criterion
-from app.transformators.interactions_to_criterion import interactions_to_criterion
-from app.transformators.negative_registrations_to_criterion import negative_registrations_to_criterion
-from app.transformators.planned_events_to_criterion import planned_events_to_criterion
-from app.transformators.positive_registrations_to_criterion import positive_registrations_to_criterion
-from app.transformators.registrations_to_criterion import registrations_to_criterion
-from app.transformators.smqs_to_criterion import smqs_to_criterion
-from app.transformators.thought_records_to_criterion import thought_records_to_criterion
+from app.transformators.communications_to_treatment_snapshots import (
+    communications_to_treatment_frame,
+    communications_to_treatment_snapshots,
+)
+from app.transformators.diary_entries_to_criterion import (
+    diary_entries_to_criterion,
+    diary_entries_to_criterion_batch,
+)
+from app.transformators.interactions_to_criterion import (
+    interactions_to_criterion,
+    interactions_to_criterion_batch,
+)
+from app.transformators.negative_registrations_to_criterion import (
+    negative_registrations_to_criterion,
+    negative_registrations_to_criterion_batch,
+)
+from app.transformators.planned_events_to_criterion import (
+    planned_events_to_criterion,
+    planned_events_to_criterion_batch,
+)
+from app.transformators.positive_registrations_to_criterion import (
+    positive_registrations_to_criterion,
+    positive_registrations_to_criterion_batch,
+)
+from app.transformators.registrations_to_criterion import (
+    registrations_to_criterion,
+    registrations_to_criterion_batch,
+)
+from app.transformators.smqs_to_criterion import (
+    smqs_to_criterion,
+    smqs_to_criterion_batch,
+    smqs_to_scores,
+)
+from app.transformators.thought_records_to_criterion import (
+    thought_records_to_criterion,
+    thought_records_to_criterion_batch,
+)
 
 __all__ = [
+    'communications_to_treatment_frame',
     'communications_to_treatment_snapshots',
     'diary_entries_to_criterion',
+    'diary_entries_to_criterion_batch',
     'interactions_to_criterion',
+    'interactions_to_criterion_batch',
     'negative_registrations_to_criterion',
+    'negative_registrations_to_criterion_batch',
     'planned_events_to_criterion',
+    'planned_events_to_criterion_batch',
     'positive_registrations_to_criterion',
+    'positive_registrations_to_criterion_batch',
     'registrations_to_criterion',
+    'registrations_to_criterion_batch',
     'smqs_to_criterion',
-    'thought_records_to_criterion'
+    'smqs_to_criterion_batch',
+    'smqs_to_scores',
+    'thought_records_to_criterion',
+    'thought_records_to_criterion_batch'
 ]
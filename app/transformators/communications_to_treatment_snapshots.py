@@ -1,4 +1,5 @@
 import itertools
+import numpy as np
 import pandas as pd
 
 from datetime import datetime
@@ -15,6 +16,9 @@ TREATMENT__PHASE_END = 2
 # and it doesn't counts as an online-treatment.
 SESSION_COUNTS = [2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13]
 
+# Number of days of the snapshots before the first treatment of the client.
+DAYS_BEFORE_FIRST_TREATMENT = 14
+
 
 def communications_to_treatment_snapshots(
     clients: pd.DataFrame,
@@ -34,6 +38,76 @@ def communications_to_treatment_snapshots(
     return list(itertools.chain(*snapshot_lists))
 
 
+def communications_to_treatment_frame(
+    clients: pd.DataFrame,
+    communications: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Transforms the clients and their communications data
+    into the time series before the first treatment is occurred, as a single dataframe.
+
+    Returns the same snapshots as `communications_to_treatment_snapshots()`, in the same order,
+    with the position of their client in `clients` (`client_position`), the `client_id`,
+    the `treatment_phase`, and the `treatment_timestamp` of every snapshot.
+    """
+    clients = clients.reset_index(drop=True)
+    treatments = _to_treatments(clients, communications)
+
+    # Generates the snapshots between the current and previous treatment of the client,
+    # or 14 days before the first treatment of the client.
+    previous_timestamps = treatments.groupby('client_id', sort=False)['treatment_timestamp'].shift()
+    days_before = ((treatments['treatment_timestamp'] - previous_timestamps) // pd.Timedelta(days=1))\
+        .fillna(DAYS_BEFORE_FIRST_TREATMENT)\
+        .clip(lower=0)\
+        .to_numpy(dtype=np.int64)
+
+    # Every treatment is repeated for each of its days before, and the days count from zero for each of them.
+    positions = np.repeat(np.arange(len(treatments.index)), days_before)
+    days = np.arange(len(positions)) - np.repeat(np.cumsum(days_before) - days_before, days_before)
+
+    snapshots = treatments.iloc[positions].reset_index(drop=True)
+    snapshots['treatment_timestamp'] = snapshots['treatment_timestamp'] - pd.to_timedelta(days, unit='D')
+
+    return snapshots
+
+
+def _to_treatments(clients: pd.DataFrame, communications: pd.DataFrame) -> pd.DataFrame:
+    """
+    Returns the treatments of every client, ordered by the position of their client and their timestamp.
+    """
+    # Filters communication data to the audio/video calls, and sorts them in ascending order.
+    calls = communications.loc[communications['call_made'], ['client_id', 'start_time']]\
+        .sort_values('start_time', kind='stable')\
+        .reset_index(drop=True)
+    calls['call'] = calls.groupby('client_id', sort=False).cumcount()
+
+    # Ensures the first timestamp of the client's audio/video call
+    # equals to the timestamp of the client's first call (defined as `start_time`).
+    first_call_dates = calls[calls['call'] == 0].set_index('client_id')['start_time']
+    is_valid = (first_call_dates.reindex(clients['client_id']).to_numpy() == clients['start_time'].to_numpy())
+
+    if not is_valid.all():
+        raise ValueError(f"Communications data error for client: {clients['client_id'].iloc[np.argmin(is_valid)]}")
+
+    # Validate sessions
+    calls = calls[calls['call'].isin(SESSION_COUNTS)]
+
+    treatments = clients[['client_id']].rename_axis('client_position').reset_index()\
+        .merge(calls, on='client_id')\
+        .sort_values(['client_position', 'call'], kind='stable')\
+        .reset_index(drop=True)
+
+    # The client is in the beginning (up to 3 calls), the middle (up to 8 calls) or the end of their treatment.
+    treatments['treatment_phase'] = np.select(
+        [treatments['call'] <= 3, treatments['call'] <= 8],
+        [TREATMENT__PHASE_START, TREATMENT__PHASE_MID],
+        TREATMENT__PHASE_END
+    )
+
+    treatments = treatments.rename(columns={'start_time': 'treatment_timestamp'})
+    return treatments[['client_position', 'client_id', 'treatment_phase', 'treatment_timestamp']]
+
+
 def _to_client_treatments(client: pd.Series, communications: pd.DataFrame) -> List[Dict]:
     """
     Returns the list of client's treatments.
@@ -92,7 +166,7 @@ def _create_snapshot_lists_from(client_treatments: List[Dict]) -> List[List[Dict
 
         if prev_treatment.get(client_id) is None:
             # Generate snapshots 14 days before the treatment occurred.
-            days_before = 14
+            days_before = DAYS_BEFORE_FIRST_TREATMENT
         else:
             # Generate snapshots between the current and previous treatment.
             prev_treatment_timestamp = prev_treatment[client_id]['treatment_timestamp']
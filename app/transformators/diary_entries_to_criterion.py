@@ -1,35 +1,52 @@
+import numpy as np
 import pandas as pd
 
+from typing import Tuple
+
 
 def diary_entries_to_criterion(diary_entries: pd.DataFrame, notifications: pd.DataFrame) -> int:
     """
     Transforms the client's diary entries and their notifications into criterion
     that refers to the completion status of the diary entry.
     """
+    reminder_priorities, completion_priorities = diary_entries_to_criterion_batch(
+        np.array([len(diary_entries.index)]),
+        np.array([len(notifications.index)])
+    )
+
+    return int(reminder_priorities[0]), int(completion_priorities[0])
+
+
+def diary_entries_to_criterion_batch(
+    diary_entries_counts: np.ndarray,
+    notifications_counts: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Transforms the number of the diary entries of the clients at every snapshot,
+    and the number of their notifications, into criterion.
+    """
     return (
-        _get_reminder_priority(notifications),
-        _get_completion_priority(diary_entries)
+        _get_reminder_priority(notifications_counts),
+        _get_completion_priority(diary_entries_counts)
     )
 
 
-def _get_reminder_priority(notifications: pd.DataFrame) -> int:
+def _get_reminder_priority(notifications_counts: np.ndarray) -> np.ndarray:
     """
     Returns priority of the reminder activation
-    from that diary entry `notifications`.
+    from that number of the diary entry notifications.
     """
     UNREMINDED = 0
     REMINDED = 1
 
-    notifications_count = len(notifications.index)
-    return UNREMINDED if notifications_count == 0 else REMINDED
+    return np.where(notifications_counts == 0, UNREMINDED, REMINDED)
 
 
-def _get_completion_priority(diary_entries: pd.DataFrame) -> int:
+def _get_completion_priority(diary_entries_counts: np.ndarray) -> np.ndarray:
     """
-    Returns priority of the completion of that `diary_entries` registration.
+    Returns priority of the completion from that number of the `diary_entries` registrations.
     """
     INCOMPLETE = 0
     COMPLETE = 1
 
-    diaries_count = len(diary_entries.index)
-    return COMPLETE if diaries_count > 0 else INCOMPLETE
+    return np.where(diary_entries_counts > 0, COMPLETE, INCOMPLETE)
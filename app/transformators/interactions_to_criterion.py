@@ -1,9 +1,10 @@
+import numpy as np
 import pandas as pd
 
 from datetime import datetime
-from typing import Union
+from typing import Tuple, Union
 
-from app.helpers import max_timestamp
+from app.helpers import days_since, max_timestamps, to_datetime64, treatment_timestamps
 
 
 def interactions_to_criterion(
@@ -15,22 +16,9 @@ def interactions_to_criterion(
     Transforms the client's communications and their sessions into criterion
     that refers to the number of days of since last contact.
     """
-    return (
-        _get_days_diff_since_last_call(communications, sessions, timestamp),
-        _get_days_diff_since_last_chat(communications, timestamp)
-    )
-
-
-def _get_days_diff_since_last_call(
-    communications: pd.DataFrame,
-    sessions: pd.DataFrame,
-    timestamp: datetime
-) -> Union[int, None]:
-    """
-    Compute days difference since the last call occurred.
-    """
     comms = communications.copy(deep=True)
     calls = comms[(communications['call_made'])]
+    chats = comms[(communications['chat_msg_sent'])]
 
     last_call_at = calls['start_time'].max() \
         if len(calls.index) > 0 else None
@@ -38,21 +26,38 @@ def _get_days_diff_since_last_call(
     last_session_at = sessions['start_time'].max() \
         if len(sessions.index) > 0 else None
 
-    latest_call_at = max_timestamp([last_call_at, last_session_at])
-    return (timestamp - latest_call_at).days if latest_call_at else None
+    last_chat_at = chats['start_time'].max() \
+        if len(chats.index) > 0 else None
 
+    days_since_last_call, days_since_last_chat = interactions_to_criterion_batch(
+        pd.DataFrame({'treatment_timestamp': to_datetime64(timestamp)}),
+        to_datetime64(last_call_at),
+        to_datetime64(last_session_at),
+        to_datetime64(last_chat_at)
+    )
 
-def _get_days_diff_since_last_chat(
-    communications: pd.DataFrame,
-    timestamp: datetime
-) -> Union[int, None]:
-    """
-    Compute days difference since the last chat occurred.
+    return (
+        None if np.isnan(days_since_last_call[0]) else int(days_since_last_call[0]),
+        None if np.isnan(days_since_last_chat[0]) else int(days_since_last_chat[0])
+    )
+
+
+def interactions_to_criterion_batch(
+    snapshots: Union[pd.DataFrame, np.ndarray],
+    last_calls: np.ndarray,
+    last_sessions: np.ndarray,
+    last_chats: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
     """
-    comms = communications.copy(deep=True)
-    chats = comms[(communications['chat_msg_sent'])]
+    Transforms the timestamps of the last calls, sessions, and chats of the clients at every one of the `snapshots`
+    into the criteria that refer to the number of days since the last contact by call and by chat.
 
-    last_chat_at = chats['start_time'].max() \
-        if len(chats.index) > 0 else None
+    The `snapshots` are the treatment snapshots, or their timestamps.
+    The numbers of days are `NaN` when the clients haven't been contacted at the snapshots yet.
+    """
+    timestamps = treatment_timestamps(snapshots)
 
-    return (timestamp - last_chat_at).days if last_chat_at else None
+    return (
+        days_since(timestamps, max_timestamps([last_calls, last_sessions])),
+        days_since(timestamps, last_chats)
+    )
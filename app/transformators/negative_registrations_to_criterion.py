@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from app.helpers import to_dict
+
 
 def negative_registrations_to_criterion(
     trackers_past_7d: pd.DataFrame,
@@ -18,24 +21,44 @@ def negative_registrations_to_criterion(
     total_neg_regs_past_7d = _total_neg_regs(trackers_past_7d)
     total_neg_regs_1w_before_past_7d = _total_neg_regs(trackers_1w_before_past_7d)
 
+    return int(negative_registrations_to_criterion_batch(
+        np.array([total_neg_regs_past_7d]),
+        np.array([total_neg_regs_1w_before_past_7d])
+    )[0])
+
+
+def negative_registrations_to_criterion_batch(
+    total_neg_regs_past_7d: np.ndarray,
+    total_neg_regs_1w_before_past_7d: np.ndarray
+) -> np.ndarray:
+    """
+    Transforms the total negative registrations made by the clients at every snapshot
+    in the last seven days (1-7) and in the seven days before that (8-14) into criterion
+    (see `negative_registrations_to_criterion()`).
+    """
     # Compare those two values with this formula
     rate = (total_neg_regs_past_7d - total_neg_regs_1w_before_past_7d) / (total_neg_regs_1w_before_past_7d + 1)
 
-    return _to_criterion(rate * 100)
+    return _to_criteria(rate * 100)
 
 
 def _total_neg_regs(trackers: pd.DataFrame) -> int:
     """
     Returns total negative registrations from the given trackers.
     """
+    # Use the precomputed flag of the trackers' snapshot when it's available,
+    # otherwise the `value` JSON strings (or dictionaries) are converted.
+    if 'is_negative_registration' in trackers.columns:
+        return int(trackers['is_negative_registration'].sum())
+
     # Get total negative avoidances
     avoidances = trackers[(trackers['name'] == 'measure_avoidance')].copy(deep=True)
-    avoidances['is_negative_reg'] = avoidances['value'].apply(lambda item: bool(item['boolean']))
+    avoidances['is_negative_reg'] = avoidances['value'].apply(lambda item: bool(to_dict(item)['boolean']))
     total_avoidance = len(avoidances[(avoidances['is_negative_reg'])].index)
 
     # Get total negative safety behaviours
     safety_behaviours = trackers[(trackers['name'] == 'measure_safety_behaviour')].copy(deep=True)
-    safety_behaviours['is_negative_reg'] = safety_behaviours['value'].apply(lambda item: bool(item['boolean']))
+    safety_behaviours['is_negative_reg'] = safety_behaviours['value'].apply(lambda item: bool(to_dict(item)['boolean']))
     total_safety_behaviour = len(safety_behaviours[(safety_behaviours['is_negative_reg'])].index)
 
     # Get total worries
@@ -49,19 +72,24 @@ def _to_criterion(percentage: int) -> int:
     """
     Transforms the percentage of negative registration into categorical value.
     """
+    return int(_to_criteria(np.array([percentage]))[0])
+
+
+def _to_criteria(percentages: np.ndarray) -> np.ndarray:
+    """
+    Transforms the percentages of negative registration into categorical values.
+    """
     TYPE_DECREASE = 0
     TYPE_STABLE = 1
     TYPE_SMALL_INCREASE = 2
     TYPE_BIG_INCREASE = 3
 
-    if percentage > 100:
-        return TYPE_BIG_INCREASE
-
-    elif percentage > 20 and percentage <= 100:
-        return TYPE_SMALL_INCREASE
-
-    elif percentage > -20 and percentage <= 20:
-        return TYPE_STABLE
-
-    else:
-        return TYPE_DECREASE
+    return np.select(
+        [
+            percentages > 100,
+            (percentages > 20) & (percentages <= 100),
+            (percentages > -20) & (percentages <= 20),
+        ],
+        [TYPE_BIG_INCREASE, TYPE_SMALL_INCREASE, TYPE_STABLE],
+        TYPE_DECREASE
+    )
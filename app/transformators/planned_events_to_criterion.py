@@ -1,48 +1,66 @@
+import numpy as np
 import pandas as pd
 
+from typing import Tuple
+
 
 def planned_events_to_criterion(events: pd.DataFrame) -> int:
     """
     Transforms planned event's completions into criterion.
     """
+    events_count = len(events.index)
+    incomplete_events_count = len(events[
+        (events['status'] == 'INCOMPLETED') |
+        (events['status'] == 'CANCELED')
+    ].index)
+
+    schedule_priorities, completion_priorities = planned_events_to_criterion_batch(
+        np.array([events_count]),
+        np.array([incomplete_events_count])
+    )
+
+    return int(schedule_priorities[0]), int(completion_priorities[0])
+
+
+def planned_events_to_criterion_batch(
+    events_counts: np.ndarray,
+    incomplete_events_counts: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Transforms the number of the planned event's completions of the clients at every snapshot,
+    and the number of the incompleted or canceled ones, into criterion.
+    """
     return (
-        _get_schedule_priority(events),
-        _get_completion_priority(events)
+        _get_schedule_priority(events_counts),
+        _get_completion_priority(events_counts, incomplete_events_counts)
     )
 
 
-def _get_schedule_priority(events: pd.DataFrame) -> int:
+def _get_schedule_priority(events_counts: np.ndarray) -> np.ndarray:
     """
-    Returns priority of the schedule type from that `events`.
+    Returns priority of the schedule type from that `events_counts`.
     """
     UNPLANNED = 0
     PLANNED = 1
 
-    events_count = len(events.index)
-    return UNPLANNED if events_count == 0 else PLANNED
+    return np.where(events_counts == 0, UNPLANNED, PLANNED)
 
 
-def _get_completion_priority(events: pd.DataFrame) -> int:
+def _get_completion_priority(events_counts: np.ndarray, incomplete_events_counts: np.ndarray) -> np.ndarray:
     """
-    Returns priority of the event completion of that `events`.
+    Returns priority of the event completion from that `events_counts` and `incomplete_events_counts`.
     """
     NONE = 0
     INCOMPLETE = 1
     SOME_COMPLETE = 2
     COMPLETE = 3
 
-    events_count = len(events.index)
-    if events_count == 0:
-        return NONE
-
-    incomplete_events_count = len(events[
-        (events['status'] == 'INCOMPLETED') |
-        (events['status'] == 'CANCELED')
-    ].index)
-
-    if incomplete_events_count == 0:
-        return COMPLETE
-    elif incomplete_events_count == events_count:
-        return INCOMPLETE
-    else:
-        return SOME_COMPLETE
+    return np.select(
+        [
+            events_counts == 0,
+            incomplete_events_counts == 0,
+            incomplete_events_counts == events_counts,
+        ],
+        [NONE, COMPLETE, INCOMPLETE],
+        SOME_COMPLETE
+    )
@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from app.helpers import to_dict
+
 
 def positive_registrations_to_criterion(
     trackers_past_7d: pd.DataFrame,
@@ -17,24 +20,45 @@ def positive_registrations_to_criterion(
     total_pos_regs_past_7d = _total_pos_regs(trackers_past_7d)
     total_pos_regs_1w_before_past_7d = _total_pos_regs(trackers_1w_before_past_7d)
 
+    return int(positive_registrations_to_criterion_batch(
+        np.array([total_pos_regs_past_7d]),
+        np.array([total_pos_regs_1w_before_past_7d])
+    )[0])
+
+
+def positive_registrations_to_criterion_batch(
+    total_pos_regs_past_7d: np.ndarray,
+    total_pos_regs_1w_before_past_7d: np.ndarray
+) -> np.ndarray:
+    """
+    Transforms the total positive registrations made by the clients at every snapshot
+    in the last seven days (1-7) and in the seven days before that (8-14) into criterion
+    (see `positive_registrations_to_criterion()`).
+    """
     # Compare those two values with this formula
     rate = (total_pos_regs_past_7d - total_pos_regs_1w_before_past_7d) / (total_pos_regs_1w_before_past_7d + 1)
 
-    return _to_criterion(rate * 100)
+    return _to_criteria(rate * 100)
 
 
 def _total_pos_regs(trackers: pd.DataFrame) -> int:
     """
     Returns total positive registrations from the given trackers.
     """
+    # Use the precomputed flag of the trackers' snapshot when it's available,
+    # otherwise the `value` JSON strings (or dictionaries) are converted.
+    if 'is_negative_registration' in trackers.columns:
+        is_measured = trackers['name'].isin(['measure_avoidance', 'measure_safety_behaviour'])
+        return int((is_measured & ~trackers['is_negative_registration']).sum())
+
     # Get total positive avoidances
     avoidances = trackers[(trackers['name'] == 'measure_avoidance')].copy(deep=True)
-    avoidances['is_negative_reg'] = avoidances['value'].apply(lambda item: bool(item['boolean']))
+    avoidances['is_negative_reg'] = avoidances['value'].apply(lambda item: bool(to_dict(item)['boolean']))
     total_avoidance = len(avoidances[~(avoidances['is_negative_reg'])].index)
 
     # Get total positive safety behaviours
     safety_behaviours = trackers[(trackers['name'] == 'measure_safety_behaviour')].copy(deep=True)
-    safety_behaviours['is_negative_reg'] = safety_behaviours['value'].apply(lambda item: bool(item['boolean']))
+    safety_behaviours['is_negative_reg'] = safety_behaviours['value'].apply(lambda item: bool(to_dict(item)['boolean']))
     total_safety_behaviour = len(safety_behaviours[~(safety_behaviours['is_negative_reg'])].index)
 
     return total_avoidance + total_safety_behaviour
@@ -44,15 +68,22 @@ def _to_criterion(percentage: int) -> int:
     """
     Transforms the percentage of positive registration into categorical value.
     """
+    return int(_to_criteria(np.array([percentage]))[0])
+
+
+def _to_criteria(percentages: np.ndarray) -> np.ndarray:
+    """
+    Transforms the percentages of positive registration into categorical values.
+    """
     TYPE_INCREASE = 0
     TYPE_STABLE = 1
     TYPE_DECREASE = 2
 
-    if percentage > 20:
-        return TYPE_INCREASE
-
-    elif percentage > -20 and percentage <= 20:
-        return TYPE_STABLE
-
-    else:
-        return TYPE_DECREASE
+    return np.select(
+        [
+            percentages > 20,
+            (percentages > -20) & (percentages <= 20),
+        ],
+        [TYPE_INCREASE, TYPE_STABLE],
+        TYPE_DECREASE
+    )
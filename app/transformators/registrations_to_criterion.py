@@ -1,9 +1,10 @@
+import numpy as np
 import pandas as pd
 
 from datetime import datetime
 from typing import Union
 
-from app.helpers import max_timestamp
+from app.helpers import days_since, max_timestamps, to_datetime64, treatment_timestamps
 
 
 def registrations_to_criterion(
@@ -37,12 +38,32 @@ def registrations_to_criterion(
     custom_tracker_last_reg_date = custom_tracker_reg_dates.max() \
         if len(custom_tracker_reg_dates.index) > 0 else None
 
-    # Find the maximum timestamp
-    latest_timestamp = max_timestamp([
-        diary_last_reg_date,
-        thought_record_last_reg_date,
-        smq_last_reg_date,
-        custom_tracker_last_reg_date
-    ])
+    days_since_last_registration = registrations_to_criterion_batch(
+        pd.DataFrame({'treatment_timestamp': to_datetime64(timestamp)}),
+        to_datetime64(diary_last_reg_date),
+        to_datetime64(thought_record_last_reg_date),
+        to_datetime64(smq_last_reg_date),
+        to_datetime64(custom_tracker_last_reg_date)
+    )
 
-    return (timestamp - latest_timestamp).days if latest_timestamp else None
+    return None if np.isnan(days_since_last_registration[0]) else int(days_since_last_registration[0])
+
+
+def registrations_to_criterion_batch(
+    snapshots: Union[pd.DataFrame, np.ndarray],
+    last_diaries: np.ndarray,
+    last_thought_records: np.ndarray,
+    last_smqs: np.ndarray,
+    last_custom_trackers: np.ndarray
+) -> np.ndarray:
+    """
+    Transforms the timestamps of the last registrations of the clients at every one of the `snapshots`
+    into the criterion that refers to the number of days since the last registration.
+
+    The `snapshots` are the treatment snapshots, or their timestamps.
+    The numbers of days are `NaN` when the clients haven't made any registration at the snapshots yet.
+    """
+    # Find the maximum timestamps
+    latest_timestamps = max_timestamps([last_diaries, last_thought_records, last_smqs, last_custom_trackers])
+
+    return days_since(treatment_timestamps(snapshots), latest_timestamps)
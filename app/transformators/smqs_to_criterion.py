@@ -1,7 +1,11 @@
 import numpy as np
 import pandas as pd
 
-from typing import Union
+from typing import Tuple, Union
+
+
+# Indicators of the SMQ scores
+FOCUSED_COLUMNS = ['applicability', 'connection', 'content', 'progress', 'way_of_working']
 
 
 def smqs_to_criterion(last_smq: Union[pd.Series, None], previous_smq: Union[pd.Series, None]) -> int:
@@ -12,54 +16,102 @@ def smqs_to_criterion(last_smq: Union[pd.Series, None], previous_smq: Union[pd.S
         - `last_smq`: The last SMQ.
         - `previous_smq`: The previous SMQ.
     """
+    smqs = pd.DataFrame([_scores_of(last_smq), _scores_of(previous_smq)], columns=FOCUSED_COLUMNS)
+
+    scores_diff, low_score = smqs_to_criterion_batch(
+        smqs,
+        np.array([-1 if last_smq is None else 0]),
+        np.array([-1 if previous_smq is None else 1])
+    )
+
+    return int(scores_diff[0]), int(low_score[0])
+
+
+def smqs_to_criterion_batch(
+    smqs: Union[pd.DataFrame, np.ndarray],
+    last_positions: np.ndarray,
+    previous_positions: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Transforms the last and previous SMQs of the clients at every snapshot into categorical values.
+
+    Arguments:
+        - `smqs`: The SMQs, or their scores (see `smqs_to_scores()`).
+        - `last_positions`: The positions of the last SMQs in `smqs`, or -1 when there's no last SMQ.
+        - `previous_positions`: The positions of the previous SMQs in `smqs`, or -1 when there's no previous SMQ.
+    """
+    scores = smqs if isinstance(smqs, np.ndarray) else smqs_to_scores(smqs)
+
+    last_scores = _take_scores(scores, last_positions)
+    previous_scores = _take_scores(scores, previous_positions)
+
     return (
-        _get_scores_diff(last_smq, previous_smq),
-        _get_low_score(last_smq)
+        _get_scores_diff(last_scores, previous_scores, (last_positions >= 0) & (previous_positions >= 0)),
+        _get_low_score(last_scores)
     )
 
 
-def _get_scores_diff(last_smq: Union[pd.Series, None], previous_smq: Union[pd.Series, None]) -> int:
+def smqs_to_scores(smqs: pd.DataFrame) -> np.ndarray:
     """
-    Returns priority of the scores difference between `last_smq` and `previous_smq`.
+    Returns the scores of the `smqs`, with a column for each of the `FOCUSED_COLUMNS`.
+    """
+    # The SMQs have no score columns at all when there are none of them.
+    return smqs.reindex(columns=FOCUSED_COLUMNS).to_numpy(dtype=float)
+
+
+def _scores_of(smq: Union[pd.Series, pd.DataFrame, None]) -> pd.Series:
+    """
+    Returns the scores of that `smq`, which are missing when there are none.
     """
-    # Extracts relevant columns
-    focused_columns = ['applicability', 'connection', 'content', 'progress', 'way_of_working']
-    last_scores = None if last_smq is None else last_smq[focused_columns].copy()
-    previous_scores = None if previous_smq is None else previous_smq[focused_columns].copy()
+    if isinstance(smq, pd.DataFrame):
+        smq = smq.iloc[0] if len(smq.index) > 0 else None
 
+    if smq is None:
+        return pd.Series(np.nan, index=FOCUSED_COLUMNS)
+
+    return smq[FOCUSED_COLUMNS]
+
+
+def _take_scores(scores: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+    Returns the `scores` at those `positions`, which are missing at the negative positions.
+    """
+    taken = np.full((len(positions), len(FOCUSED_COLUMNS)), np.nan)
+    taken[positions >= 0] = scores[positions[positions >= 0]]
+
+    return taken
+
+
+def _get_scores_diff(last_scores: np.ndarray, previous_scores: np.ndarray, has_scores: np.ndarray) -> np.ndarray:
+    """
+    Returns priority of the scores difference between `last_scores` and `previous_scores`.
+    """
     # Calculate criterion
     LARGE_DECREASE = 1
     STABLE = 2
     LARGE_INCREASE = 3
 
-    # If either of the SMQ's last scores or the SMQ's previous scores is None, return `STABLE`
-    # @see https://mitrd.slack.com/archives/C049Y8M8G5Q/p1691657753060259?thread_ts=1691566944.227709&cid=C049Y8M8G5Q
-    if last_scores is None or previous_scores is None:
-        return STABLE
-
     scores_diff = last_scores - previous_scores
 
-    if np.any(scores_diff > 1.5):
-        return LARGE_INCREASE
-    elif np.any(scores_diff >= -1.5) and np.any(scores_diff <= 1.5):
-        return STABLE
-    else:
-        return LARGE_DECREASE
+    # If either of the SMQ's last scores or the SMQ's previous scores is None, return `STABLE`
+    # @see https://mitrd.slack.com/archives/C049Y8M8G5Q/p1691657753060259?thread_ts=1691566944.227709&cid=C049Y8M8G5Q
+    return np.select(
+        [
+            ~has_scores,
+            np.any(scores_diff > 1.5, axis=1),
+            np.any(scores_diff >= -1.5, axis=1) & np.any(scores_diff <= 1.5, axis=1),
+        ],
+        [STABLE, LARGE_INCREASE, STABLE],
+        LARGE_DECREASE
+    )
 
 
-def _get_low_score(last_smq: Union[pd.Series, None]) -> int:
+def _get_low_score(last_scores: np.ndarray) -> np.ndarray:
     """
     Returns priority of the scores difference between `last_smq` and `previous_smq`.
     """
-    # Extracts relevant columns
-    focused_columns = ['applicability', 'connection', 'content', 'progress', 'way_of_working']
-    last_scores = None if last_smq is None else last_smq[focused_columns].copy()
-
     # Calculate criterion
     NONE = 0
     LOW_SCORE = 1
 
-    if last_scores is not None and np.any(last_scores < 4.5):
-        return LOW_SCORE
-
-    return NONE
+    return np.where(np.any(last_scores < 4.5, axis=1), LOW_SCORE, NONE)
@@ -1,35 +1,52 @@
+import numpy as np
 import pandas as pd
 
+from typing import Tuple
+
 
 def thought_records_to_criterion(thought_records: pd.DataFrame, notifications: pd.DataFrame) -> int:
     """
     Transforms the client's thought records and their notifications into criterion
     that refers to the completion status of the thought record.
     """
+    reminder_priorities, completion_priorities = thought_records_to_criterion_batch(
+        np.array([len(thought_records.index)]),
+        np.array([len(notifications.index)])
+    )
+
+    return int(reminder_priorities[0]), int(completion_priorities[0])
+
+
+def thought_records_to_criterion_batch(
+    thought_records_counts: np.ndarray,
+    notifications_counts: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Transforms the number of the thought records of the clients at every snapshot,
+    and the number of their notifications, into criterion.
+    """
     return (
-        _get_reminder_priority(notifications),
-        _get_completion_priority(thought_records)
+        _get_reminder_priority(notifications_counts),
+        _get_completion_priority(thought_records_counts)
     )
 
 
-def _get_reminder_priority(notifications: pd.DataFrame) -> int:
+def _get_reminder_priority(notifications_counts: np.ndarray) -> np.ndarray:
     """
     Returns priority of the reminder activation
-    from that thought records `notifications`.
+    from that number of the thought record notifications.
     """
     UNREMINDED = 0
     REMINDED = 1
 
-    notifications_count = len(notifications.index)
-    return UNREMINDED if notifications_count == 0 else REMINDED
+    return np.where(notifications_counts == 0, UNREMINDED, REMINDED)
 
 
-def _get_completion_priority(thought_records: pd.DataFrame) -> int:
+def _get_completion_priority(thought_records_counts: np.ndarray) -> np.ndarray:
     """
-    Returns priority of the completion of that `thought_records` registration.
+    Returns priority of the completion from that number of the `thought_records` registrations.
     """
     INCOMPLETE = 0
     COMPLETE = 1
 
-    thought_records_count = len(thought_records.index)
-    return COMPLETE if thought_records_count > 0 else INCOMPLETE
+    return np.where(thought_records_counts > 0, COMPLETE, INCOMPLETE)